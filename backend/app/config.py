@@ -14,8 +14,41 @@ class Settings(BaseSettings):
     ollama_model: str = "llama3.1:8b"
     embedding_dim: int = 384
     embedding_model: str = "all-MiniLM-L6-v2"
-    embedding_provider: str = "sentence_transformer"  # "sentence_transformer" or "hash"
+    embedding_provider: str = "sentence_transformer"  # "sentence_transformer", "onnx" or "hash"
+    embedding_onnx_dir: str = "models/all-MiniLM-L6-v2-onnx"  # output of scripts/export_onnx_embedder.py
+    embedding_onnx_quantized: bool = False  # use the int8 model_quantized.onnx
+    embedding_artifact_dir: str | None = None  # precomputed .npy matrices; default data/embeddings
+    embedding_preload: bool = False  # load the model at import (before gunicorn forks) instead of in the background
+    embedding_cache_size: int = 2048
+    embedding_cache_path: str | None = None  # e.g. "/app/cache/query_embeddings.npz"
+    vector_index_backend: str = "memory"  # "memory" (in-process NumPy matrix) or "pgvector"
+    vector_index_refresh_seconds: int = 300
+    # pgvector ANN index on verses.embedding (used when VECTOR_INDEX_BACKEND=pgvector)
+    pgvector_index: str = "hnsw"  # "hnsw", "ivfflat" or "none"
+    pgvector_hnsw_m: int = 16
+    pgvector_hnsw_ef_construction: int = 64
+    pgvector_ivfflat_lists: int = 100
+    pgvector_ef_search: int = 40  # per-query HNSW candidate list; higher = better recall, slower
+    pgvector_probes: int = 10  # per-query IVFFlat lists scanned
+    retrieval_mode: str = "vector"  # "vector", "lexical" or "hybrid"; requests may override
+    retrieval_rrf_k: int = 60
     cache_ttl_seconds: int = 300
+    cache_max_entries: int = 4096
+    cache_max_mb: int = 64
+    # Per-namespace TTL overrides in seconds, 0 = never expire; e.g. CACHE_NAMESPACE_TTLS='{"chat": 60}'
+    cache_namespace_ttls: dict[str, int] = {"verses": 0, "chapters": 0, "chat": 120}
+    # Background pre-generation of single-mood guidance and morning greetings for every mode/language
+    cache_warmer_enabled: bool = False
+    cache_warmer_concurrency: int = 4
+    cache_warmer_interval_seconds: int = 0  # 0 = 80% of the shortest mood/morning TTL
+    cache_l2_backend: str = "none"  # "postgres" shares LLM responses across workers via the response_cache table
+    # Serve /ask and /moods/guidance from a similar earlier query (same verses, cosine >= threshold)
+    semantic_cache_enabled: bool = False
+    semantic_cache_threshold: float = 0.92
+    semantic_cache_max_entries: int = 512
+    # Cache-Control max-age for verse/chapter responses; clients revalidate with If-None-Match afterwards
+    static_cache_max_age_seconds: int = 86400
+    data_version_ttl_seconds: float = 10.0  # how long ETags may lag a reseed; bounds fingerprint scans per worker
     use_mock_provider: bool = True
     production_domain: str | None = None  # e.g. "https://gita.yourdomain.com"
 
@@ -24,14 +57,46 @@ class Settings(BaseSettings):
     # Claude (Anthropic)
     anthropic_api_key: str | None = None
     claude_model: str = "claude-sonnet-4-5-20250929"
+    anthropic_api_url: str = "https://api.anthropic.com/v1/messages"
 
     # OpenAI / Codex
     openai_api_key: str | None = None
     codex_model: str = "gpt-4o-mini"
+    openai_api_url: str = "https://api.openai.com/v1/chat/completions"
 
     # Router default: "claude" or "codex"
     default_llm: str = "claude"
 
+    # Connection pool of each provider's long-lived async HTTP client
+    llm_http2: bool = True
+    llm_max_connections: int = 20
+    llm_max_keepalive_connections: int = 10
+    llm_keepalive_expiry_seconds: float = 30.0
+    # Hedging: if the first provider is slower than its rolling p95 (or the fixed delay until
+    # enough calls are seen), also ask the next external provider and keep the first answer
+    llm_hedge_enabled: bool = False
+    llm_hedge_delay_ms: int = 4000
+    llm_hedge_percentile: float = 95.0  # 0 = always use the fixed delay
+    # Circuit breaker: skip a provider after N failures within the window, probe again after the cool-down
+    llm_breaker_failure_threshold: int = 5
+    llm_breaker_window_seconds: float = 60.0
+    llm_breaker_cooldown_seconds: float = 30.0
+    # Deadline per endpoint, from request arrival: providers get the remaining time as their
+    # timeout and the offline mock answers once it is spent (0 or missing = no deadline)
+    llm_deadline_seconds: dict[str, float] = {"ask": 20.0, "mood": 20.0, "chat": 25.0, "morning": 20.0}
+    # Concurrent calls per provider; callers beyond the limit queue (bounded size and wait),
+    # then get 429 with Retry-After. Providers left out are unlimited
+    llm_max_in_flight: dict[str, int] = {"claude": 16, "codex": 16, "gemini": 8, "ollama": 2}
+    llm_queue_max_size: int = 32
+    llm_queue_max_wait_seconds: float = 5.0
+    # Adaptive failover: rank fallbacks by EWMA latency + error rate per endpoint type; with
+    # LLM_ADAPTIVE_REORDER_PRIMARY a degraded primary also yields to a peer in its quality tier
+    llm_adaptive_routing: bool = True
+    llm_adaptive_alpha: float = 0.2
+    llm_adaptive_error_penalty_ms: float = 10000.0
+    llm_adaptive_reorder_primary: bool = False
+    llm_quality_tiers: list[list[str]] = [["claude", "codex", "gemini"]]
+
     model_config = SettingsConfigDict(
         env_file=".env",
         env_file_encoding="utf-8",
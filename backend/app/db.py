@@ -53,6 +53,64 @@ def ensure_schema_compatibility() -> None:
         )
 
 
+VECTOR_INDEX_PREFIX = "ix_verses_embedding_"
+# Arbitrary key for pg_advisory_xact_lock; serializes index changes between gunicorn workers.
+VECTOR_INDEX_LOCK_ID = 0x67697461
+
+
+def vector_index_name() -> str | None:
+    """Name of the configured ANN index; parameters are part of the name so changing them rebuilds it."""
+    if settings.pgvector_index == "hnsw":
+        return f"{VECTOR_INDEX_PREFIX}hnsw_m{settings.pgvector_hnsw_m}_ef{settings.pgvector_hnsw_ef_construction}"
+    if settings.pgvector_index == "ivfflat":
+        return f"{VECTOR_INDEX_PREFIX}ivfflat_l{settings.pgvector_ivfflat_lists}"
+    return None
+
+
+def ensure_vector_index(*, reindex: bool = False) -> str | None:
+    """Create the configured HNSW/IVFFlat index on verses.embedding and drop stale variants.
+
+    IVFFlat picks its centroids from the rows present at build time, so pass
+    ``reindex=True`` after (re)seeding to rebuild it on the real data. Every
+    worker calls this from ``init_db``; a transaction-scoped advisory lock makes
+    them take turns, so only the first one drops or builds anything.
+    """
+    wanted = vector_index_name()
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": VECTOR_INDEX_LOCK_ID})
+        existing = conn.execute(
+            text("SELECT indexname FROM pg_indexes WHERE tablename = 'verses' AND indexname LIKE :prefix"),
+            {"prefix": f"{VECTOR_INDEX_PREFIX}%"},
+        ).scalars().all()
+        for name in existing:
+            if name != wanted:
+                conn.execute(text(f'DROP INDEX IF EXISTS "{name}"'))
+
+        if settings.pgvector_index == "hnsw":
+            conn.execute(
+                text(
+                    f"""
+                    CREATE INDEX IF NOT EXISTS "{wanted}" ON verses
+                      USING hnsw (embedding vector_cosine_ops)
+                      WITH (m = {int(settings.pgvector_hnsw_m)}, ef_construction = {int(settings.pgvector_hnsw_ef_construction)})
+                    """
+                )
+            )
+        elif settings.pgvector_index == "ivfflat":
+            conn.execute(
+                text(
+                    f"""
+                    CREATE INDEX IF NOT EXISTS "{wanted}" ON verses
+                      USING ivfflat (embedding vector_cosine_ops)
+                      WITH (lists = {int(settings.pgvector_ivfflat_lists)})
+                    """
+                )
+            )
+        if reindex and settings.pgvector_index == "ivfflat" and wanted in existing:
+            conn.execute(text(f'REINDEX INDEX "{wanted}"'))
+    return wanted
+
+
 def init_db() -> None:
     from . import models  # noqa: F401
 
@@ -60,3 +118,4 @@ def init_db() -> None:
         conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
     Base.metadata.create_all(bind=engine)
     ensure_schema_compatibility()
+    ensure_vector_index()
@@ -1,20 +1,25 @@
-﻿import logging
-import asyncio
+﻿import asyncio
+import logging
 import json
 import time
 import hashlib
-from datetime import date
-from typing import Any
+import tempfile
+from contextlib import aclosing
+from datetime import date, datetime, timedelta
+from functools import partial
+from pathlib import Path
+from typing import Any, get_args
 
 from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response, status
 from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from sqlalchemy import delete, func, select
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy import delete, func, select, text
 from sqlalchemy.orm import Session, selectinload
 
 from .config import get_settings
-from .db import SessionLocal, get_db, init_db
+from .db import SessionLocal, engine, get_db, init_db
 from .logging_config import configure_logging
 from .models import Favorite, Verse
 from .schemas import (
@@ -24,25 +29,48 @@ from .schemas import (
     ChatResponse,
     FavoriteCreate,
     FavoriteOut,
+    GuidanceMode,
     GuidanceVerse,
     GuidanceResponse,
     JourneyOut,
+    LanguageCode,
     MorningBackground,
     MorningGreetingRequest,
     MorningGreetingResponse,
     MoodGuidanceRequest,
     MoodOptionsResponse,
+    RetrievalMode,
     VerseOut,
 )
-from .services.cache import TTLCache
+from .services.admission import ProviderOverloaded
+from .services.cache import LRUCache, TieredCache
 from .services.chatbot import GeminiChatProvider, MockChatProvider, OllamaChatProvider
 from .services.claude_provider import ClaudeChatProvider, ClaudeProvider
 from .services.codex_provider import CodexChatProvider, CodexGuidanceProvider
-from .services.embeddings import create_embedding_provider
+from .services.dataset import ContentVersion
+from .services.deadline import Deadline
+from .services.embedding_cache import CachedEmbeddingProvider, EmbeddingCache
+from .services.embeddings import create_embedding_provider, load_embedding_provider
+from .services.encoded_payload import EncodedPayload, choose_encoding
 from .services.guidance import GeminiProvider, MockProvider
-from .services.llm_orchestrator import LLMOrchestrator
-from .services.retrieval import VerseRetriever
+from .services.http_client import PoolLimits
+from .services.lexical_index import BM25Index
+from .services.llm_orchestrator import (
+    AdaptivePolicy,
+    BreakerPolicy,
+    ConcurrencyPolicy,
+    HedgePolicy,
+    LLMOrchestrator,
+    routing_log_writer,
+)
+from .services.pg_cache import PostgresResponseCache
+from .services.response_warmer import FileLeaderLock, PostgresLeaderLock, ResponseWarmer
+from .services.retrieval import RetrievalResult, VerseRetriever
+from .services.semantic_cache import SemanticCache
+from .services.single_flight import AsyncSingleFlight, SingleFlight
+from .services.vector_index import VerseVectorIndex
 from .services.verification import verify_answer
+from .services.warmup import FAILED, Warmup
 
 settings = get_settings()
 configure_logging()
@@ -89,20 +117,100 @@ if not settings.production_domain:
 else:
     logger.info("CORS allow_origins=%s", _cors_allow_origins())
 
-cache = TTLCache(ttl_seconds=settings.cache_ttl_seconds)
-embedding_provider = create_embedding_provider(
+cache = TieredCache(
+    LRUCache(
+        default_ttl_seconds=settings.cache_ttl_seconds,
+        namespace_ttls=settings.cache_namespace_ttls,
+        max_entries=settings.cache_max_entries,
+        max_bytes=settings.cache_max_mb * 1024 * 1024,
+    ),
+    PostgresResponseCache(
+        SessionLocal,
+        [GuidanceResponse, ChatResponse, MorningGreetingResponse],
+        namespaces=['mood', 'ask', 'chat', 'morning'],
+    )
+    if settings.cache_l2_backend == 'postgres'
+    else None,
+)
+# Concurrent cache misses for the same key share one upstream LLM call: async_single_flight
+# for the async endpoints (the warmer joins it too), single_flight for the morning greeting.
+single_flight = SingleFlight()
+async_single_flight = AsyncSingleFlight()
+content_version = ContentVersion(ttl_seconds=settings.data_version_ttl_seconds)
+semantic_cache = (
+    SemanticCache(
+        threshold=settings.semantic_cache_threshold,
+        max_entries=settings.semantic_cache_max_entries,
+        ttl_seconds=settings.cache_ttl_seconds,
+    )
+    if settings.semantic_cache_enabled
+    else None
+)
+# The model loads in the startup warmup thread unless EMBEDDING_PRELOAD is set, in which
+# case it loads here, at import, so gunicorn --preload shares it with forked workers.
+base_embedding_provider = create_embedding_provider(
     provider_type=settings.embedding_provider,
+    eager=settings.embedding_preload,
     model_name=settings.embedding_model,
     dimension=settings.embedding_dim,
+    onnx_model_dir=settings.embedding_onnx_dir,
+    onnx_quantized=settings.embedding_onnx_quantized,
 )
-logger.info("Embedding provider: %s (dim=%d)", type(embedding_provider).__name__, embedding_provider.dimension)
-retriever = VerseRetriever(session_factory=SessionLocal, embedding_provider=embedding_provider)
+embedding_cache = EmbeddingCache(
+    max_entries=settings.embedding_cache_size,
+    model_name=f'{type(base_embedding_provider).__name__}:{settings.embedding_model}',
+    path=settings.embedding_cache_path,
+)
+embedding_provider = CachedEmbeddingProvider(base_embedding_provider, embedding_cache)
+retriever = VerseRetriever(
+    session_factory=SessionLocal,
+    embedding_provider=embedding_provider,
+    vector_index=VerseVectorIndex() if settings.vector_index_backend == 'memory' else None,
+    lexical_index=BM25Index(),
+    refresh_interval_seconds=settings.vector_index_refresh_seconds,
+    default_mode=settings.retrieval_mode,  # type: ignore[arg-type]
+    rrf_k=settings.retrieval_rrf_k,
+    ef_search=settings.pgvector_ef_search,
+    probes=settings.pgvector_probes,
+)
+
+
+def _warm_retrieval_indexes() -> str | None:
+    retriever.refresh(force=True)
+    return retriever.dataset_version
+
+
+def _warm_embedding_model() -> str:
+    loaded = load_embedding_provider(base_embedding_provider, fallback_dimension=settings.embedding_dim)
+    if loaded is not base_embedding_provider:
+        # Fell back to hash embeddings: anything cached so far came from a different model.
+        embedding_cache.clear()
+        embedding_cache.model_name = f'{type(loaded).__name__}:{settings.embedding_model}'
+        embedding_provider.provider = loaded
+    cache_entries = embedding_cache.load(dimension=loaded.dimension)
+    logger.info(
+        "Embedding provider: %s (dim=%d, cached_queries=%d)", type(loaded).__name__, loaded.dimension, cache_entries
+    )
+    return f'{type(loaded).__name__} dim={loaded.dimension}'
+
+
+warmup = Warmup()
+warmup.add('retrieval_indexes', _warm_retrieval_indexes)
+warmup.add('embedding_model', _warm_embedding_model)
 
 # ---------------------------------------------------------------------------
 # Multi-LLM orchestrator (Claude primary -> Codex fallback -> Gemini -> mock)
 # ---------------------------------------------------------------------------
 mock_provider = MockProvider()
 mock_chat_provider = MockChatProvider()
+llm_limits = PoolLimits(
+    max_connections=settings.llm_max_connections,
+    max_keepalive_connections=settings.llm_max_keepalive_connections,
+    keepalive_expiry_seconds=settings.llm_keepalive_expiry_seconds,
+    http2=settings.llm_http2,
+)
+# External providers raise on failure so the orchestrator can fail over (or hedge) between
+# them; the mock is always tried last.
 _guidance_providers: dict[str, Any] = {'mock': mock_provider}
 _chat_providers: dict[str, Any] = {'mock': mock_chat_provider}
 allow_external_llms = not settings.use_mock_provider
@@ -111,51 +219,79 @@ if allow_external_llms and settings.gemini_api_key:
     _guidance_providers['gemini'] = GeminiProvider(
         api_key=settings.gemini_api_key,
         model=settings.gemini_model,
-        fallback=mock_provider,
+        limits=llm_limits,
     )
     _chat_providers['gemini'] = GeminiChatProvider(
         api_key=settings.gemini_api_key,
         model=settings.gemini_model,
-        fallback=mock_chat_provider,
+        limits=llm_limits,
     )
 
 if allow_external_llms and settings.use_ollama_provider:
     _chat_providers['ollama'] = OllamaChatProvider(
         base_url=settings.ollama_base_url,
         model=settings.ollama_model,
-        fallback=mock_chat_provider,
+        limits=llm_limits,
     )
 
 if allow_external_llms and settings.openai_api_key:
     _guidance_providers['codex'] = CodexGuidanceProvider(
         api_key=settings.openai_api_key,
         model=settings.codex_model,
-        fallback=mock_provider,
+        limits=llm_limits,
+        api_url=settings.openai_api_url,
     )
     _chat_providers['codex'] = CodexChatProvider(
         api_key=settings.openai_api_key,
         model=settings.codex_model,
-        fallback=mock_chat_provider,
+        limits=llm_limits,
+        api_url=settings.openai_api_url,
     )
 
 if allow_external_llms and settings.anthropic_api_key:
     _guidance_providers['claude'] = ClaudeProvider(
         api_key=settings.anthropic_api_key,
         model=settings.claude_model,
-        fallback=mock_provider,
+        limits=llm_limits,
+        api_url=settings.anthropic_api_url,
     )
     _chat_providers['claude'] = ClaudeChatProvider(
         api_key=settings.anthropic_api_key,
         model=settings.claude_model,
-        fallback=mock_chat_provider,
+        limits=llm_limits,
+        api_url=settings.anthropic_api_url,
     )
 
 orchestrator = LLMOrchestrator(
     guidance_providers=_guidance_providers,
     chat_providers=_chat_providers,
     default_llm=settings.default_llm,  # type: ignore[arg-type]
+    hedge=HedgePolicy(delay_ms=settings.llm_hedge_delay_ms, percentile=settings.llm_hedge_percentile)
+    if settings.llm_hedge_enabled
+    else None,
+    breaker=BreakerPolicy(
+        failure_threshold=settings.llm_breaker_failure_threshold,
+        window_seconds=settings.llm_breaker_window_seconds,
+        cooldown_seconds=settings.llm_breaker_cooldown_seconds,
+    ),
+    concurrency=ConcurrencyPolicy(
+        max_in_flight=settings.llm_max_in_flight,
+        max_queue=settings.llm_queue_max_size,
+        max_wait_seconds=settings.llm_queue_max_wait_seconds,
+    ),
+    adaptive=AdaptivePolicy(
+        alpha=settings.llm_adaptive_alpha,
+        error_penalty_ms=settings.llm_adaptive_error_penalty_ms,
+        reorder_primary=settings.llm_adaptive_reorder_primary,
+        quality_tiers=tuple(tuple(tier) for tier in settings.llm_quality_tiers),
+    )
+    if settings.llm_adaptive_routing
+    else None,
 )
 
+_VERSE_LIST = TypeAdapter(list[VerseOut])
+_CHAPTER_LIST = TypeAdapter(list[ChapterSummary])
+
 MOOD_OPTIONS = [
     'Anxious',
     'Overwhelmed',
@@ -199,6 +335,45 @@ def _daily_verse_from_db(db: Session) -> Verse:
     return db.execute(select(Verse).order_by(Verse.id).offset(index).limit(1)).scalar_one()
 
 
+def _data_version(db: Session) -> str:
+    """Verses-table version for ETags and cache keys; rescanned at most every DATA_VERSION_TTL_SECONDS."""
+    retriever.schedule_refresh_if_due()
+    return content_version.get(db)
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    # If-None-Match uses weak comparison, so W/"x" matches "x".
+    return any(candidate.strip().removeprefix('W/') == etag for candidate in if_none_match.split(','))
+
+
+def _static_headers(etag: str, *, max_age: int, encoding: str | None = None) -> dict[str, str]:
+    headers = {'ETag': etag, 'Cache-Control': f'public, max-age={max_age}'}
+    if encoding is not None:
+        # Each stored encoding is a different byte sequence, so it needs its own strong ETag.
+        headers['ETag'] = f'{etag[:-1]}-{encoding}"'
+    return headers
+
+
+def _conditional_response(request: Request, response: Response, etag: str, *, max_age: int) -> Response | None:
+    """Set caching headers; return a 304 response when the client already has this representation."""
+    headers = _static_headers(etag, max_age=max_age)
+    if _etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+def _seconds_until_midnight(today: date | None = None) -> int:
+    # Daily keys carry the date, so an entry is good for the rest of that (server-local) day.
+    now = datetime.now()
+    midnight = datetime.combine((today or now.date()) + timedelta(days=1), datetime.min.time())
+    return max(1, int((midnight - now).total_seconds()))
+
+
 def _morning_background(tags: list[str], mode: str) -> MorningBackground:
     tag_blob = ' '.join(tags).lower()
 
@@ -256,8 +431,13 @@ async def log_requests(request, call_next):
 
 @app.on_event('startup')
 def on_startup() -> None:
+    # Sync startup handlers run on the event loop's thread; the warmer submits guidance jobs to it.
+    app.state.event_loop = asyncio.get_running_loop()
     init_db()
     logger.info('database_initialized')
+    # Index builds and model loading run in the background; /ready reports when they finish
+    # and retrieval serves lexical results until the embedder is up.
+    warmup.start()
 
     if not settings.use_mock_provider:
         keys_present = any(
@@ -276,6 +456,27 @@ def on_startup() -> None:
 
 
 
+@app.on_event('shutdown')
+async def on_shutdown() -> None:
+    response_warmer.stop()
+    await orchestrator.aclose()
+    await run_in_threadpool(routing_log_writer.flush, 2.0)
+    try:
+        embedding_cache.save()
+    except OSError as exc:
+        logger.warning('Could not persist embedding cache: %s', exc)
+
+
+@app.exception_handler(ProviderOverloaded)
+async def provider_overloaded(_request: Request, exc: ProviderOverloaded) -> JSONResponse:
+    # Shed load early: the client retries later instead of queueing behind a saturated provider.
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={'detail': 'The assistant is busy, please retry shortly'},
+        headers={'Retry-After': str(exc.retry_after)},
+    )
+
+
 @app.get('/health')
 def health() -> dict[str, Any]:
     registered = sorted(orchestrator.model_status().keys())
@@ -291,47 +492,94 @@ def health() -> dict[str, Any]:
     }
 
 
+@app.get('/ready')
+def ready(response: Response) -> dict[str, Any]:
+    database: dict[str, Any] = {'pool': engine.pool.status()}
+    try:
+        with engine.connect() as conn:
+            conn.execute(text('SELECT 1'))
+        database['status'] = 'ready'
+    except Exception as exc:
+        database['status'] = 'failed'
+        database['detail'] = str(exc)
+
+    # Readiness probes may be the only traffic, so they drive the retry of a failed index build too.
+    retriever.schedule_refresh_if_due()
+    if retriever.dataset_version is not None and warmup.to_dict()['retrieval_indexes']['status'] == FAILED:
+        warmup.mark_ready('retrieval_indexes', retriever.dataset_version)
+
+    is_ready = warmup.ready and database['status'] == 'ready'
+    if not is_ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {
+        'status': 'ready' if is_ready else 'warming_up',
+        'components': warmup.to_dict(),
+        'database': database,
+    }
+
+
 @app.get('/api/model-status')
 def model_status() -> dict[str, Any]:
     return {
         'default_llm': settings.default_llm,
         'mock_mode': settings.use_mock_provider,
         'providers': orchestrator.model_status(),
+        'hedging': orchestrator.hedge_stats(),
+        'llm_concurrency': orchestrator.concurrency_stats(),
+        'adaptive_routing': orchestrator.routing_scores(),
+        'routing_log': routing_log_writer.stats(),
+        'retrieval': retriever.stats(),
+        'response_cache': cache.stats(),
+        'single_flight': single_flight.stats(),
+        'async_single_flight': async_single_flight.stats(),
+        'response_warmer': response_warmer.stats(),
+        'embedding_cache': embedding_cache.stats(),
+        'semantic_cache': semantic_cache.stats() if semantic_cache is not None else None,
     }
 
 
 @app.get('/daily-verse', response_model=VerseOut)
-def daily_verse(db: Session = Depends(get_db)) -> Verse:
+def daily_verse(request: Request, response: Response, db: Session = Depends(get_db)) -> Verse | Response:
+    etag = f'"{_data_version(db)}-daily-{date.today().isoformat()}"'
+    max_age = min(settings.static_cache_max_age_seconds, _seconds_until_midnight())
+    not_modified = _conditional_response(request, response, etag, max_age=max_age)
+    if not_modified is not None:
+        return not_modified
     return _daily_verse_from_db(db)
 
 
 @app.get('/chapters', response_model=list[ChapterSummary])
-def list_chapters(db: Session = Depends(get_db)) -> list[ChapterSummary]:
-    cache_key = 'chapters:v1'
-    cached = cache.get(cache_key)
-    if isinstance(cached, list):
-        return cached
-
-    chapter_counts = dict(
-        db.execute(
-            select(Verse.chapter, func.count(Verse.id))
-            .group_by(Verse.chapter)
-            .order_by(Verse.chapter)
-        ).all()
-    )
-
-    chapters = [
-        ChapterSummary(
-            chapter=chapter,
-            name=CHAPTER_SUMMARIES.get(chapter, {}).get('name', f'Chapter {chapter}'),
-            summary=CHAPTER_SUMMARIES.get(chapter, {}).get('summary', ''),
-            verse_count=int(chapter_counts.get(chapter, 0)),
+def list_chapters(request: Request, db: Session = Depends(get_db)) -> Response:
+    version = _data_version(db)
+    encoding = choose_encoding(request.headers.get('accept-encoding'))
+    headers = _static_headers(f'"{version}-chapters"', max_age=settings.static_cache_max_age_seconds, encoding=encoding)
+    headers['Vary'] = 'Accept-Encoding'
+    if _etag_matches(request.headers.get('if-none-match'), headers['ETag']):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    cache_key = f'chapters:{version}'
+    encoded = cache.get(cache_key)
+    if not isinstance(encoded, EncodedPayload):
+        chapter_counts = dict(
+            db.execute(
+                select(Verse.chapter, func.count(Verse.id))
+                .group_by(Verse.chapter)
+                .order_by(Verse.chapter)
+            ).all()
         )
-        for chapter in range(1, 19)
-    ]
 
-    cache.set(cache_key, chapters)
-    return chapters
+        chapters = [
+            ChapterSummary(
+                chapter=chapter,
+                name=CHAPTER_SUMMARIES.get(chapter, {}).get('name', f'Chapter {chapter}'),
+                summary=CHAPTER_SUMMARIES.get(chapter, {}).get('summary', ''),
+                verse_count=int(chapter_counts.get(chapter, 0)),
+            )
+            for chapter in range(1, 19)
+        ]
+        encoded = EncodedPayload.from_json(_CHAPTER_LIST.dump_json(chapters))
+        cache.set(cache_key, encoded)
+    return encoded.response(encoding, headers)
 
 
 @app.get('/moods', response_model=MoodOptionsResponse)
@@ -340,62 +588,113 @@ def moods() -> MoodOptionsResponse:
 
 
 @app.post('/moods/guidance', response_model=GuidanceResponse)
-def mood_guidance(request: MoodGuidanceRequest) -> GuidanceResponse:
+async def mood_guidance(request: MoodGuidanceRequest) -> GuidanceResponse:
     topic_parts = [', '.join(request.moods)]
     if request.note:
         topic_parts.append(request.note)
     topic = ' | '.join(topic_parts)
+    deadline = _deadline('mood')
 
-    cache_key = f'mood:{request.mode}:{request.language}:{topic.strip().lower()}'
-    cached = cache.get(cache_key)
+    retrieval_mode = request.retrieval_mode or retriever.default_mode
+    cache_key = f'mood:{request.mode}:{request.language}:{retrieval_mode}:{topic.strip().lower()}'
+    cached = await _cache_get(cache_key)
     if isinstance(cached, GuidanceResponse):
         return cached
 
-    verses = retriever.retrieve(query=topic, top_k=3)
-    if not verses:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='No verses found')
-
-    result, _model = orchestrator.generate_guidance(
-        topic=topic,
-        mode=request.mode,
-        language=request.language,
-        verses=verses,
-    )
-    verification = verify_answer(
-        answer_text=result.guidance_long,
-        response_verses=result.verses,
-        retrieved_verses=verses,
-    )
-    verified_result = result.model_copy(
-        update={
-            'answer_text': result.guidance_long,
-            'verification_level': verification.level,
-            'verification_details': verification.checks,
-            'provenance': verification.provenance,
-        }
+    return await async_single_flight.do(
+        cache_key,
+        lambda: _abuild_verified_guidance(
+            topic,
+            mode=request.mode,
+            language=request.language,
+            retrieval_mode=retrieval_mode,
+            cache_key=cache_key,
+            semantic_key=f'mood:{request.mode}:{request.language}:{retrieval_mode}',
+            deadline=deadline,
+        ),
     )
-    cache.set(cache_key, verified_result)
-    return verified_result
 
 
 @app.post('/ask', response_model=GuidanceResponse)
-def ask(request: AskRequest) -> GuidanceResponse:
+async def ask(request: AskRequest) -> GuidanceResponse:
     topic = request.question.strip()
-    cache_key = f'ask:{request.mode}:{request.language}:{topic.lower()}'
-    cached = cache.get(cache_key)
+    deadline = _deadline('ask')
+    retrieval_mode = request.retrieval_mode or retriever.default_mode
+    cache_key = f'ask:{request.mode}:{request.language}:{retrieval_mode}:{topic.lower()}'
+    cached = await _cache_get(cache_key)
     if isinstance(cached, GuidanceResponse):
         return cached
 
-    verses = retriever.retrieve(query=topic, top_k=3)
-    if not verses:
+    return await async_single_flight.do(
+        cache_key,
+        lambda: _abuild_verified_guidance(
+            topic,
+            mode=request.mode,
+            language=request.language,
+            retrieval_mode=retrieval_mode,
+            cache_key=cache_key,
+            semantic_key=f'ask:{request.mode}:{request.language}:{retrieval_mode}',
+            deadline=deadline,
+        ),
+    )
+
+
+def _deadline(endpoint: str) -> Deadline | None:
+    # Started when the request arrives, so retrieval time counts against the LLM's share.
+    seconds = settings.llm_deadline_seconds.get(endpoint)
+    return Deadline.after(seconds) if seconds else None
+
+
+async def _cache_get(key: str) -> Any | None:
+    # The L2 tier is a database round trip; keep it off the event loop.
+    if cache.l2 is None:
+        return cache.get(key)
+    return await run_in_threadpool(cache.get, key)
+
+
+async def _cache_set(key: str, value: Any) -> None:
+    if cache.l2 is None:
+        cache.set(key, value)
+    else:
+        await run_in_threadpool(cache.set, key, value)
+
+
+def _cacheable(model: str, providers: dict[str, Any]) -> bool:
+    # The mock only answers for real providers when they all failed or the deadline ran out. Caching
+    # that stand-in under the request's key (shared through L2 and the semantic cache) would serve
+    # it to every worker, and to paraphrases of the query, for the whole TTL.
+    return model != 'mock' or set(providers) == {'mock'}
+
+
+def _retrieve_for_guidance(
+    topic: str,
+    *,
+    retrieval_mode: RetrievalMode,
+    cache_key: str,
+    semantic_key: str,
+) -> tuple[RetrievalResult, GuidanceResponse | None]:
+    """Retrieve verses for ``topic``; also returns a semantically cached answer for them, if any."""
+    retrieval = retriever.search(query=topic, top_k=3, mode=retrieval_mode)
+    if not retrieval.verses:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='No verses found')
 
-    result, _model = orchestrator.generate_guidance(
-        topic=topic,
-        mode=request.mode,
-        language=request.language,
-        verses=verses,
-    )
+    if semantic_cache is not None:
+        similar = semantic_cache.lookup(semantic_key, retrieval.query_vector, [verse.id for verse in retrieval.verses])
+        if isinstance(similar, GuidanceResponse):
+            cache.set(cache_key, similar)
+            return retrieval, similar
+    return retrieval, None
+
+
+def _store_verified_guidance(
+    result: GuidanceResponse,
+    retrieval: RetrievalResult,
+    *,
+    cache_key: str,
+    semantic_key: str,
+    model: str,
+) -> GuidanceResponse:
+    verses = retrieval.verses
     verification = verify_answer(
         answer_text=result.guidance_long,
         response_verses=result.verses,
@@ -409,10 +708,68 @@ def ask(request: AskRequest) -> GuidanceResponse:
             'provenance': verification.provenance,
         }
     )
+    if not _cacheable(model, orchestrator.guidance_providers):
+        return verified_result
     cache.set(cache_key, verified_result)
+    if semantic_cache is not None:
+        semantic_cache.store(semantic_key, retrieval.query_vector, [verse.id for verse in verses], verified_result)
     return verified_result
 
 
+def _build_verified_guidance(
+    topic: str,
+    *,
+    mode: GuidanceMode,
+    language: LanguageCode,
+    retrieval_mode: RetrievalMode,
+    cache_key: str,
+    semantic_key: str,
+) -> GuidanceResponse:
+    retrieval, similar = _retrieve_for_guidance(
+        topic, retrieval_mode=retrieval_mode, cache_key=cache_key, semantic_key=semantic_key
+    )
+    if similar is not None:
+        return similar
+
+    result, model = orchestrator.generate_guidance(
+        topic=topic,
+        mode=mode,
+        language=language,
+        verses=retrieval.verses,
+    )
+    return _store_verified_guidance(result, retrieval, cache_key=cache_key, semantic_key=semantic_key, model=model)
+
+
+async def _abuild_verified_guidance(
+    topic: str,
+    *,
+    mode: GuidanceMode,
+    language: LanguageCode,
+    retrieval_mode: RetrievalMode,
+    cache_key: str,
+    semantic_key: str,
+    deadline: Deadline | None = None,
+) -> GuidanceResponse:
+    # Retrieval (embedding + DB) and cache writes block, so they run in the threadpool;
+    # only the LLM call, the slow part, is awaited on the event loop.
+    retrieval, similar = await run_in_threadpool(
+        partial(_retrieve_for_guidance, topic, retrieval_mode=retrieval_mode, cache_key=cache_key, semantic_key=semantic_key)
+    )
+    if similar is not None:
+        return similar
+
+    result, model = await orchestrator.agenerate_guidance(
+        topic=topic,
+        mode=mode,
+        language=language,
+        verses=retrieval.verses,
+        deadline=deadline,
+    )
+    return await run_in_threadpool(
+        partial(_store_verified_guidance, result, retrieval, cache_key=cache_key, semantic_key=semantic_key, model=model)
+    )
+
+
 def _chat_cache_key(request: ChatRequest) -> str:
     message = request.message.strip()
     history_text = "|".join(
@@ -420,39 +777,66 @@ def _chat_cache_key(request: ChatRequest) -> str:
         for turn in request.history[-12:]
     )
     digest = hashlib.md5(history_text.encode("utf-8")).hexdigest()
-    return f"chat:{request.mode}:{request.language}:{message.lower()}:{digest}"
+    retrieval_mode = request.retrieval_mode or retriever.default_mode
+    return f"chat:{request.mode}:{request.language}:{retrieval_mode}:{message.lower()}:{digest}"
 
 
-def _build_verified_chat_response(request: ChatRequest) -> ChatResponse:
+async def _build_verified_chat_response(request: ChatRequest) -> ChatResponse:
+    deadline = _deadline('chat')
     message = request.message.strip()
     if not message:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Message cannot be empty')
 
     cache_key = _chat_cache_key(request)
-    cached = cache.get(cache_key)
+    cached = await _cache_get(cache_key)
     if isinstance(cached, ChatResponse):
         return cached
 
-    recent_user_turns = [turn.content for turn in request.history[-6:] if turn.role == 'user']
-    retrieval_query = ' '.join(recent_user_turns + [message])
+    return await async_single_flight.do(
+        cache_key, lambda: _generate_chat_response(request, message, cache_key, deadline)
+    )
 
-    verses = retriever.retrieve(query=retrieval_query, top_k=3)
-    if not verses:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='No verses found')
 
-    result, _model = orchestrator.generate_chat(
+async def _generate_chat_response(
+    request: ChatRequest,
+    message: str,
+    cache_key: str,
+    deadline: Deadline | None = None,
+) -> ChatResponse:
+    verses = await _retrieve_chat_verses(request, message)
+    result, model = await orchestrator.agenerate_chat(
         message=message,
         mode=request.mode,
         language=request.language,
         history=request.history,
         verses=verses,
+        deadline=deadline,
     )
+    verified_result = _verify_chat_response(result, verses)
+    if _cacheable(model, orchestrator.chat_providers):
+        await _cache_set(cache_key, verified_result)
+    return verified_result
+
+
+async def _retrieve_chat_verses(request: ChatRequest, message: str) -> list[Verse]:
+    recent_user_turns = [turn.content for turn in request.history[-6:] if turn.role == 'user']
+    retrieval_query = ' '.join(recent_user_turns + [message])
+
+    verses = await run_in_threadpool(
+        partial(retriever.retrieve, query=retrieval_query, top_k=3, mode=request.retrieval_mode)
+    )
+    if not verses:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='No verses found')
+    return verses
+
+
+def _verify_chat_response(result: ChatResponse, verses: list[Verse]) -> ChatResponse:
     verification = verify_answer(
         answer_text=result.reply,
         response_verses=result.verses,
         retrieved_verses=verses,
     )
-    verified_result = result.model_copy(
+    return result.model_copy(
         update={
             'answer_text': result.reply,
             'verification_level': verification.level,
@@ -460,8 +844,6 @@ def _build_verified_chat_response(request: ChatRequest) -> ChatResponse:
             'provenance': verification.provenance,
         }
     )
-    cache.set(cache_key, verified_result)
-    return verified_result
 
 
 def _iter_reply_chunks(reply: str, *, chunk_chars: int = 28) -> list[str]:
@@ -494,24 +876,62 @@ def _sse_event(event: str, payload: dict[str, Any]) -> str:
 
 
 @app.post('/chat', response_model=ChatResponse)
-def chat(request: ChatRequest) -> ChatResponse:
-    return _build_verified_chat_response(request)
+async def chat(request: ChatRequest) -> ChatResponse:
+    return await _build_verified_chat_response(request)
 
 
 @app.post('/chat/stream')
 async def chat_stream(request: ChatRequest, raw_request: Request) -> StreamingResponse:
+    deadline = _deadline('chat')
+
     async def event_generator():
         try:
-            result = await run_in_threadpool(_build_verified_chat_response, request)
-            for chunk in _iter_reply_chunks(result.reply):
-                if await raw_request.is_disconnected():
-                    return
-                yield _sse_event('token', {'token': chunk})
-                await asyncio.sleep(0.02)
+            message = request.message.strip()
+            if not message:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Message cannot be empty')
+
+            cache_key = _chat_cache_key(request)
+            result = await _cache_get(cache_key)
+            if isinstance(result, ChatResponse):
+                for chunk in _iter_reply_chunks(result.reply):
+                    yield _sse_event('token', {'token': chunk})
+            else:
+                verses = await _retrieve_chat_verses(request, message)
+                # Leaving early on disconnect closes the provider stream and its upstream request.
+                events = orchestrator.astream_chat(
+                    message=message,
+                    mode=request.mode,
+                    language=request.language,
+                    history=request.history,
+                    verses=verses,
+                    deadline=deadline,
+                )
+                async with aclosing(events):
+                    async for event, payload in events:
+                        if await raw_request.is_disconnected():
+                            return
+                        if event == 'token':
+                            yield _sse_event('token', {'token': payload})
+                        else:
+                            generated, model = payload
+                result = _verify_chat_response(generated, verses)
+                if _cacheable(model, orchestrator.chat_providers):
+                    await _cache_set(cache_key, result)
 
             if await raw_request.is_disconnected():
                 return
             yield _sse_event('done', result.model_dump(mode='json'))
+        except ProviderOverloaded as exc:
+            if await raw_request.is_disconnected():
+                return
+            yield _sse_event(
+                'error',
+                {
+                    'message': 'The assistant is busy, please retry shortly',
+                    'status_code': status.HTTP_429_TOO_MANY_REQUESTS,
+                    'retry_after': exc.retry_after,
+                },
+            )
         except HTTPException as exc:
             if await raw_request.is_disconnected():
                 return
@@ -547,17 +967,30 @@ def morning_greeting(request: MorningGreetingRequest, db: Session = Depends(get_
     if isinstance(cached, MorningGreetingResponse):
         return cached
 
+    # Keyed only on date/mode/language, so right after midnight many clients miss at once.
+    deadline = _deadline('morning')
+    return single_flight.do(cache_key, lambda: _generate_morning_greeting(request, db, today, cache_key, deadline))
+
+
+def _generate_morning_greeting(
+    request: MorningGreetingRequest,
+    db: Session,
+    today: date,
+    cache_key: str,
+    deadline: Deadline | None = None,
+) -> MorningGreetingResponse:
     verse = _daily_verse_from_db(db)
     greeting_prompt = (
         'Create a concise good-morning greeting grounded in the provided Bhagavad Gita verse. '
         'Keep it warm and practical, and include one uplifting line for the day.'
     )
-    chat_result, _model = orchestrator.generate_chat(
+    chat_result, model = orchestrator.generate_chat(
         message=greeting_prompt,
         mode=request.mode,
         language=request.language,
         history=[],
         verses=[verse],
+        deadline=deadline,
     )
 
     selected_verse = chat_result.verses[0] if chat_result.verses else GuidanceVerse(
@@ -580,35 +1013,125 @@ def morning_greeting(request: MorningGreetingRequest, db: Session = Depends(get_
         affirmation=chat_result.action_step,
         background=background,
     )
-    cache.set(cache_key, result)
+    if _cacheable(model, orchestrator.chat_providers):
+        cache.set(cache_key, result, ttl_seconds=_seconds_until_midnight(today))
     return result
 
 
+def _warm_jobs() -> list[tuple[str, Any]]:
+    """Single-mood guidance and today's morning greeting for every mode and language."""
+    retrieval_mode = retriever.default_mode
+    today = date.today()
+    jobs: list[tuple[str, Any]] = []
+    for mode in get_args(GuidanceMode):
+        for language in get_args(LanguageCode):
+            for mood in MOOD_OPTIONS:
+                key = f'mood:{mode}:{language}:{retrieval_mode}:{mood.lower()}'
+                jobs.append((key, partial(_warm_mood_guidance, mood, mode, language, retrieval_mode, key)))
+            key = f'morning:{today.isoformat()}:{mode}:{language}'
+            jobs.append((key, partial(_warm_morning_greeting, MorningGreetingRequest(mode=mode, language=language), today, key)))
+    return jobs
+
+
+def _warm_mood_guidance(
+    mood: str,
+    mode: GuidanceMode,
+    language: LanguageCode,
+    retrieval_mode: RetrievalMode,
+    cache_key: str,
+) -> GuidanceResponse:
+    kwargs = {
+        'mode': mode,
+        'language': language,
+        'retrieval_mode': retrieval_mode,
+        'cache_key': cache_key,
+        'semantic_key': f'mood:{mode}:{language}:{retrieval_mode}',
+    }
+    loop = getattr(app.state, 'event_loop', None)
+    if loop is None or not loop.is_running():
+        # One-shot run (scripts/warm_cache.py): no requests in this process to coalesce with.
+        return _build_verified_guidance(mood, **kwargs)
+    # Join the same flight as /moods/guidance, so a warm job and a request for the key share one LLM call.
+    future = asyncio.run_coroutine_threadsafe(
+        async_single_flight.do(cache_key, lambda: _abuild_verified_guidance(mood, **kwargs)), loop
+    )
+    return future.result()
+
+
+def _warm_morning_greeting(request: MorningGreetingRequest, today: date, cache_key: str) -> MorningGreetingResponse:
+    with SessionLocal() as db:
+        return single_flight.do(cache_key, lambda: _generate_morning_greeting(request, db, today, cache_key))
+
+
+def _warm_interval_seconds() -> float:
+    if settings.cache_warmer_interval_seconds > 0:
+        return settings.cache_warmer_interval_seconds
+    # Refresh at 80% of the mood TTL; greetings are cached until midnight and only need one pass a day.
+    ttl = cache.l1.ttl_for('mood')
+    return 0.8 * ttl if ttl > 0 else 3600.0
+
+
+# Arbitrary key for pg_try_advisory_lock; whoever holds it is the deployment's warmer.
+WARMER_LOCK_ID = 0x77726d72
+
+response_warmer = ResponseWarmer(
+    _warm_jobs,
+    concurrency=settings.cache_warmer_concurrency,
+    interval_seconds=_warm_interval_seconds(),
+    remaining_ttl=cache.remaining_ttl,
+    # One warmer per deployment, not per worker: with the shared L2 every worker reads what the
+    # leader writes. Without it only the leader's own L1 is warm, which still caps the LLM spend.
+    leader=PostgresLeaderLock(engine, WARMER_LOCK_ID)
+    if cache.l2 is not None
+    else FileLeaderLock(Path(tempfile.gettempdir()) / 'gita-companion-warmer.lock'),
+)
+if settings.cache_warmer_enabled:
+    # Runs after the model warms up so retrieval uses embeddings, then keeps refreshing in the background.
+    warmup.add('response_warmer', response_warmer.start)
+
+
 @app.get('/verses', response_model=list[VerseOut])
 def list_verses(
+    request: Request,
     chapter: int | None = Query(default=None, ge=1, le=18),
     db: Session = Depends(get_db),
-) -> list[VerseOut]:
+) -> Response:
     chapter_key = chapter if chapter is not None else 'all'
-    cache_key = f'verses:{chapter_key}'
-    cached = cache.get(cache_key)
-    if isinstance(cached, list):
-        return cached
-
-    query = select(Verse)
-    if chapter is not None:
-        query = query.where(Verse.chapter == chapter)
-
-    verses = list(
-        db.execute(query.order_by(Verse.chapter, Verse.verse_number)).scalars().all()
+    version = _data_version(db)
+    encoding = choose_encoding(request.headers.get('accept-encoding'))
+    headers = _static_headers(
+        f'"{version}-verses-{chapter_key}"', max_age=settings.static_cache_max_age_seconds, encoding=encoding
     )
-    payload = [VerseOut.model_validate(verse) for verse in verses]
-    cache.set(cache_key, payload)
-    return payload
+    headers['Vary'] = 'Accept-Encoding'
+    if _etag_matches(request.headers.get('if-none-match'), headers['ETag']):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    # The version is part of the key, so a reseed never serves stale entries from the no-expiry namespace.
+    # Entries hold the final JSON bytes (plus gzip/brotli), so a hit skips validation and serialization.
+    cache_key = f'verses:{version}:{chapter_key}'
+    encoded = cache.get(cache_key)
+    if not isinstance(encoded, EncodedPayload):
+        query = select(Verse)
+        if chapter is not None:
+            query = query.where(Verse.chapter == chapter)
+
+        verses = list(
+            db.execute(query.order_by(Verse.chapter, Verse.verse_number)).scalars().all()
+        )
+        payload = [VerseOut.model_validate(verse) for verse in verses]
+        encoded = EncodedPayload.from_json(_VERSE_LIST.dump_json(payload))
+        cache.set(cache_key, encoded)
+    return encoded.response(encoding, headers)
 
 
 @app.get('/verses/{verse_id}', response_model=VerseOut)
-def get_verse(verse_id: int, db: Session = Depends(get_db)) -> Verse:
+def get_verse(verse_id: int, request: Request, response: Response, db: Session = Depends(get_db)) -> Verse | Response:
+    not_modified = _conditional_response(
+        request, response, f'"{_data_version(db)}-verse-{verse_id}"', max_age=settings.static_cache_max_age_seconds
+    )
+    if not_modified is not None:
+        return not_modified
+
     verse = db.get(Verse, verse_id)
     if verse is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Verse not found')
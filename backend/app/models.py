@@ -36,3 +36,16 @@ class Favorite(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
 
     verse: Mapped[Verse] = relationship(back_populates="favorites")
+
+
+class CachedResponse(Base):
+    """Second-tier response cache shared by every worker (see services/pg_cache.py)."""
+
+    __tablename__ = "response_cache"
+
+    key_hash: Mapped[str] = mapped_column(String(64), primary_key=True)
+    namespace: Mapped[str] = mapped_column(String(32), nullable=False)
+    payload_type: Mapped[str] = mapped_column(String(64), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    expires_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True, index=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -7,6 +7,7 @@ from pydantic import BaseModel, ConfigDict, Field
 LanguageCode = Literal["en", "hi", "te", "ta", "kn", "ml", "es"]
 VerificationLevel = Literal["VERIFIED", "REVIEWED", "RAW"]
 GuidanceMode = Literal["comfort", "clarity", "traditional"]
+RetrievalMode = Literal["vector", "lexical", "hybrid"]
 
 
 class VerseOut(BaseModel):
@@ -98,6 +99,7 @@ class AskRequest(BaseModel):
     question: str = Field(min_length=3, max_length=500)
     mode: GuidanceMode = "clarity"
     language: LanguageCode = "en"
+    retrieval_mode: RetrievalMode | None = None
 
     model_config = ConfigDict(extra="forbid")
 
@@ -114,6 +116,7 @@ class ChatRequest(BaseModel):
     mode: GuidanceMode = "clarity"
     language: LanguageCode = "en"
     history: list[ChatTurn] = Field(default_factory=list, max_length=12)
+    retrieval_mode: RetrievalMode | None = None
 
     model_config = ConfigDict(extra="forbid")
 
@@ -138,6 +141,7 @@ class MoodGuidanceRequest(BaseModel):
     note: str | None = Field(default=None, max_length=200)
     mode: GuidanceMode = "comfort"
     language: LanguageCode = "en"
+    retrieval_mode: RetrievalMode | None = None
 
     model_config = ConfigDict(extra="forbid")
 
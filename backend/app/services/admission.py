@@ -0,0 +1,166 @@
+"""Per-provider in-flight limits with a bounded wait queue (admission control)."""
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from typing import Any
+
+
+class ProviderOverloaded(Exception):
+    """A provider is at its in-flight limit and its wait queue is full or the wait timed out."""
+
+    def __init__(self, provider: str, retry_after: int, reason: str):
+        super().__init__(f"{provider} is overloaded ({reason})")
+        self.provider = provider
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class _Waiter:
+    __slots__ = ("granted", "event", "loop", "future")
+
+    def __init__(
+        self,
+        event: threading.Event | None = None,
+        loop: asyncio.AbstractEventLoop | None = None,
+        future: asyncio.Future[None] | None = None,
+    ) -> None:
+        self.granted = False
+        self.event = event
+        self.loop = loop
+        self.future = future
+
+    def wake(self) -> None:
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(_resolve, self.future)
+
+
+def _resolve(future: asyncio.Future[None]) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class ConcurrencyLimiter:
+    """At most ``max_in_flight`` concurrent calls to one provider, FIFO queue for the rest.
+
+    Blocking callers (``acquire``) and coroutines (``aacquire``) share the
+    same slots. A released slot is handed straight to the oldest waiter, so a
+    newcomer cannot overtake the queue. A caller is rejected with
+    ``ProviderOverloaded`` when ``max_queue`` callers are already waiting, or
+    when its wait exceeds the timeout, so latency stays bounded instead of
+    growing with the backlog.
+    """
+
+    def __init__(self, name: str, *, max_in_flight: int, max_queue: int, max_wait_seconds: float, window: int = 500):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+        self._in_flight = 0
+        self._waiters: deque[_Waiter] = deque()
+        self._waits_ms: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_queue_full = 0
+        self.rejected_wait_timeout = 0
+
+    @property
+    def retry_after(self) -> int:
+        """Whole seconds a rejected client should wait before retrying (the ``Retry-After`` value)."""
+        return max(1, math.ceil(self.max_wait_seconds))
+
+    def try_acquire(self) -> bool:
+        """Take a free slot without queueing."""
+        with self._lock:
+            if self._in_flight < self.max_in_flight:
+                self._in_flight += 1
+                self.admitted += 1
+                return True
+            return False
+
+    def acquire(self, timeout: float | None = None) -> None:
+        start = time.monotonic()
+        waiter = self._enqueue(lambda: _Waiter(event=threading.Event()))
+        if waiter is None:
+            return
+        waiter.event.wait(self._wait_limit(timeout))
+        self._finish_wait(waiter, start)
+
+    async def aacquire(self, timeout: float | None = None) -> None:
+        start = time.monotonic()
+        loop = asyncio.get_running_loop()
+        waiter = self._enqueue(lambda: _Waiter(loop=loop, future=loop.create_future()))
+        if waiter is None:
+            return
+        try:
+            await asyncio.wait((waiter.future,), timeout=self._wait_limit(timeout))
+        except asyncio.CancelledError:
+            with self._lock:
+                handed_over = waiter.granted
+                if not handed_over:
+                    self._waiters.remove(waiter)
+            if handed_over:
+                self.release()
+            raise
+        self._finish_wait(waiter, start)
+
+    def release(self) -> None:
+        with self._lock:
+            if self._waiters:
+                # Hand the slot over: in-flight count stays the same.
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                waiter.wake()
+                return
+            self._in_flight -= 1
+
+    def _enqueue(self, make_waiter: Any) -> _Waiter | None:
+        with self._lock:
+            if self._in_flight < self.max_in_flight and not self._waiters:
+                self._in_flight += 1
+                self.admitted += 1
+                return None
+            if len(self._waiters) >= self.max_queue:
+                self.rejected_queue_full += 1
+                raise ProviderOverloaded(self.name, self.retry_after, "queue full")
+            waiter = make_waiter()
+            self._waiters.append(waiter)
+            self.queued += 1
+            return waiter
+
+    def _finish_wait(self, waiter: _Waiter, start: float) -> None:
+        with self._lock:
+            if waiter.granted:
+                self.admitted += 1
+                self._waits_ms.append((time.monotonic() - start) * 1000)
+                return
+            self._waiters.remove(waiter)
+            self.rejected_wait_timeout += 1
+        raise ProviderOverloaded(self.name, self.retry_after, "queue wait timed out")
+
+    def _wait_limit(self, timeout: float | None) -> float:
+        return self.max_wait_seconds if timeout is None else max(0.0, min(self.max_wait_seconds, timeout))
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            waits = sorted(self._waits_ms)
+            return {
+                "max_in_flight": self.max_in_flight,
+                "in_flight": self._in_flight,
+                "queue_depth": len(self._waiters),
+                "max_queue": self.max_queue,
+                "admitted": self.admitted,
+                "queued": self.queued,
+                "rejected_queue_full": self.rejected_queue_full,
+                "rejected_wait_timeout": self.rejected_wait_timeout,
+                "wait_ms": {
+                    "avg": round(sum(waits) / len(waits), 2) if waits else 0.0,
+                    "p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 2) if waits else 0.0,
+                    "max": round(waits[-1], 2) if waits else 0.0,
+                },
+            }
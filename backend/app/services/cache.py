@@ -1,33 +1,311 @@
-﻿import time
-from collections.abc import Hashable
-from dataclasses import dataclass
+﻿import logging
+import sys
+import time
+import zlib
+from collections import OrderedDict
+from collections.abc import Hashable, Mapping
+from dataclasses import dataclass, field
 from threading import Lock
 from typing import Any
 
+logger = logging.getLogger(__name__)
+
+# Counters kept per namespace ("ask", "chat", "mood", "verses", ...).
+_COUNTERS = ("hits", "misses", "evictions", "expirations")
+
 
 @dataclass
 class CacheItem:
     value: Any
-    expires_at: float
+    expires_at: float | None
+    size: int
+    namespace: str
 
 
-class TTLCache:
-    def __init__(self, ttl_seconds: int = 300):
-        self.ttl_seconds = ttl_seconds
-        self._items: dict[Hashable, CacheItem] = {}
-        self._lock = Lock()
+@dataclass
+class _Stripe:
+    items: OrderedDict[Hashable, CacheItem] = field(default_factory=OrderedDict)
+    lock: Lock = field(default_factory=Lock)
+    bytes: int = 0
+    counters: dict[str, dict[str, int]] = field(default_factory=dict)
+
+    def count(self, namespace: str, counter: str, amount: int = 1) -> None:
+        per_namespace = self.counters.get(namespace)
+        if per_namespace is None:
+            per_namespace = self.counters[namespace] = dict.fromkeys(_COUNTERS, 0)
+        per_namespace[counter] += amount
+
+
+def cache_namespace(key: Hashable) -> str:
+    """``"ask:simple:en:..."`` -> ``"ask"``; non-string keys share the ``"default"`` namespace."""
+    if isinstance(key, str):
+        return key.split(":", 1)[0]
+    return "default"
+
+
+def approximate_size(value: Any) -> int:
+    """Rough in-memory footprint in bytes, used only for the cache byte budget."""
+    if isinstance(value, (str, bytes, bytearray)):
+        return sys.getsizeof(value)
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        # Pre-encoded payloads and numpy arrays report their own buffer size.
+        return nbytes
+    dump_json = getattr(value, "model_dump_json", None)
+    if dump_json is not None:
+        # Pydantic models: the JSON length tracks the payload well enough and avoids walking internals.
+        return 2 * len(dump_json())
+    if isinstance(value, Mapping):
+        return sys.getsizeof(value) + sum(approximate_size(k) + approximate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(approximate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """Bounded in-process response cache with per-namespace TTLs.
+
+    Keys are spread over ``stripes`` independently locked LRU segments, so
+    concurrent requests for different keys rarely contend. Each stripe holds
+    its share of ``max_entries`` and ``max_bytes`` and evicts least recently
+    used entries past either budget. ``namespace_ttls`` overrides
+    ``default_ttl_seconds`` by key prefix; a TTL of 0 means the entry never
+    expires (used for verse and chapter data). Expired entries are removed on
+    read and by a sweep that runs at most every ``sweep_interval_seconds``.
+    """
+
+    def __init__(
+        self,
+        *,
+        default_ttl_seconds: int = 300,
+        namespace_ttls: Mapping[str, int] | None = None,
+        max_entries: int = 4096,
+        max_bytes: int = 64 * 1024 * 1024,
+        stripes: int = 16,
+        sweep_interval_seconds: float = 60.0,
+    ):
+        self.default_ttl_seconds = default_ttl_seconds
+        self.namespace_ttls = dict(namespace_ttls or {})
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._stripes = [_Stripe() for _ in range(max(1, stripes))]
+        self._stripe_max_entries = max(1, max_entries // len(self._stripes))
+        self._stripe_max_bytes = max(1, max_bytes // len(self._stripes))
+        self._next_sweep = time.monotonic() + sweep_interval_seconds
+
+    def _stripe(self, key: Hashable) -> _Stripe:
+        if isinstance(key, str):
+            slot = zlib.crc32(key.encode("utf-8"))
+        else:
+            slot = hash(key)
+        return self._stripes[slot % len(self._stripes)]
+
+    def ttl_for(self, namespace: str) -> int:
+        return self.namespace_ttls.get(namespace, self.default_ttl_seconds)
 
     def get(self, key: Hashable) -> Any | None:
-        now = time.time()
-        with self._lock:
-            item = self._items.get(key)
+        namespace = cache_namespace(key)
+        stripe = self._stripe(key)
+        with stripe.lock:
+            item = stripe.items.get(key)
             if item is None:
+                stripe.count(namespace, "misses")
                 return None
-            if item.expires_at < now:
-                self._items.pop(key, None)
+            if item.expires_at is not None and item.expires_at < time.time():
+                self._remove(stripe, key, item)
+                stripe.count(namespace, "expirations")
+                stripe.count(namespace, "misses")
                 return None
+            stripe.items.move_to_end(key)
+            stripe.count(namespace, "hits")
             return item.value
 
-    def set(self, key: Hashable, value: Any) -> None:
+    def set(self, key: Hashable, value: Any, *, ttl_seconds: float | None = None) -> None:
+        namespace = cache_namespace(key)
+        ttl = self.ttl_for(namespace) if ttl_seconds is None else ttl_seconds
+        item = CacheItem(
+            value=value,
+            expires_at=time.time() + ttl if ttl > 0 else None,
+            size=approximate_size(value),
+            namespace=namespace,
+        )
+        stripe = self._stripe(key)
+        with stripe.lock:
+            previous = stripe.items.get(key)
+            if previous is not None:
+                self._remove(stripe, key, previous)
+            stripe.items[key] = item
+            stripe.bytes += item.size
+            while len(stripe.items) > 1 and (
+                len(stripe.items) > self._stripe_max_entries or stripe.bytes > self._stripe_max_bytes
+            ):
+                _old_key, old_item = stripe.items.popitem(last=False)
+                stripe.bytes -= old_item.size
+                stripe.count(old_item.namespace, "evictions")
+        self._sweep_if_due()
+
+    def delete(self, key: Hashable) -> None:
+        stripe = self._stripe(key)
+        with stripe.lock:
+            item = stripe.items.get(key)
+            if item is not None:
+                self._remove(stripe, key, item)
+
+    def remaining_ttl(self, key: Hashable) -> float | None:
+        """Seconds until ``key`` expires (``inf`` if it never does), or None if it is not cached.
+
+        Unlike ``get`` this neither counts a hit/miss nor refreshes the LRU position.
+        """
+        stripe = self._stripe(key)
+        with stripe.lock:
+            item = stripe.items.get(key)
+            if item is None:
+                return None
+            if item.expires_at is None:
+                return float("inf")
+            remaining = item.expires_at - time.time()
+            return remaining if remaining > 0 else None
+
+    def sweep(self) -> int:
+        """Drop every expired entry; returns how many were removed."""
+        now = time.time()
+        removed = 0
+        for stripe in self._stripes:
+            with stripe.lock:
+                expired = [
+                    (key, item)
+                    for key, item in stripe.items.items()
+                    if item.expires_at is not None and item.expires_at < now
+                ]
+                for key, item in expired:
+                    self._remove(stripe, key, item)
+                    stripe.count(item.namespace, "expirations")
+                removed += len(expired)
+        return removed
+
+    def _sweep_if_due(self) -> None:
+        now = time.monotonic()
+        if now < self._next_sweep:
+            return
+        # Claim the slot first so concurrent writers don't all sweep at once.
+        self._next_sweep = now + self.sweep_interval_seconds
+        self.sweep()
+
+    @staticmethod
+    def _remove(stripe: _Stripe, key: Hashable, item: CacheItem) -> None:
+        del stripe.items[key]
+        stripe.bytes -= item.size
+
+    def stats(self) -> dict[str, Any]:
+        namespaces: dict[str, dict[str, Any]] = {}
+        total_entries = 0
+        total_bytes = 0
+        for stripe in self._stripes:
+            with stripe.lock:
+                total_entries += len(stripe.items)
+                total_bytes += stripe.bytes
+                for namespace, counters in stripe.counters.items():
+                    merged = namespaces.setdefault(namespace, {**dict.fromkeys(_COUNTERS, 0), "entries": 0, "bytes": 0})
+                    for counter, value in counters.items():
+                        merged[counter] += value
+                for item in stripe.items.values():
+                    merged = namespaces.setdefault(
+                        item.namespace, {**dict.fromkeys(_COUNTERS, 0), "entries": 0, "bytes": 0}
+                    )
+                    merged["entries"] += 1
+                    merged["bytes"] += item.size
+
+        for namespace, merged in namespaces.items():
+            lookups = merged["hits"] + merged["misses"]
+            merged["hit_rate"] = round(merged["hits"] / lookups, 4) if lookups else 0.0
+            ttl = self.ttl_for(namespace)
+            merged["ttl_seconds"] = ttl if ttl > 0 else None
+
+        return {
+            "entries": total_entries,
+            "max_entries": self.max_entries,
+            "bytes": total_bytes,
+            "max_bytes": self.max_bytes,
+            "stripes": len(self._stripes),
+            "namespaces": dict(sorted(namespaces.items())),
+        }
+
+
+class TieredCache:
+    """Read-through L1/L2 cache with the same get/set interface as LRUCache.
+
+    ``l1`` is the per-process LRUCache. ``l2`` is a shared store such as
+    PostgresResponseCache with ``get(key) -> (value, remaining_ttl) | None``
+    and ``set(key, value, ttl_seconds)``; if it has a ``namespaces`` set, keys
+    outside it stay L1-only. An L2 hit is copied into L1 with the
+    TTL it has left. L2 errors are logged and treated as misses, so a slow or
+    unavailable database degrades to L1-only caching instead of failing requests.
+    """
+
+    def __init__(self, l1: LRUCache, l2: Any | None = None):
+        self.l1 = l1
+        self.l2 = l2
+        self._lock = Lock()
+        self.l2_hits = 0
+        self.l2_misses = 0
+        self.l2_errors = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        value = self.l1.get(key)
+        if value is not None or not self._in_l2(key):
+            return value
+        try:
+            found = self.l2.get(key)
+        except Exception as exc:
+            logger.warning("L2 cache read failed for %s: %s", cache_namespace(key), exc)
+            self._count("l2_errors")
+            return None
+        if found is None:
+            self._count("l2_misses")
+            return None
+        value, remaining_ttl = found
+        self._count("l2_hits")
+        self.l1.set(key, value, ttl_seconds=remaining_ttl)
+        return value
+
+    def set(self, key: Hashable, value: Any, *, ttl_seconds: float | None = None) -> None:
+        self.l1.set(key, value, ttl_seconds=ttl_seconds)
+        if not self._in_l2(key):
+            return
+        if ttl_seconds is None:
+            ttl_seconds = self.l1.ttl_for(cache_namespace(key))
+        try:
+            self.l2.set(key, value, ttl_seconds=ttl_seconds)
+        except Exception as exc:
+            logger.warning("L2 cache write failed for %s: %s", cache_namespace(key), exc)
+            self._count("l2_errors")
+
+    def remaining_ttl(self, key: Hashable) -> float | None:
+        """Like ``LRUCache.remaining_ttl``; an L1 miss is looked up in L2 (and copied into L1)."""
+        remaining = self.l1.remaining_ttl(key)
+        if remaining is None and self._in_l2(key) and self.get(key) is not None:
+            remaining = self.l1.remaining_ttl(key)
+        return remaining
+
+    def _in_l2(self, key: Hashable) -> bool:
+        if self.l2 is None or not isinstance(key, str):
+            return False
+        namespaces = getattr(self.l2, "namespaces", None)
+        return namespaces is None or cache_namespace(key) in namespaces
+
+    def _count(self, counter: str) -> None:
         with self._lock:
-            self._items[key] = CacheItem(value=value, expires_at=time.time() + self.ttl_seconds)
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self) -> dict[str, Any]:
+        stats = self.l1.stats()
+        if self.l2 is not None:
+            with self._lock:
+                stats["l2"] = {
+                    "backend": type(self.l2).__name__,
+                    "hits": self.l2_hits,
+                    "misses": self.l2_misses,
+                    "errors": self.l2_errors,
+                }
+        return stats
@@ -1,17 +1,16 @@
 ﻿import json
-import logging
-from collections.abc import Sequence
-from typing import Protocol
+from collections.abc import AsyncIterator, Sequence
+from functools import lru_cache
+from typing import Any, Protocol
 
 import httpx
-from pydantic import ValidationError
 
 from ..models import Verse
 from ..schemas import ChatResponse, ChatTurn, GuidanceMode, GuidanceVerse, LanguageCode
 from .guidance import extract_json
+from .http_client import PoolLimits, PooledAsyncClient, aiter_sse_json
 from .language import language_instruction
-
-logger = logging.getLogger(__name__)
+from .prompts import CHAT_SCHEMA_JSON, Prompt, chat_suffix
 
 
 class ChatProvider(Protocol):
@@ -23,6 +22,19 @@ class ChatProvider(Protocol):
         language: LanguageCode,
         history: Sequence[ChatTurn],
         verses: Sequence[Verse],
+        timeout: float | None = None,
+    ) -> ChatResponse:
+        ...
+
+    async def agenerate(
+        self,
+        *,
+        message: str,
+        mode: GuidanceMode,
+        language: LanguageCode,
+        history: Sequence[ChatTurn],
+        verses: Sequence[Verse],
+        timeout: float | None = None,
     ) -> ChatResponse:
         ...
 
@@ -49,10 +61,6 @@ def _build_verse_payload(verses: Sequence[Verse], mode: GuidanceMode) -> list[Gu
     return payload
 
 
-def _serialize_history(history: Sequence[ChatTurn]) -> list[dict[str, str]]:
-    return [{"role": turn.role, "content": turn.content} for turn in history[-12:]]
-
-
 def _mode_style_instruction(mode: GuidanceMode) -> str:
     if mode == "comfort":
         return (
@@ -68,7 +76,73 @@ def _mode_style_instruction(mode: GuidanceMode) -> str:
     )
 
 
+@lru_cache(maxsize=None)
+def _gemini_chat_prefix(mode: GuidanceMode, language: LanguageCode) -> str:
+    return (
+        "You are a Bhagavad Gita chatbot. Use only provided verses and never invent verse references. "
+        "Keep tone practical, warm, and concise. Return strict JSON only.\n"
+        f"Schema: {CHAT_SCHEMA_JSON}\n"
+        f"{language_instruction(language)}\n"
+        f"{_mode_style_instruction(mode)}\n"
+        f"Mode: {mode}\n"
+    )
+
+
+@lru_cache(maxsize=None)
+def _ollama_chat_prefix(mode: GuidanceMode, language: LanguageCode) -> str:
+    return (
+        "You are a Bhagavad Gita guidance chatbot.\n"
+        "Rules:\n"
+        "1) Use only verses in Available verses JSON.\n"
+        "2) Do not invent verse numbers.\n"
+        "3) Return strict JSON only in this structure:\n"
+        f"{CHAT_SCHEMA_JSON}\n"
+        f"{language_instruction(language)}\n"
+        f"{_mode_style_instruction(mode)}\n"
+        f"Mode: {mode}\n"
+    )
+
+
 class MockChatProvider:
+    async def astream(
+        self,
+        *,
+        message: str,
+        mode: GuidanceMode,
+        language: LanguageCode,
+        history: Sequence[ChatTurn],
+        verses: Sequence[Verse],
+        timeout: float | None = None,
+    ) -> AsyncIterator[str]:
+        # Serve the canned answer in slices so the streaming path behaves like a real provider.
+        text = self.generate(
+            message=message,
+            mode=mode,
+            language=language,
+            history=history,
+            verses=verses,
+        ).model_dump_json()
+        for start in range(0, len(text), 32):
+            yield text[start:start + 32]
+
+    async def agenerate(
+        self,
+        *,
+        message: str,
+        mode: GuidanceMode,
+        language: LanguageCode,
+        history: Sequence[ChatTurn],
+        verses: Sequence[Verse],
+        timeout: float | None = None,
+    ) -> ChatResponse:
+        return self.generate(
+            message=message,
+            mode=mode,
+            language=language,
+            history=history,
+            verses=verses,
+        )
+
     def generate(
         self,
         *,
@@ -77,6 +151,7 @@ class MockChatProvider:
         language: LanguageCode,
         history: Sequence[ChatTurn],
         verses: Sequence[Verse],
+        timeout: float | None = None,
     ) -> ChatResponse:
         verse_payload = _build_verse_payload(verses, mode)
         primary_ref = verse_payload[0].ref
@@ -188,10 +263,16 @@ class MockChatProvider:
 
 
 class GeminiChatProvider:
-    def __init__(self, *, api_key: str, model: str, fallback: ChatProvider):
+    def __init__(
+        self,
+        *,
+        api_key: str,
+        model: str,
+        limits: PoolLimits | None = None,
+    ):
         self.api_key = api_key
         self.model = model
-        self.fallback = fallback
+        self.http = PooledAsyncClient(timeout=35.0, limits=limits)
 
     def generate(
         self,
@@ -201,6 +282,7 @@ class GeminiChatProvider:
         language: LanguageCode,
         history: Sequence[ChatTurn],
         verses: Sequence[Verse],
+        timeout: float | None = None,
     ) -> ChatResponse:
         prompt = self._build_prompt(
             message=message,
@@ -209,26 +291,87 @@ class GeminiChatProvider:
             history=history,
             verses=verses,
         )
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}:generateContent"
-        payload = {
-            "contents": [{"parts": [{"text": prompt}]}],
-            "generationConfig": {"temperature": 0.2, "responseMimeType": "application/json"},
-        }
-        try:
-            response = httpx.post(url, params={"key": self.api_key}, json=payload, timeout=35.0)
+        response = httpx.post(
+            **self._request(prompt),
+            timeout=self.http.request_timeout(timeout),
+        )
+        response.raise_for_status()
+        return self._parse(response.json())
+
+    async def agenerate(
+        self,
+        *,
+        message: str,
+        mode: GuidanceMode,
+        language: LanguageCode,
+        history: Sequence[ChatTurn],
+        verses: Sequence[Verse],
+        timeout: float | None = None,
+    ) -> ChatResponse:
+        prompt = self._build_prompt(
+            message=message,
+            mode=mode,
+            language=language,
+            history=history,
+            verses=verses,
+        )
+        response = await self.http.client.post(
+            **self._request(prompt),
+            timeout=self.http.request_timeout(timeout),
+        )
+        response.raise_for_status()
+        return self._parse(response.json())
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
+
+    async def astream(
+        self,
+        *,
+        message: str,
+        mode: GuidanceMode,
+        language: LanguageCode,
+        history: Sequence[ChatTurn],
+        verses: Sequence[Verse],
+        timeout: float | None = None,
+    ) -> AsyncIterator[str]:
+        """Yield the raw JSON text as Gemini streams it; errors propagate to the orchestrator."""
+        prompt = self._build_prompt(
+            message=message,
+            mode=mode,
+            language=language,
+            history=history,
+            verses=verses,
+        )
+        request = self._request(prompt)
+        request["url"] = request["url"].replace(":generateContent", ":streamGenerateContent")
+        request["params"]["alt"] = "sse"
+        async with self.http.client.stream(
+            "POST", **request, timeout=self.http.request_timeout(timeout)
+        ) as response:
             response.raise_for_status()
-            text = response.json()["candidates"][0]["content"]["parts"][0]["text"]
-            parsed = json.loads(extract_json(text))
-            return ChatResponse.model_validate(parsed)
-        except (httpx.HTTPError, KeyError, IndexError, json.JSONDecodeError, ValidationError) as exc:
-            logger.warning("Gemini chat failed, falling back to mock provider: %s", exc)
-            return self.fallback.generate(
-                message=message,
-                mode=mode,
-                language=language,
-                history=history,
-                verses=verses,
-            )
+            async for chunk in aiter_sse_json(response):
+                for candidate in chunk.get("candidates", [])[:1]:
+                    for part in candidate.get("content", {}).get("parts", []):
+                        if part.get("text"):
+                            yield part["text"]
+
+    def _request(self, prompt: Prompt) -> dict[str, Any]:
+        # A stable system instruction ahead of the contents is what Gemini's implicit caching reuses.
+        return {
+            "url": f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}:generateContent",
+            "params": {"key": self.api_key},
+            "json": {
+                "systemInstruction": {"parts": [{"text": prompt.prefix}]},
+                "contents": [{"parts": [{"text": prompt.suffix}]}],
+                "generationConfig": {"temperature": 0.2, "responseMimeType": "application/json"},
+            },
+        }
+
+    @staticmethod
+    def _parse(data: dict[str, Any]) -> ChatResponse:
+        text = data["candidates"][0]["content"]["parts"][0]["text"]
+        return ChatResponse.model_validate(json.loads(extract_json(text)))
 
     def _build_prompt(
         self,
@@ -238,52 +381,21 @@ class GeminiChatProvider:
         language: LanguageCode,
         history: Sequence[ChatTurn],
         verses: Sequence[Verse],
-    ) -> str:
-        verses_payload = [
-            {
-                "verse_id": verse.id,
-                "ref": verse.ref,
-                "sanskrit": verse.sanskrit,
-                "transliteration": verse.transliteration,
-                "translation": verse.translation,
-            }
-            for verse in verses[:3]
-        ]
-        schema = {
-            "mode": "comfort|clarity|traditional",
-            "reply": "string",
-            "verses": [
-                {
-                    "verse_id": 47,
-                    "ref": "2.47",
-                    "sanskrit": "...",
-                    "transliteration": "...",
-                    "translation": "...",
-                    "why_this": "...",
-                }
-            ],
-            "action_step": "string",
-            "reflection_prompt": "string",
-            "safety": {"flagged": False, "message": None},
-        }
-        return (
-            "You are a Bhagavad Gita chatbot. Use only provided verses and never invent verse references. "
-            "Keep tone practical, warm, and concise. Return strict JSON only.\n"
-            f"Schema: {json.dumps(schema)}\n"
-            f"{language_instruction(language)}\n"
-            f"{_mode_style_instruction(mode)}\n"
-            f"Mode: {mode}\n"
-            f"Conversation history JSON: {json.dumps(_serialize_history(history), ensure_ascii=True)}\n"
-            f"User message: {message}\n"
-            f"Available verses JSON: {json.dumps(verses_payload, ensure_ascii=True)}"
-        )
+    ) -> Prompt:
+        return Prompt(_gemini_chat_prefix(mode, language), chat_suffix(message, history, verses))
 
 
 class OllamaChatProvider:
-    def __init__(self, *, base_url: str, model: str, fallback: ChatProvider):
+    def __init__(
+        self,
+        *,
+        base_url: str,
+        model: str,
+        limits: PoolLimits | None = None,
+    ):
         self.base_url = base_url.rstrip("/")
         self.model = model
-        self.fallback = fallback
+        self.http = PooledAsyncClient(timeout=60.0, limits=limits)
 
     def generate(
         self,
@@ -293,6 +405,7 @@ class OllamaChatProvider:
         language: LanguageCode,
         history: Sequence[ChatTurn],
         verses: Sequence[Verse],
+        timeout: float | None = None,
     ) -> ChatResponse:
         prompt = self._build_prompt(
             message=message,
@@ -301,28 +414,89 @@ class OllamaChatProvider:
             history=history,
             verses=verses,
         )
-        url = f"{self.base_url}/api/generate"
-        payload = {
-            "model": self.model,
-            "prompt": prompt,
-            "stream": False,
-            "options": {"temperature": 0.2},
-        }
-        try:
-            response = httpx.post(url, json=payload, timeout=60.0)
+        response = httpx.post(
+            **self._request(prompt),
+            timeout=self.http.request_timeout(timeout),
+        )
+        response.raise_for_status()
+        return self._parse(response.json())
+
+    async def agenerate(
+        self,
+        *,
+        message: str,
+        mode: GuidanceMode,
+        language: LanguageCode,
+        history: Sequence[ChatTurn],
+        verses: Sequence[Verse],
+        timeout: float | None = None,
+    ) -> ChatResponse:
+        prompt = self._build_prompt(
+            message=message,
+            mode=mode,
+            language=language,
+            history=history,
+            verses=verses,
+        )
+        response = await self.http.client.post(
+            **self._request(prompt),
+            timeout=self.http.request_timeout(timeout),
+        )
+        response.raise_for_status()
+        return self._parse(response.json())
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
+
+    async def astream(
+        self,
+        *,
+        message: str,
+        mode: GuidanceMode,
+        language: LanguageCode,
+        history: Sequence[ChatTurn],
+        verses: Sequence[Verse],
+        timeout: float | None = None,
+    ) -> AsyncIterator[str]:
+        """Yield the raw JSON text as Ollama generates it; errors propagate to the orchestrator."""
+        prompt = self._build_prompt(
+            message=message,
+            mode=mode,
+            language=language,
+            history=history,
+            verses=verses,
+        )
+        request = self._request(prompt)
+        request["json"]["stream"] = True
+        async with self.http.client.stream(
+            "POST", **request, timeout=self.http.request_timeout(timeout)
+        ) as response:
             response.raise_for_status()
-            raw_text = response.json().get("response", "")
-            parsed = json.loads(extract_json(raw_text))
-            return ChatResponse.model_validate(parsed)
-        except (httpx.HTTPError, KeyError, json.JSONDecodeError, ValidationError) as exc:
-            logger.warning("Ollama chat failed, falling back to mock provider: %s", exc)
-            return self.fallback.generate(
-                message=message,
-                mode=mode,
-                language=language,
-                history=history,
-                verses=verses,
-            )
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise RuntimeError(f"Ollama stream error: {chunk['error']}")
+                if chunk.get("response"):
+                    yield chunk["response"]
+
+    def _request(self, prompt: Prompt) -> dict[str, Any]:
+        # An unchanged system prompt lets Ollama reuse the KV cache of the loaded model.
+        return {
+            "url": f"{self.base_url}/api/generate",
+            "json": {
+                "model": self.model,
+                "system": prompt.prefix,
+                "prompt": prompt.suffix,
+                "stream": False,
+                "options": {"temperature": 0.2},
+            },
+        }
+
+    @staticmethod
+    def _parse(data: dict[str, Any]) -> ChatResponse:
+        return ChatResponse.model_validate(json.loads(extract_json(data.get("response", ""))))
 
     def _build_prompt(
         self,
@@ -332,30 +506,8 @@ class OllamaChatProvider:
         language: LanguageCode,
         history: Sequence[ChatTurn],
         verses: Sequence[Verse],
-    ) -> str:
-        verses_payload = [
-            {
-                "verse_id": verse.id,
-                "ref": verse.ref,
-                "sanskrit": verse.sanskrit,
-                "transliteration": verse.transliteration,
-                "translation": verse.translation,
-            }
-            for verse in verses[:3]
-        ]
-        return (
-            "You are a Bhagavad Gita guidance chatbot.\n"
-            "Rules:\n"
-            "1) Use only verses in Available verses JSON.\n"
-            "2) Do not invent verse numbers.\n"
-            "3) Return strict JSON only in this structure:\n"
-            '{"mode":"comfort|clarity|traditional","reply":"...","verses":[{"verse_id":47,"ref":"2.47","sanskrit":"...","transliteration":"...","translation":"...","why_this":"..."}],"action_step":"...","reflection_prompt":"...","safety":{"flagged":false,"message":null}}\n'
-            f"{language_instruction(language)}\n"
-            f"{_mode_style_instruction(mode)}\n"
-            f"Mode: {mode}\n"
-            f"Conversation history JSON: {json.dumps(_serialize_history(history), ensure_ascii=True)}\n"
-            f"User message: {message}\n"
-            f"Available verses JSON: {json.dumps(verses_payload, ensure_ascii=True)}\n"
-        )
+    ) -> Prompt:
+        return Prompt(_ollama_chat_prefix(mode, language), chat_suffix(message, history, verses))
+
 
 
@@ -1,22 +1,44 @@
 ﻿import json
-import logging
-from collections.abc import Sequence
+from collections.abc import AsyncIterator, Sequence
+from functools import lru_cache
+from typing import Any
 
 import httpx
-from pydantic import ValidationError
 
 from ..models import Verse
 from ..schemas import ChatResponse, ChatTurn, GuidanceMode, GuidanceResponse, LanguageCode
 from .guidance import extract_json
+from .http_client import PoolLimits, PooledAsyncClient, aiter_sse_json
 from .language import language_instruction
-
-logger = logging.getLogger(__name__)
+from .prompts import CHAT_SCHEMA_JSON, GUIDANCE_SCHEMA_JSON, Prompt, chat_suffix, guidance_suffix
 
 ANTHROPIC_API_URL = "https://api.anthropic.com/v1/messages"
 
 
-def _serialize_history(history: Sequence[ChatTurn]) -> list[dict[str, str]]:
-    return [{"role": turn.role, "content": turn.content} for turn in history[-12:]]
+def _messages_request(api_key: str, model: str, prompt: Prompt, url: str = ANTHROPIC_API_URL) -> dict[str, Any]:
+    return {
+        "url": url,
+        "headers": {
+            "x-api-key": api_key,
+            "anthropic-version": "2023-06-01",
+            "content-type": "application/json",
+        },
+        "json": {
+            "model": model,
+            "max_tokens": 1024,
+            "temperature": 0.2,
+            # The static prefix, sent deliberately without a cache_control breakpoint. At a few
+            # hundred tokens it is under Anthropic's 1024-token minimum, so a marker is silently
+            # ignored; the verses that would push a prompt past it change with every query. Only add
+            # one back if the prefix itself grows past the minimum.
+            "system": prompt.prefix,
+            "messages": [{"role": "user", "content": prompt.suffix}],
+        },
+    }
+
+
+def _parse_message(data: dict[str, Any]) -> dict[str, Any]:
+    return json.loads(extract_json(data["content"][0]["text"]))
 
 
 def _mode_style_instruction(mode: GuidanceMode) -> str:
@@ -30,13 +52,48 @@ def _mode_style_instruction(mode: GuidanceMode) -> str:
     )
 
 
+@lru_cache(maxsize=None)
+def _guidance_prefix(mode: GuidanceMode, language: LanguageCode) -> str:
+    return (
+        "You are a compassionate Bhagavad Gita guidance assistant. "
+        "Use only the supplied verses. Do not invent verse references. "
+        "Return strict JSON only - no markdown fences and no explanation outside JSON. "
+        f"Schema: {GUIDANCE_SCHEMA_JSON}\n\n"
+        f"{language_instruction(language)}\n"
+        f"{_mode_style_instruction(mode)}\n"
+        f"Mode: {mode}\n"
+    )
+
+
+@lru_cache(maxsize=None)
+def _chat_prefix(mode: GuidanceMode, language: LanguageCode) -> str:
+    return (
+        "You are a compassionate Bhagavad Gita chatbot. "
+        "Use only provided verses and never invent verse references. "
+        "Keep tone practical, warm, and concise. "
+        "Return strict JSON only - no markdown fences.\n"
+        f"Schema: {CHAT_SCHEMA_JSON}\n"
+        f"{language_instruction(language)}\n"
+        f"{_mode_style_instruction(mode)}\n"
+        f"Mode: {mode}\n"
+    )
+
+
 class ClaudeProvider:
     """Guidance provider using Anthropic Claude API."""
 
-    def __init__(self, api_key: str, model: str, fallback):
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        *,
+        limits: PoolLimits | None = None,
+        api_url: str = ANTHROPIC_API_URL,
+    ):
         self.api_key = api_key
         self.model = model
-        self.fallback = fallback
+        self.api_url = api_url
+        self.http = PooledAsyncClient(timeout=30.0, limits=limits)
 
     def generate(
         self,
@@ -45,95 +102,62 @@ class ClaudeProvider:
         mode: GuidanceMode,
         language: LanguageCode,
         verses: Sequence[Verse],
+        timeout: float | None = None,
     ) -> GuidanceResponse:
         prompt = self._build_prompt(topic=topic, mode=mode, language=language, verses=verses)
-        try:
-            response = httpx.post(
-                ANTHROPIC_API_URL,
-                headers={
-                    "x-api-key": self.api_key,
-                    "anthropic-version": "2023-06-01",
-                    "content-type": "application/json",
-                },
-                json={
-                    "model": self.model,
-                    "max_tokens": 1024,
-                    "temperature": 0.2,
-                    "messages": [{"role": "user", "content": prompt}],
-                },
-                timeout=30.0,
-            )
-            response.raise_for_status()
-            text = response.json()["content"][0]["text"]
-            parsed = json.loads(extract_json(text))
-            return GuidanceResponse.model_validate(parsed)
-        except (httpx.HTTPError, KeyError, IndexError, json.JSONDecodeError, ValidationError) as exc:
-            logger.warning("Claude guidance failed, falling back: %s", exc)
-            return self.fallback.generate(topic=topic, mode=mode, language=language, verses=verses)
+        response = httpx.post(
+            **_messages_request(self.api_key, self.model, prompt, self.api_url),
+            timeout=self.http.request_timeout(timeout),
+        )
+        response.raise_for_status()
+        return GuidanceResponse.model_validate(_parse_message(response.json()))
 
-    def _build_prompt(
+    async def agenerate(
         self,
         *,
         topic: str,
         mode: GuidanceMode,
         language: LanguageCode,
         verses: Sequence[Verse],
-    ) -> str:
-        verse_text = [
-            {
-                "verse_id": verse.id,
-                "ref": verse.ref,
-                "sanskrit": verse.sanskrit,
-                "transliteration": verse.transliteration,
-                "translation": verse.translation,
-            }
-            for verse in verses[:3]
-        ]
-
-        schema = {
-            "mode": "comfort|clarity|traditional",
-            "topic": "string",
-            "verses": [
-                {
-                    "verse_id": 47,
-                    "ref": "2.47",
-                    "sanskrit": "...",
-                    "transliteration": "...",
-                    "translation": "...",
-                    "why_this": "...",
-                }
-            ],
-            "guidance_short": "string (max 500 chars)",
-            "guidance_long": "string",
-            "micro_practice": {
-                "title": "string",
-                "steps": ["...", "..."],
-                "duration_minutes": 1,
-            },
-            "reflection_prompt": "string",
-            "safety": {"flagged": False, "message": None},
-        }
-
-        return (
-            "You are a compassionate Bhagavad Gita guidance assistant. "
-            "Use only the supplied verses. Do not invent verse references. "
-            "Return strict JSON only - no markdown fences and no explanation outside JSON. "
-            f"Schema: {json.dumps(schema)}\n\n"
-            f"{language_instruction(language)}\n"
-            f"{_mode_style_instruction(mode)}\n"
-            f"Mode: {mode}\n"
-            f"Topic: {topic}\n"
-            f"Available verses JSON: {json.dumps(verse_text, ensure_ascii=True)}"
+        timeout: float | None = None,
+    ) -> GuidanceResponse:
+        prompt = self._build_prompt(topic=topic, mode=mode, language=language, verses=verses)
+        response = await self.http.client.post(
+            **_messages_request(self.api_key, self.model, prompt, self.api_url),
+            timeout=self.http.request_timeout(timeout),
         )
+        response.raise_for_status()
+        return GuidanceResponse.model_validate(_parse_message(response.json()))
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
+
+    def _build_prompt(
+        self,
+        *,
+        topic: str,
+        mode: GuidanceMode,
+        language: LanguageCode,
+        verses: Sequence[Verse],
+    ) -> Prompt:
+        return Prompt(_guidance_prefix(mode, language), guidance_suffix(topic, verses))
 
 
 class ClaudeChatProvider:
     """Chat provider using Anthropic Claude API."""
 
-    def __init__(self, *, api_key: str, model: str, fallback):
+    def __init__(
+        self,
+        *,
+        api_key: str,
+        model: str,
+        limits: PoolLimits | None = None,
+        api_url: str = ANTHROPIC_API_URL,
+    ):
         self.api_key = api_key
         self.model = model
-        self.fallback = fallback
+        self.api_url = api_url
+        self.http = PooledAsyncClient(timeout=35.0, limits=limits)
 
     def generate(
         self,
@@ -143,6 +167,31 @@ class ClaudeChatProvider:
         language: LanguageCode,
         history: Sequence[ChatTurn],
         verses: Sequence[Verse],
+        timeout: float | None = None,
+    ) -> ChatResponse:
+        prompt = self._build_prompt(
+            message=message,
+            mode=mode,
+            language=language,
+            history=history,
+            verses=verses,
+        )
+        response = httpx.post(
+            **_messages_request(self.api_key, self.model, prompt, self.api_url),
+            timeout=self.http.request_timeout(timeout),
+        )
+        response.raise_for_status()
+        return ChatResponse.model_validate(_parse_message(response.json()))
+
+    async def agenerate(
+        self,
+        *,
+        message: str,
+        mode: GuidanceMode,
+        language: LanguageCode,
+        history: Sequence[ChatTurn],
+        verses: Sequence[Verse],
+        timeout: float | None = None,
     ) -> ChatResponse:
         prompt = self._build_prompt(
             message=message,
@@ -151,35 +200,47 @@ class ClaudeChatProvider:
             history=history,
             verses=verses,
         )
-        try:
-            response = httpx.post(
-                ANTHROPIC_API_URL,
-                headers={
-                    "x-api-key": self.api_key,
-                    "anthropic-version": "2023-06-01",
-                    "content-type": "application/json",
-                },
-                json={
-                    "model": self.model,
-                    "max_tokens": 1024,
-                    "temperature": 0.2,
-                    "messages": [{"role": "user", "content": prompt}],
-                },
-                timeout=35.0,
-            )
+        response = await self.http.client.post(
+            **_messages_request(self.api_key, self.model, prompt, self.api_url),
+            timeout=self.http.request_timeout(timeout),
+        )
+        response.raise_for_status()
+        return ChatResponse.model_validate(_parse_message(response.json()))
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
+
+    async def astream(
+        self,
+        *,
+        message: str,
+        mode: GuidanceMode,
+        language: LanguageCode,
+        history: Sequence[ChatTurn],
+        verses: Sequence[Verse],
+        timeout: float | None = None,
+    ) -> AsyncIterator[str]:
+        """Yield the raw JSON text as Claude streams it; errors propagate to the orchestrator."""
+        prompt = self._build_prompt(
+            message=message,
+            mode=mode,
+            language=language,
+            history=history,
+            verses=verses,
+        )
+        request = _messages_request(self.api_key, self.model, prompt, self.api_url)
+        request["json"]["stream"] = True
+        async with self.http.client.stream(
+            "POST", **request, timeout=self.http.request_timeout(timeout)
+        ) as response:
             response.raise_for_status()
-            text = response.json()["content"][0]["text"]
-            parsed = json.loads(extract_json(text))
-            return ChatResponse.model_validate(parsed)
-        except (httpx.HTTPError, KeyError, IndexError, json.JSONDecodeError, ValidationError) as exc:
-            logger.warning("Claude chat failed, falling back: %s", exc)
-            return self.fallback.generate(
-                message=message,
-                mode=mode,
-                language=language,
-                history=history,
-                verses=verses,
-            )
+            async for event in aiter_sse_json(response):
+                if event.get("type") == "content_block_delta":
+                    text = event["delta"].get("text")
+                    if text:
+                        yield text
+                elif event.get("type") == "error":
+                    raise RuntimeError(f"Claude stream error: {event.get('error')}")
 
     def _build_prompt(
         self,
@@ -189,44 +250,5 @@ class ClaudeChatProvider:
         language: LanguageCode,
         history: Sequence[ChatTurn],
         verses: Sequence[Verse],
-    ) -> str:
-        verses_payload = [
-            {
-                "verse_id": verse.id,
-                "ref": verse.ref,
-                "sanskrit": verse.sanskrit,
-                "transliteration": verse.transliteration,
-                "translation": verse.translation,
-            }
-            for verse in verses[:3]
-        ]
-        schema = {
-            "mode": "comfort|clarity|traditional",
-            "reply": "string",
-            "verses": [
-                {
-                    "verse_id": 47,
-                    "ref": "2.47",
-                    "sanskrit": "...",
-                    "transliteration": "...",
-                    "translation": "...",
-                    "why_this": "...",
-                }
-            ],
-            "action_step": "string",
-            "reflection_prompt": "string",
-            "safety": {"flagged": False, "message": None},
-        }
-        return (
-            "You are a compassionate Bhagavad Gita chatbot. "
-            "Use only provided verses and never invent verse references. "
-            "Keep tone practical, warm, and concise. "
-            "Return strict JSON only - no markdown fences.\n"
-            f"Schema: {json.dumps(schema)}\n"
-            f"{language_instruction(language)}\n"
-            f"{_mode_style_instruction(mode)}\n"
-            f"Mode: {mode}\n"
-            f"Conversation history JSON: {json.dumps(_serialize_history(history), ensure_ascii=True)}\n"
-            f"User message: {message}\n"
-            f"Available verses JSON: {json.dumps(verses_payload, ensure_ascii=True)}"
-        )
+    ) -> Prompt:
+        return Prompt(_chat_prefix(mode, language), chat_suffix(message, history, verses))
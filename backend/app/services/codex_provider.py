@@ -1,22 +1,42 @@
 ﻿import json
-import logging
-from collections.abc import Sequence
+from collections.abc import AsyncIterator, Sequence
+from functools import lru_cache
+from typing import Any
 
 import httpx
-from pydantic import ValidationError
 
 from ..models import Verse
 from ..schemas import ChatResponse, ChatTurn, GuidanceMode, GuidanceResponse, LanguageCode
 from .guidance import extract_json
+from .http_client import PoolLimits, PooledAsyncClient, aiter_sse_json
 from .language import language_instruction
-
-logger = logging.getLogger(__name__)
+from .prompts import CHAT_SCHEMA_JSON, GUIDANCE_SCHEMA_JSON, Prompt, chat_suffix, guidance_suffix
 
 OPENAI_API_URL = "https://api.openai.com/v1/chat/completions"
 
 
-def _serialize_history(history: Sequence[ChatTurn]) -> list[dict[str, str]]:
-    return [{"role": turn.role, "content": turn.content} for turn in history[-12:]]
+def _completion_request(api_key: str, model: str, prompt: Prompt, url: str = OPENAI_API_URL) -> dict[str, Any]:
+    # Static instructions first: OpenAI caches repeated prompt prefixes automatically.
+    return {
+        "url": url,
+        "headers": {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        },
+        "json": {
+            "model": model,
+            "temperature": 0.2,
+            "max_tokens": 1024,
+            "messages": [
+                {"role": "system", "content": prompt.prefix},
+                {"role": "user", "content": prompt.suffix},
+            ],
+        },
+    }
+
+
+def _parse_completion(data: dict[str, Any]) -> dict[str, Any]:
+    return json.loads(extract_json(data["choices"][0]["message"]["content"]))
 
 
 def _mode_style_instruction(mode: GuidanceMode) -> str:
@@ -30,13 +50,46 @@ def _mode_style_instruction(mode: GuidanceMode) -> str:
     )
 
 
+@lru_cache(maxsize=None)
+def _guidance_prefix(mode: GuidanceMode, language: LanguageCode) -> str:
+    return (
+        "You are a Bhagavad Gita guidance assistant. Return strict JSON only.\n"
+        "Use only the supplied verses. Do not invent verse references. "
+        f"Return strict JSON matching this schema: {GUIDANCE_SCHEMA_JSON}\n\n"
+        f"{language_instruction(language)}\n"
+        f"{_mode_style_instruction(mode)}\n"
+        f"Mode: {mode}\n"
+    )
+
+
+@lru_cache(maxsize=None)
+def _chat_prefix(mode: GuidanceMode, language: LanguageCode) -> str:
+    return (
+        "You are a Bhagavad Gita chatbot. Return strict JSON only.\n"
+        "Use only provided verses. Never invent verse references. "
+        "Keep tone practical, warm, concise. Return strict JSON only.\n"
+        f"Schema: {CHAT_SCHEMA_JSON}\n"
+        f"{language_instruction(language)}\n"
+        f"{_mode_style_instruction(mode)}\n"
+        f"Mode: {mode}\n"
+    )
+
+
 class CodexGuidanceProvider:
     """Guidance provider using OpenAI API (GPT/Codex models)."""
 
-    def __init__(self, api_key: str, model: str, fallback):
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        *,
+        limits: PoolLimits | None = None,
+        api_url: str = OPENAI_API_URL,
+    ):
         self.api_key = api_key
         self.model = model
-        self.fallback = fallback
+        self.api_url = api_url
+        self.http = PooledAsyncClient(timeout=30.0, limits=limits)
 
     def generate(
         self,
@@ -45,95 +98,65 @@ class CodexGuidanceProvider:
         mode: GuidanceMode,
         language: LanguageCode,
         verses: Sequence[Verse],
+        timeout: float | None = None,
     ) -> GuidanceResponse:
         prompt = self._build_prompt(topic=topic, mode=mode, language=language, verses=verses)
-        try:
-            response = httpx.post(
-                OPENAI_API_URL,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": self.model,
-                    "temperature": 0.2,
-                    "max_tokens": 1024,
-                    "messages": [
-                        {
-                            "role": "system",
-                            "content": "You are a Bhagavad Gita guidance assistant. Return strict JSON only.",
-                        },
-                        {"role": "user", "content": prompt},
-                    ],
-                },
-                timeout=30.0,
-            )
-            response.raise_for_status()
-            text = response.json()["choices"][0]["message"]["content"]
-            parsed = json.loads(extract_json(text))
-            return GuidanceResponse.model_validate(parsed)
-        except (httpx.HTTPError, KeyError, IndexError, json.JSONDecodeError, ValidationError) as exc:
-            logger.warning("Codex/OpenAI guidance failed, falling back: %s", exc)
-            return self.fallback.generate(topic=topic, mode=mode, language=language, verses=verses)
+        response = httpx.post(
+            **self._request(prompt),
+            timeout=self.http.request_timeout(timeout),
+        )
+        response.raise_for_status()
+        return GuidanceResponse.model_validate(_parse_completion(response.json()))
 
-    def _build_prompt(
+    async def agenerate(
         self,
         *,
         topic: str,
         mode: GuidanceMode,
         language: LanguageCode,
         verses: Sequence[Verse],
-    ) -> str:
-        verse_text = [
-            {
-                "verse_id": verse.id,
-                "ref": verse.ref,
-                "sanskrit": verse.sanskrit,
-                "transliteration": verse.transliteration,
-                "translation": verse.translation,
-            }
-            for verse in verses[:3]
-        ]
-        schema = {
-            "mode": "comfort|clarity|traditional",
-            "topic": "string",
-            "verses": [
-                {
-                    "verse_id": 47,
-                    "ref": "2.47",
-                    "sanskrit": "...",
-                    "transliteration": "...",
-                    "translation": "...",
-                    "why_this": "...",
-                }
-            ],
-            "guidance_short": "string (max 500 chars)",
-            "guidance_long": "string",
-            "micro_practice": {
-                "title": "string",
-                "steps": ["...", "..."],
-                "duration_minutes": 1,
-            },
-            "reflection_prompt": "string",
-            "safety": {"flagged": False, "message": None},
-        }
-        return (
-            "Use only the supplied verses. Do not invent verse references. "
-            f"Return strict JSON matching this schema: {json.dumps(schema)}\n\n"
-            f"{language_instruction(language)}\n"
-            f"{_mode_style_instruction(mode)}\n"
-            f"Mode: {mode}\nTopic: {topic}\n"
-            f"Available verses JSON: {json.dumps(verse_text, ensure_ascii=True)}"
+        timeout: float | None = None,
+    ) -> GuidanceResponse:
+        prompt = self._build_prompt(topic=topic, mode=mode, language=language, verses=verses)
+        response = await self.http.client.post(
+            **self._request(prompt),
+            timeout=self.http.request_timeout(timeout),
         )
+        response.raise_for_status()
+        return GuidanceResponse.model_validate(_parse_completion(response.json()))
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
+
+    def _request(self, prompt: Prompt) -> dict[str, Any]:
+        return _completion_request(self.api_key, self.model, prompt, self.api_url)
+
+    def _build_prompt(
+        self,
+        *,
+        topic: str,
+        mode: GuidanceMode,
+        language: LanguageCode,
+        verses: Sequence[Verse],
+    ) -> Prompt:
+        return Prompt(_guidance_prefix(mode, language), guidance_suffix(topic, verses))
 
 
 class CodexChatProvider:
     """Chat provider using OpenAI API (GPT/Codex models)."""
 
-    def __init__(self, *, api_key: str, model: str, fallback):
+    def __init__(
+        self,
+        *,
+        api_key: str,
+        model: str,
+        limits: PoolLimits | None = None,
+        api_url: str = OPENAI_API_URL,
+    ):
         self.api_key = api_key
         self.model = model
-        self.fallback = fallback
+        self.api_url = api_url
+        self.http = PooledAsyncClient(timeout=35.0, limits=limits)
 
     def generate(
         self,
@@ -143,6 +166,7 @@ class CodexChatProvider:
         language: LanguageCode,
         history: Sequence[ChatTurn],
         verses: Sequence[Verse],
+        timeout: float | None = None,
     ) -> ChatResponse:
         prompt = self._build_prompt(
             message=message,
@@ -151,37 +175,72 @@ class CodexChatProvider:
             history=history,
             verses=verses,
         )
-        try:
-            response = httpx.post(
-                OPENAI_API_URL,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": self.model,
-                    "temperature": 0.2,
-                    "max_tokens": 1024,
-                    "messages": [
-                        {"role": "system", "content": "You are a Bhagavad Gita chatbot. Return strict JSON only."},
-                        {"role": "user", "content": prompt},
-                    ],
-                },
-                timeout=35.0,
-            )
+        response = httpx.post(
+            **self._request(prompt),
+            timeout=self.http.request_timeout(timeout),
+        )
+        response.raise_for_status()
+        return ChatResponse.model_validate(_parse_completion(response.json()))
+
+    async def agenerate(
+        self,
+        *,
+        message: str,
+        mode: GuidanceMode,
+        language: LanguageCode,
+        history: Sequence[ChatTurn],
+        verses: Sequence[Verse],
+        timeout: float | None = None,
+    ) -> ChatResponse:
+        prompt = self._build_prompt(
+            message=message,
+            mode=mode,
+            language=language,
+            history=history,
+            verses=verses,
+        )
+        response = await self.http.client.post(
+            **self._request(prompt),
+            timeout=self.http.request_timeout(timeout),
+        )
+        response.raise_for_status()
+        return ChatResponse.model_validate(_parse_completion(response.json()))
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
+
+    async def astream(
+        self,
+        *,
+        message: str,
+        mode: GuidanceMode,
+        language: LanguageCode,
+        history: Sequence[ChatTurn],
+        verses: Sequence[Verse],
+        timeout: float | None = None,
+    ) -> AsyncIterator[str]:
+        """Yield the raw JSON text as OpenAI streams it; errors propagate to the orchestrator."""
+        prompt = self._build_prompt(
+            message=message,
+            mode=mode,
+            language=language,
+            history=history,
+            verses=verses,
+        )
+        request = self._request(prompt)
+        request["json"]["stream"] = True
+        async with self.http.client.stream(
+            "POST", **request, timeout=self.http.request_timeout(timeout)
+        ) as response:
             response.raise_for_status()
-            text = response.json()["choices"][0]["message"]["content"]
-            parsed = json.loads(extract_json(text))
-            return ChatResponse.model_validate(parsed)
-        except (httpx.HTTPError, KeyError, IndexError, json.JSONDecodeError, ValidationError) as exc:
-            logger.warning("Codex/OpenAI chat failed, falling back: %s", exc)
-            return self.fallback.generate(
-                message=message,
-                mode=mode,
-                language=language,
-                history=history,
-                verses=verses,
-            )
+            async for chunk in aiter_sse_json(response):
+                choices = chunk.get("choices") or [{}]
+                text = choices[0].get("delta", {}).get("content")
+                if text:
+                    yield text
+
+    def _request(self, prompt: Prompt) -> dict[str, Any]:
+        return _completion_request(self.api_key, self.model, prompt, self.api_url)
 
     def _build_prompt(
         self,
@@ -191,42 +250,5 @@ class CodexChatProvider:
         language: LanguageCode,
         history: Sequence[ChatTurn],
         verses: Sequence[Verse],
-    ) -> str:
-        verses_payload = [
-            {
-                "verse_id": verse.id,
-                "ref": verse.ref,
-                "sanskrit": verse.sanskrit,
-                "transliteration": verse.transliteration,
-                "translation": verse.translation,
-            }
-            for verse in verses[:3]
-        ]
-        schema = {
-            "mode": "comfort|clarity|traditional",
-            "reply": "string",
-            "verses": [
-                {
-                    "verse_id": 47,
-                    "ref": "2.47",
-                    "sanskrit": "...",
-                    "transliteration": "...",
-                    "translation": "...",
-                    "why_this": "...",
-                }
-            ],
-            "action_step": "string",
-            "reflection_prompt": "string",
-            "safety": {"flagged": False, "message": None},
-        }
-        return (
-            "Use only provided verses. Never invent verse references. "
-            "Keep tone practical, warm, concise. Return strict JSON only.\n"
-            f"Schema: {json.dumps(schema)}\n"
-            f"{language_instruction(language)}\n"
-            f"{_mode_style_instruction(mode)}\n"
-            f"Mode: {mode}\n"
-            f"Conversation history: {json.dumps(_serialize_history(history), ensure_ascii=True)}\n"
-            f"User message: {message}\n"
-            f"Available verses: {json.dumps(verses_payload, ensure_ascii=True)}"
-        )
+    ) -> Prompt:
+        return Prompt(_chat_prefix(mode, language), chat_suffix(message, history, verses))
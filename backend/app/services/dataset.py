@@ -0,0 +1,65 @@
+"""Dataset fingerprinting for the verses table.
+
+In-memory indexes and HTTP caches key off this version so they notice when
+``seed_data.py`` or ``build_embeddings.py`` rewrites the corpus.
+"""
+
+import threading
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+_CONTENT_COLUMNS = (
+    "ref, chapter, verse_number, chapter_name, sanskrit, translation, transliteration, translation_hi, "
+    "tags::text, source::text"
+)
+
+
+def _fingerprint_sql(columns: str):
+    return text(
+        f"""
+        SELECT count(*) AS total,
+               coalesce(md5(string_agg(md5(concat_ws('|', {columns})), '' ORDER BY id)), '') AS digest
+        FROM verses
+        """
+    )
+
+
+_FINGERPRINT_SQL = _fingerprint_sql(f"{_CONTENT_COLUMNS}, embedding::text")
+# The embedding text is most of what the full fingerprint hashes, and API payloads never include it.
+_CONTENT_FINGERPRINT_SQL = _fingerprint_sql(_CONTENT_COLUMNS)
+
+
+def dataset_version(db: Session, *, include_embeddings: bool = True) -> str:
+    """Return a short version string that changes whenever any verse row changes.
+
+    With ``include_embeddings=False`` only the served columns are hashed: a
+    much cheaper scan that misses re-embedding, which is fine for HTTP caching.
+    """
+    row = db.execute(_FINGERPRINT_SQL if include_embeddings else _CONTENT_FINGERPRINT_SQL).one()
+    return f'{row.total}-{row.digest[:16]}'
+
+
+class ContentVersion:
+    """``dataset_version(db, include_embeddings=False)`` memoized for ``ttl_seconds``.
+
+    Per-request callers (ETags, response cache keys) then scan the table at
+    most once per TTL per process, and notice a reseed within the TTL.
+    """
+
+    def __init__(self, ttl_seconds: float = 10.0):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._value: str | None = None
+        self._expires_at = 0.0
+
+    def get(self, db: Session) -> str:
+        with self._lock:
+            if self._value is not None and time.monotonic() < self._expires_at:
+                return self._value
+        value = dataset_version(db, include_embeddings=False)
+        with self._lock:
+            self._value = value
+            self._expires_at = time.monotonic() + self.ttl_seconds
+        return value
@@ -0,0 +1,127 @@
+"""Precomputed verse embedding matrices stored next to the verse dataset.
+
+``scripts/build_embeddings.py`` writes one ``.npy`` matrix plus a ``.refs.json``
+index per (model, dataset) pair. Both file names carry the model key and a hash
+of the exact texts that were embedded, so a changed translation or a different
+model simply misses instead of loading stale vectors. Loading uses
+``mmap_mode="r"``: pages are read on demand and shared between processes.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def default_artifact_dir() -> Path:
+    """``/data/embeddings`` inside Docker, otherwise ``<repo>/data/embeddings``."""
+    mounted = Path("/data")
+    if mounted.is_dir():
+        return mounted / "embeddings"
+    return Path(__file__).resolve().parents[3] / "data" / "embeddings"
+
+
+def artifact_model_key(provider_type: str, model_name: str, *, dimension: int, quantized: bool = False) -> str:
+    """Identify the vector space an artifact belongs to, without loading the model."""
+    if provider_type == "hash":
+        return f"hash-{dimension}"
+    name = model_name.rsplit("/", 1)[-1]
+    if provider_type == "onnx":
+        name = f"{name}-onnx-int8" if quantized else f"{name}-onnx"
+    return _UNSAFE_CHARS.sub("-", name)
+
+
+def dataset_hash(items: Sequence[tuple[str, str]]) -> str:
+    """Order-independent hash of (ref, embedding text) pairs."""
+    digest = hashlib.sha256()
+    for ref, text in sorted(items):
+        digest.update(ref.encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class EmbeddingArtifact:
+    model_key: str
+    dataset_hash: str
+    refs: list[str]
+    vectors: np.ndarray
+
+    def rows_by_ref(self) -> dict[str, int]:
+        return {ref: i for i, ref in enumerate(self.refs)}
+
+
+def _paths(directory: Path, model_key: str, data_hash: str) -> tuple[Path, Path]:
+    stem = f"{model_key}-{data_hash}"
+    return directory / f"{stem}.npy", directory / f"{stem}.refs.json"
+
+
+def save_embedding_artifact(
+    directory: str | Path,
+    model_key: str,
+    items: Sequence[tuple[str, str]],
+    vectors: np.ndarray,
+) -> Path:
+    """Write ``vectors`` (one row per item, same order) and its ref index; returns the ``.npy`` path."""
+    if len(items) != len(vectors):
+        raise ValueError(f"{len(items)} items but {len(vectors)} vectors")
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    data_hash = dataset_hash(items)
+    matrix_path, refs_path = _paths(directory, model_key, data_hash)
+
+    tmp_matrix = matrix_path.with_name(matrix_path.name + ".tmp")
+    with tmp_matrix.open("wb") as fh:
+        np.save(fh, np.ascontiguousarray(vectors, dtype=np.float32))
+    tmp_refs = refs_path.with_name(refs_path.name + ".tmp")
+    tmp_refs.write_text(
+        json.dumps(
+            {
+                "model_key": model_key,
+                "dataset_hash": data_hash,
+                "dimension": int(vectors.shape[1]),
+                "refs": [ref for ref, _text in items],
+            },
+            ensure_ascii=False,
+        ),
+        encoding="utf-8",
+    )
+    os.replace(tmp_matrix, matrix_path)
+    os.replace(tmp_refs, refs_path)
+    return matrix_path
+
+
+def load_embedding_artifact(
+    directory: str | Path,
+    model_key: str,
+    items: Sequence[tuple[str, str]],
+) -> EmbeddingArtifact | None:
+    """Memory-map the artifact matching ``model_key`` and exactly these items, or return None."""
+    data_hash = dataset_hash(items)
+    matrix_path, refs_path = _paths(Path(directory), model_key, data_hash)
+    if not matrix_path.exists() or not refs_path.exists():
+        return None
+    try:
+        meta = json.loads(refs_path.read_text(encoding="utf-8"))
+        vectors = np.load(matrix_path, mmap_mode="r", allow_pickle=False)
+    except (OSError, ValueError) as exc:
+        logger.warning("Could not load embedding artifact %s: %s", matrix_path, exc)
+        return None
+
+    refs = meta.get("refs") or []
+    if vectors.ndim != 2 or len(refs) != vectors.shape[0] or sorted(refs) != sorted(ref for ref, _text in items):
+        logger.warning("Ignoring inconsistent embedding artifact %s", matrix_path)
+        return None
+    return EmbeddingArtifact(model_key=model_key, dataset_hash=data_hash, refs=refs, vectors=vectors)
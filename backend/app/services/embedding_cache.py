@@ -0,0 +1,168 @@
+"""LRU cache for query embeddings with hit/miss counters and optional persistence."""
+
+import logging
+import os
+import re
+import tempfile
+import threading
+import unicodedata
+import zipfile
+from collections import OrderedDict
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from .embeddings import EmbeddingProvider
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """Cache key for a query: NFKC, case-folded, whitespace collapsed."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip().casefold()
+
+
+class EmbeddingCache:
+    """Bounded LRU map from normalized query text to an embedding tuple.
+
+    When ``path`` is set the cache can be saved to and restored from a ``.npz``
+    file, so a restarted worker starts warm for popular moods and questions.
+    Entries are tagged with ``model_name`` and discarded on load if the model
+    or dimension changed.
+    """
+
+    def __init__(self, *, max_entries: int = 2048, model_name: str = "", path: str | Path | None = None):
+        self.max_entries = max_entries
+        self.model_name = model_name
+        self.path = Path(path) if path else None
+        self._items: OrderedDict[str, tuple[float, ...]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, text: str) -> tuple[float, ...] | None:
+        key = normalize_query(text)
+        with self._lock:
+            vector = self._items.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, text: str, vector: Sequence[float]) -> None:
+        if self.max_entries <= 0:
+            return
+        key = normalize_query(text)
+        with self._lock:
+            self._items[key] = tuple(float(v) for v in vector)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._items),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "persist_path": str(self.path) if self.path else None,
+            }
+
+    def save(self) -> bool:
+        if self.path is None:
+            return False
+        with self._lock:
+            keys = list(self._items.keys())
+            vectors = list(self._items.values())
+        if not keys:
+            return False
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Every worker saves on shutdown; a temp file of its own keeps concurrent writes from interleaving.
+        with tempfile.NamedTemporaryFile(
+            dir=self.path.parent, prefix=f"{self.path.name}.", suffix=".tmp", delete=False
+        ) as fh:
+            tmp_path = Path(fh.name)
+            try:
+                np.savez(
+                    fh,
+                    keys=np.asarray(keys),
+                    vectors=np.asarray(vectors, dtype=np.float32),
+                    model_name=np.asarray(self.model_name),
+                )
+            except BaseException:
+                tmp_path.unlink(missing_ok=True)
+                raise
+        os.replace(tmp_path, self.path)
+        logger.info("Saved %d cached query embeddings to %s", len(keys), self.path)
+        return True
+
+    def load(self, *, dimension: int | None = None) -> int:
+        if self.path is None or not self.path.exists():
+            return 0
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if str(data["model_name"]) != self.model_name:
+                    logger.info("Ignoring embedding cache %s built for another model", self.path)
+                    return 0
+                keys = [str(key) for key in data["keys"]]
+                vectors = data["vectors"]
+        except (OSError, KeyError, ValueError, EOFError, zipfile.BadZipFile) as exc:
+            # A truncated or corrupt file just means starting cold.
+            logger.warning("Could not load embedding cache %s: %s", self.path, exc)
+            return 0
+        if dimension is not None and vectors.ndim == 2 and vectors.shape[1] != dimension:
+            logger.info("Ignoring embedding cache %s with dimension %d", self.path, vectors.shape[1])
+            return 0
+
+        # Files are written least- to most-recently used, so re-inserting in order keeps LRU order.
+        for key, vector in zip(keys[-self.max_entries:], vectors[-self.max_entries:]):
+            self.put(key, vector.tolist())
+        return min(len(keys), self.max_entries)
+
+
+class CachedEmbeddingProvider:
+    """Wraps an EmbeddingProvider so single-query ``embed`` calls go through an EmbeddingCache.
+
+    ``embed_many`` is passed straight through: bulk calls embed the verse corpus
+    and would only evict the query entries worth keeping.
+    """
+
+    def __init__(self, provider: EmbeddingProvider, cache: EmbeddingCache):
+        self.provider = provider
+        self.cache = cache
+
+    @property
+    def dimension(self) -> int:
+        return self.provider.dimension
+
+    @property
+    def ready(self) -> bool:
+        return getattr(self.provider, "ready", True)
+
+    def embed(self, text: str) -> tuple[float, ...]:
+        cached = self.cache.get(text)
+        if cached is not None:
+            return cached
+        vector = tuple(float(v) for v in self.provider.embed(text))
+        self.cache.put(text, vector)
+        return vector
+
+    def embed_many(self, texts: Sequence[str], batch_size: int = 64) -> np.ndarray:
+        return self.provider.embed_many(texts, batch_size=batch_size)
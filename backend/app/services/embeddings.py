@@ -1,27 +1,49 @@
 ﻿import logging
 import math
 import re
-from collections.abc import Iterable
-from functools import lru_cache
+import unicodedata
+import zlib
+from collections.abc import Iterable, Sequence
+from pathlib import Path
 from typing import Protocol
 
-TOKEN_PATTERN = re.compile(r"[a-zA-Z0-9']+")
+import numpy as np
+
+# Word characters plus Indic combining vowel signs (matras), which `\w` alone
+# would split on. The Devanagari dandas (U+0964/U+0965) stay separators.
+TOKEN_PATTERN = re.compile(r"[\w'\u0300-\u036f\u0900-\u0963\u0966-\u0dff]+")
 logger = logging.getLogger(__name__)
 
 
 class EmbeddingProvider(Protocol):
     dimension: int
 
+    @property
+    def ready(self) -> bool:
+        """False until the underlying model has been loaded."""
+        ...
+
     def embed(self, text: str) -> list[float]:
         ...
 
+    def embed_many(self, texts: Sequence[str], batch_size: int = 64) -> np.ndarray:
+        """Embed many texts at once; returns a (len(texts), dimension) float32 matrix."""
+        ...
+
 
 class LocalHashEmbeddingProvider:
     """A deterministic local embedder so the MVP works without any API keys."""
 
+    ready = True
+
     def __init__(self, dimension: int = 64):
         self.dimension = dimension
 
+    def _bucket(self, token: str) -> int:
+        # crc32 rather than hash(): str hashing is salted per process, which
+        # made stored vectors disagree with query vectors after a restart.
+        return zlib.crc32(token.encode("utf-8")) % self.dimension
+
     def embed(self, text: str) -> list[float]:
         vector = [0.0] * self.dimension
         tokens = TOKEN_PATTERN.findall(text.lower())
@@ -29,7 +51,7 @@ class LocalHashEmbeddingProvider:
             return vector
 
         for token in tokens:
-            idx = hash(token) % self.dimension
+            idx = self._bucket(token)
             vector[idx] += 1.0
 
         norm = math.sqrt(sum(v * v for v in vector))
@@ -37,6 +59,20 @@ class LocalHashEmbeddingProvider:
             return vector
         return [v / norm for v in vector]
 
+    def embed_many(self, texts: Sequence[str], batch_size: int = 64) -> np.ndarray:
+        rows: list[int] = []
+        cols: list[int] = []
+        for row, text in enumerate(texts):
+            for token in TOKEN_PATTERN.findall(text.lower()):
+                rows.append(row)
+                cols.append(self._bucket(token))
+
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        np.add.at(matrix, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), 1.0)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
 
 class SentenceTransformerEmbeddingProvider:
     """Real semantic embeddings using sentence-transformers (all-MiniLM-L6-v2)."""
@@ -46,6 +82,10 @@ class SentenceTransformerEmbeddingProvider:
         self._model = None
         self.dimension = 384
 
+    @property
+    def ready(self) -> bool:
+        return self._model is not None
+
     def _load_model(self):
         if self._model is None:
             from sentence_transformers import SentenceTransformer
@@ -54,32 +94,141 @@ class SentenceTransformerEmbeddingProvider:
             self.dimension = self._model.get_sentence_embedding_dimension()
         return self._model
 
-    @lru_cache(maxsize=512)
     def embed(self, text: str) -> tuple[float, ...]:
         model = self._load_model()
         vector = model.encode(text, normalize_embeddings=True)
         return tuple(float(v) for v in vector)
 
+    def embed_many(self, texts: Sequence[str], batch_size: int = 64) -> np.ndarray:
+        model = self._load_model()
+        matrix = model.encode(
+            list(texts),
+            batch_size=batch_size,
+            normalize_embeddings=True,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        return np.asarray(matrix, dtype=np.float32).reshape(len(texts), self.dimension)
+
+
+class OnnxEmbeddingProvider:
+    """all-MiniLM-L6-v2 exported to ONNX and run with onnxruntime on CPU.
+
+    Reproduces the sentence-transformers pipeline (WordPiece tokenizer, mean
+    pooling over the attention mask, L2 normalization), so vectors stay
+    compatible with the stored 384-dim embeddings. ``model_dir`` is the output
+    of ``scripts/export_onnx_embedder.py``: ``model.onnx``, optionally
+    ``model_quantized.onnx`` (dynamic int8), and ``tokenizer.json``.
+    """
+
+    MODEL_FILE = "model.onnx"
+    QUANTIZED_MODEL_FILE = "model_quantized.onnx"
+
+    def __init__(self, model_dir: str | Path, *, quantized: bool = False, max_length: int = 256, num_threads: int = 0):
+        self.model_dir = Path(model_dir)
+        self.quantized = quantized
+        self.max_length = max_length
+        self.num_threads = num_threads
+        self.dimension = 384
+        self._session = None
+        self._tokenizer = None
+        self._input_names: set[str] = set()
+
+    @property
+    def ready(self) -> bool:
+        return self._session is not None
 
-def create_embedding_provider(provider_type: str = "sentence_transformer", **kwargs) -> EmbeddingProvider:
-    """Factory function to create the configured embedding provider."""
-    if provider_type == "sentence_transformer":
-        try:
-            provider = SentenceTransformerEmbeddingProvider(
-                model_name=kwargs.get("model_name", "all-MiniLM-L6-v2"),
-            )
-            # Trigger model load to verify it works
-            provider._load_model()
-            return provider
-        except Exception as e:
-            logger.warning("Failed to load sentence-transformer (%s), falling back to hash embeddings", e)
-            return LocalHashEmbeddingProvider(dimension=kwargs.get("dimension", 64))
+    def _load_model(self):
+        if self._session is None:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+
+            model_file = self.model_dir / (self.QUANTIZED_MODEL_FILE if self.quantized else self.MODEL_FILE)
+            logger.info("Loading ONNX embedding model: %s", model_file)
+            tokenizer = Tokenizer.from_file(str(self.model_dir / "tokenizer.json"))
+            tokenizer.enable_truncation(max_length=self.max_length)
+            tokenizer.enable_padding()
+
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            if self.num_threads:
+                options.intra_op_num_threads = self.num_threads
+            session = ort.InferenceSession(str(model_file), sess_options=options, providers=["CPUExecutionProvider"])
+
+            self._input_names = {item.name for item in session.get_inputs()}
+            output_dim = session.get_outputs()[0].shape[-1]
+            if isinstance(output_dim, int):
+                self.dimension = output_dim
+            self._tokenizer = tokenizer
+            self._session = session
+        return self._session
+
+    def embed(self, text: str) -> tuple[float, ...]:
+        return tuple(float(v) for v in self.embed_many([text])[0])
+
+    def embed_many(self, texts: Sequence[str], batch_size: int = 64) -> np.ndarray:
+        session = self._load_model()
+        output = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            encodings = self._tokenizer.encode_batch(list(texts[start : start + batch_size]))
+            input_ids = np.asarray([enc.ids for enc in encodings], dtype=np.int64)
+            attention_mask = np.asarray([enc.attention_mask for enc in encodings], dtype=np.int64)
+            feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self._input_names:
+                feeds["token_type_ids"] = np.asarray([enc.type_ids for enc in encodings], dtype=np.int64)
+
+            hidden = session.run(None, feeds)[0]
+            mask = attention_mask[:, :, None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            output[start : start + len(encodings)] = pooled / norms
+        return output
+
+
+def create_embedding_provider(provider_type: str = "sentence_transformer", *, eager: bool = True, **kwargs) -> EmbeddingProvider:
+    """Factory function to create the configured embedding provider.
+
+    With ``eager=False`` the model is not loaded here; pass the provider to
+    ``load_embedding_provider`` later, e.g. from a background warmup thread.
+    """
+    if provider_type == "onnx":
+        provider = OnnxEmbeddingProvider(
+            model_dir=kwargs.get("onnx_model_dir", "models/all-MiniLM-L6-v2-onnx"),
+            quantized=kwargs.get("onnx_quantized", False),
+        )
+    elif provider_type == "sentence_transformer":
+        provider = SentenceTransformerEmbeddingProvider(
+            model_name=kwargs.get("model_name", "all-MiniLM-L6-v2"),
+        )
     else:
         return LocalHashEmbeddingProvider(dimension=kwargs.get("dimension", 64))
 
+    if not eager:
+        return provider
+    return load_embedding_provider(provider, fallback_dimension=kwargs.get("dimension", 64))
+
+
+def load_embedding_provider(provider: EmbeddingProvider, *, fallback_dimension: int = 64) -> EmbeddingProvider:
+    """Load the model behind ``provider``, falling back to hash embeddings if that fails."""
+    load_model = getattr(provider, "_load_model", None)
+    if load_model is None:
+        return provider
+    try:
+        load_model()
+        return provider
+    except Exception as e:
+        logger.warning("Failed to load %s (%s), falling back to hash embeddings", type(provider).__name__, e)
+        return LocalHashEmbeddingProvider(dimension=fallback_dimension)
+
+
+def tokenize_terms(text: str) -> list[str]:
+    """Split text into lowercased, NFC-normalized terms, keeping duplicates."""
+    return TOKEN_PATTERN.findall(unicodedata.normalize("NFC", text).lower())
+
 
 def tokenize(text: str) -> set[str]:
-    return set(TOKEN_PATTERN.findall(text.lower()))
+    return set(tokenize_terms(text))
 
 
 def keyword_score(query: str, fields: Iterable[str]) -> float:
@@ -0,0 +1,74 @@
+"""JSON response bodies serialized and compressed once, then served as stored bytes."""
+
+import gzip
+from dataclasses import dataclass
+
+from fastapi import Response
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip and identity are offered
+    brotli = None
+
+# Preference order when the client accepts several encodings equally.
+_PREFERRED = ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: str | None) -> str | None:
+    """Pick the best stored encoding the client accepts (``"br"``, ``"gzip"`` or None for identity)."""
+    if not accept_encoding:
+        return None
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    best: tuple[float, str] | None = None
+    for encoding in _PREFERRED:
+        quality = accepted.get(encoding, wildcard)
+        if quality > 0 and (best is None or quality > best[0]):
+            best = (quality, encoding)
+    return best[1] if best else None
+
+
+@dataclass(frozen=True)
+class EncodedPayload:
+    """One JSON body in identity, gzip and (when available) brotli form."""
+
+    identity: bytes
+    gzip: bytes
+    br: bytes | None = None
+
+    @classmethod
+    def from_json(cls, body: bytes) -> "EncodedPayload":
+        return cls(
+            identity=body,
+            gzip=gzip.compress(body, compresslevel=6, mtime=0),
+            br=brotli.compress(body, quality=9) if brotli is not None else None,
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.identity) + len(self.gzip) + len(self.br or b"")
+
+    def body(self, encoding: str | None) -> bytes:
+        if encoding == "br" and self.br is not None:
+            return self.br
+        if encoding == "gzip":
+            return self.gzip
+        return self.identity
+
+    def response(self, encoding: str | None, headers: dict[str, str]) -> Response:
+        headers = dict(headers)
+        if encoding is not None and (encoding != "br" or self.br is not None):
+            headers["Content-Encoding"] = encoding
+        return Response(content=self.body(encoding), media_type="application/json", headers=headers)
@@ -1,16 +1,15 @@
 ﻿import json
-import logging
 from collections.abc import Sequence
-from typing import Protocol
+from functools import lru_cache
+from typing import Any, Protocol
 
 import httpx
-from pydantic import ValidationError
 
 from ..models import Verse
 from ..schemas import GuidanceMode, GuidanceResponse, GuidanceVerse, LanguageCode
+from .http_client import PoolLimits, PooledAsyncClient
 from .language import language_instruction
-
-logger = logging.getLogger(__name__)
+from .prompts import GUIDANCE_SCHEMA_JSON, Prompt, guidance_suffix
 
 
 class GuidanceProvider(Protocol):
@@ -21,6 +20,18 @@ class GuidanceProvider(Protocol):
         mode: GuidanceMode,
         language: LanguageCode,
         verses: Sequence[Verse],
+        timeout: float | None = None,
+    ) -> GuidanceResponse:
+        ...
+
+    async def agenerate(
+        self,
+        *,
+        topic: str,
+        mode: GuidanceMode,
+        language: LanguageCode,
+        verses: Sequence[Verse],
+        timeout: float | None = None,
     ) -> GuidanceResponse:
         ...
 
@@ -62,7 +73,30 @@ def _mode_style_instruction(mode: GuidanceMode) -> str:
     )
 
 
+@lru_cache(maxsize=None)
+def _gemini_guidance_prefix(mode: GuidanceMode, language: LanguageCode) -> str:
+    return (
+        "You are a Bhagavad Gita guidance assistant. Use only the supplied verses. "
+        "Do not invent verse references. Return strict JSON only with this schema: "
+        f"{GUIDANCE_SCHEMA_JSON}\n\n"
+        f"{language_instruction(language)}\n"
+        f"{_mode_style_instruction(mode)}\n"
+        f"Mode: {mode}\n"
+    )
+
+
 class MockProvider:
+    async def agenerate(
+        self,
+        *,
+        topic: str,
+        mode: GuidanceMode,
+        language: LanguageCode,
+        verses: Sequence[Verse],
+        timeout: float | None = None,
+    ) -> GuidanceResponse:
+        return self.generate(topic=topic, mode=mode, language=language, verses=verses)
+
     def generate(
         self,
         *,
@@ -70,6 +104,7 @@ class MockProvider:
         mode: GuidanceMode,
         language: LanguageCode,
         verses: Sequence[Verse],
+        timeout: float | None = None,
     ) -> GuidanceResponse:
         verse_payload = _build_verse_payload(verses, mode)
 
@@ -208,10 +243,16 @@ class MockProvider:
 
 
 class GeminiProvider:
-    def __init__(self, api_key: str, model: str, fallback: GuidanceProvider):
+    def __init__(
+        self,
+        api_key: str,
+        model: str,
+        *,
+        limits: PoolLimits | None = None,
+    ):
         self.api_key = api_key
         self.model = model
-        self.fallback = fallback
+        self.http = PooledAsyncClient(timeout=30.0, limits=limits)
 
     def generate(
         self,
@@ -220,27 +261,55 @@ class GeminiProvider:
         mode: GuidanceMode,
         language: LanguageCode,
         verses: Sequence[Verse],
+        timeout: float | None = None,
+    ) -> GuidanceResponse:
+        prompt = self._build_prompt(topic=topic, mode=mode, language=language, verses=verses)
+        response = httpx.post(
+            **self._request(prompt),
+            timeout=self.http.request_timeout(timeout),
+        )
+        response.raise_for_status()
+        return self._parse(response.json())
+
+    async def agenerate(
+        self,
+        *,
+        topic: str,
+        mode: GuidanceMode,
+        language: LanguageCode,
+        verses: Sequence[Verse],
+        timeout: float | None = None,
     ) -> GuidanceResponse:
         prompt = self._build_prompt(topic=topic, mode=mode, language=language, verses=verses)
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}:generateContent"
+        response = await self.http.client.post(
+            **self._request(prompt),
+            timeout=self.http.request_timeout(timeout),
+        )
+        response.raise_for_status()
+        return self._parse(response.json())
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
 
-        payload = {
-            "contents": [{"parts": [{"text": prompt}]}],
-            "generationConfig": {
-                "temperature": 0.2,
-                "responseMimeType": "application/json",
+    def _request(self, prompt: Prompt) -> dict[str, Any]:
+        # A stable system instruction ahead of the contents is what Gemini's implicit caching reuses.
+        return {
+            "url": f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}:generateContent",
+            "params": {"key": self.api_key},
+            "json": {
+                "systemInstruction": {"parts": [{"text": prompt.prefix}]},
+                "contents": [{"parts": [{"text": prompt.suffix}]}],
+                "generationConfig": {
+                    "temperature": 0.2,
+                    "responseMimeType": "application/json",
+                },
             },
         }
 
-        try:
-            response = httpx.post(url, params={"key": self.api_key}, json=payload, timeout=30.0)
-            response.raise_for_status()
-            text = response.json()["candidates"][0]["content"]["parts"][0]["text"]
-            parsed = json.loads(extract_json(text))
-            return GuidanceResponse.model_validate(parsed)
-        except (httpx.HTTPError, KeyError, IndexError, json.JSONDecodeError, ValidationError) as exc:
-            logger.warning("Falling back to mock provider after Gemini failure: %s", exc)
-            return self.fallback.generate(topic=topic, mode=mode, language=language, verses=verses)
+    @staticmethod
+    def _parse(data: dict[str, Any]) -> GuidanceResponse:
+        text = data["candidates"][0]["content"]["parts"][0]["text"]
+        return GuidanceResponse.model_validate(json.loads(extract_json(text)))
 
     def _build_prompt(
         self,
@@ -249,53 +318,8 @@ class GeminiProvider:
         mode: GuidanceMode,
         language: LanguageCode,
         verses: Sequence[Verse],
-    ) -> str:
-        verse_text = []
-        for verse in verses[:3]:
-            verse_text.append(
-                {
-                    "verse_id": verse.id,
-                    "ref": verse.ref,
-                    "sanskrit": verse.sanskrit,
-                    "transliteration": verse.transliteration,
-                    "translation": verse.translation,
-                }
-            )
-
-        schema = {
-            "mode": "comfort|clarity|traditional",
-            "topic": "string",
-            "verses": [
-                {
-                    "verse_id": 47,
-                    "ref": "2.47",
-                    "sanskrit": "...",
-                    "transliteration": "...",
-                    "translation": "...",
-                    "why_this": "...",
-                }
-            ],
-            "guidance_short": "string",
-            "guidance_long": "string",
-            "micro_practice": {
-                "title": "string",
-                "steps": ["...", "..."],
-                "duration_minutes": 1,
-            },
-            "reflection_prompt": "string",
-            "safety": {"flagged": False, "message": None},
-        }
-
-        return (
-            "You are a Bhagavad Gita guidance assistant. Use only the supplied verses. "
-            "Do not invent verse references. Return strict JSON only with this schema: "
-            f"{json.dumps(schema)}\n\n"
-            f"{language_instruction(language)}\n"
-            f"{_mode_style_instruction(mode)}\n"
-            f"Mode: {mode}\n"
-            f"Topic: {topic}\n"
-            f"Available verses JSON: {json.dumps(verse_text, ensure_ascii=True)}"
-        )
+    ) -> Prompt:
+        return Prompt(_gemini_guidance_prefix(mode, language), guidance_suffix(topic, verses))
 
 
 def extract_json(text: str) -> str:
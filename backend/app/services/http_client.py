@@ -0,0 +1,117 @@
+"""Long-lived pooled ``httpx.AsyncClient`` instances for the LLM providers."""
+
+import asyncio
+import json
+import logging
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:  # optional: httpx needs the h2 package to negotiate HTTP/2
+    HTTP2_AVAILABLE = False
+
+
+@dataclass(frozen=True)
+class PoolLimits:
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry_seconds: float = 30.0
+    http2: bool = True
+
+
+class PooledAsyncClient:
+    """One ``AsyncClient`` per provider, created on first use and reused for every call.
+
+    Keeping the client alive keeps TLS sessions and keep-alive connections
+    (multiplexed streams with HTTP/2) warm between requests. httpx connections
+    belong to the event loop that opened them, so a call from a different loop
+    (tests, ``asyncio.run`` in scripts) gets a fresh client instead of reusing
+    one bound to a loop that may be gone; the old client is closed rather than
+    left holding its pool.
+    """
+
+    def __init__(
+        self,
+        *,
+        timeout: float,
+        limits: PoolLimits | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.timeout = timeout
+        self.limits = limits or PoolLimits()
+        self.transport = transport
+        self._client: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._closing: set[asyncio.Task] = set()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            if self._client is not None and not self._client.is_closed:
+                self._discard(self._client, self._loop, loop)
+            http2 = self.limits.http2 and HTTP2_AVAILABLE
+            if self.limits.http2 and not HTTP2_AVAILABLE:
+                logger.info("h2 is not installed; LLM provider clients use HTTP/1.1")
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=self.limits.max_connections,
+                    max_keepalive_connections=self.limits.max_keepalive_connections,
+                    keepalive_expiry=self.limits.keepalive_expiry_seconds,
+                ),
+                transport=self.transport,
+            )
+            self._loop = loop
+        return self._client
+
+    def _discard(
+        self, client: httpx.AsyncClient, old_loop: asyncio.AbstractEventLoop | None, loop: asyncio.AbstractEventLoop
+    ) -> None:
+        if old_loop is not None and old_loop.is_running():
+            # Still serving another thread: close the client on the loop that owns its connections.
+            asyncio.run_coroutine_threadsafe(client.aclose(), old_loop)
+            return
+        task = loop.create_task(_close_stale(client))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def request_timeout(self, budget: float | None) -> float:
+        """The client timeout, shortened to what is left of the request's deadline budget."""
+        if budget is None:
+            return self.timeout
+        return max(0.001, min(self.timeout, budget))
+
+    async def aclose(self) -> None:
+        client, self._client = self._client, None
+        if client is not None and self._loop is asyncio.get_running_loop():
+            await client.aclose()
+
+
+async def _close_stale(client: httpx.AsyncClient) -> None:
+    try:
+        await client.aclose()
+    except RuntimeError as exc:
+        # The owning loop is closed, so its transports cannot be shut down cleanly; the
+        # client is marked closed and its pool dropped, which releases the sockets.
+        logger.debug("Closed a pooled client whose event loop is gone: %s", exc)
+
+
+async def aiter_sse_json(response: httpx.Response) -> AsyncIterator[dict[str, Any]]:
+    """Decode the ``data:`` lines of a server-sent event stream as JSON (OpenAI, Anthropic, Gemini)."""
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if not data or data == "[DONE]":
+            continue
+        yield json.loads(data)
@@ -0,0 +1,82 @@
+"""Precomputed BM25 inverted index over verse text."""
+
+import heapq
+import logging
+import math
+from collections import Counter
+from collections.abc import Sequence
+
+from ..models import Verse
+from .embeddings import tokenize_terms
+
+logger = logging.getLogger(__name__)
+
+
+def verse_document(verse: Verse) -> str:
+    """Text indexed for lexical search: translations, transliteration and tags."""
+    return ' '.join(
+        [
+            verse.translation or '',
+            verse.transliteration or '',
+            verse.translation_hi or '',
+            ' '.join(verse.tags or []),
+        ]
+    )
+
+
+class BM25Index:
+    """Okapi BM25 postings lists built once per dataset version.
+
+    Each posting stores the verse position and its precomputed BM25 weight for
+    that term, so a query is a sum over the postings of its terms and never
+    touches the ORM or re-tokenizes verse text.
+    """
+
+    def __init__(self, *, k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._snapshot: tuple[dict[str, list[tuple[int, float]]], list[Verse]] = ({}, [])
+
+    @property
+    def size(self) -> int:
+        return len(self._snapshot[1])
+
+    @property
+    def vocabulary_size(self) -> int:
+        return len(self._snapshot[0])
+
+    def build(self, verses: Sequence[Verse]) -> None:
+        docs = [Counter(tokenize_terms(verse_document(verse))) for verse in verses]
+        doc_lengths = [sum(terms.values()) for terms in docs]
+        total = len(docs)
+        avg_length = (sum(doc_lengths) / total) if total else 0.0
+
+        doc_freq: Counter[str] = Counter()
+        for terms in docs:
+            doc_freq.update(terms.keys())
+
+        postings: dict[str, list[tuple[int, float]]] = {}
+        for position, terms in enumerate(docs):
+            length_norm = self.k1 * (1.0 - self.b + self.b * doc_lengths[position] / avg_length) if avg_length else self.k1
+            for term, tf in terms.items():
+                idf = math.log(1.0 + (total - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+                weight = idf * tf * (self.k1 + 1.0) / (tf + length_norm)
+                postings.setdefault(term, []).append((position, weight))
+
+        self._snapshot = (postings, list(verses))
+        logger.info('lexical_index_built', extra={'rows': total, 'terms': len(postings)})
+
+    def search(self, query: str, top_k: int) -> list[Verse]:
+        postings, verses = self._snapshot
+        if not verses or top_k <= 0:
+            return []
+
+        scores: dict[int, float] = {}
+        for term in set(tokenize_terms(query)):
+            for position, weight in postings.get(term, ()):
+                scores[position] = scores.get(position, 0.0) + weight
+        if not scores:
+            return []
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [verses[position] for position, _score in best]
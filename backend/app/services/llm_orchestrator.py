@@ -1,60 +1,225 @@
 ﻿"""LLM Orchestrator: routes queries, handles failover, logs decisions."""
 
+import asyncio
 import json
 import logging
+import threading
 import time
-from collections.abc import Sequence
+from collections import deque
+from collections.abc import AsyncIterator, Sequence
+from contextlib import aclosing
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
 from ..models import Verse
 from ..schemas import ChatResponse, ChatTurn, GuidanceMode, GuidanceResponse, LanguageCode
+from .admission import ConcurrencyLimiter, ProviderOverloaded
+from .deadline import Deadline
+from .guidance import extract_json
+from .log_writer import BatchedLogWriter
+from .reply_stream import ReplyStreamParser
 from .router import ModelChoice, route_query
 
 logger = logging.getLogger(__name__)
 
 # ---------------------------------------------------------------------------
-# Routing log: append-only JSON-lines file
+# Routing log: JSON-lines file written in batches by a background thread
 # ---------------------------------------------------------------------------
 LOG_DIR = Path(__file__).resolve().parents[3] / 'logs'
 ROUTING_LOG = LOG_DIR / 'routing.log'
 
-
-def _ensure_log_dir() -> None:
-    LOG_DIR.mkdir(parents=True, exist_ok=True)
+routing_log_writer = BatchedLogWriter(ROUTING_LOG)
 
 
 def _log_routing(entry: dict[str, Any]) -> None:
-    try:
-        _ensure_log_dir()
-        with ROUTING_LOG.open('a', encoding='utf-8') as fh:
-            fh.write(json.dumps(entry, ensure_ascii=True) + '\n')
-    except OSError as exc:
-        logger.warning('Could not write routing log: %s', exc)
+    # Never blocks: under backpressure the entry is dropped and counted in routing_log_writer.stats().
+    routing_log_writer.write(entry)
+
+
+async def _agenerate(provider: Any, **kwargs: Any) -> Any:
+    agenerate = getattr(provider, 'agenerate', None)
+    if agenerate is not None:
+        return await agenerate(**kwargs)
+    return await asyncio.to_thread(provider.generate, **kwargs)
+
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    """When to send a backup request to the next provider while the first is still running.
+
+    The hedge fires once the primary has been silent for its rolling
+    ``percentile`` latency (per provider and endpoint, over the last
+    ``window`` successful calls), or for ``delay_ms`` until ``min_samples``
+    calls have been seen or when ``percentile`` is 0.
+    """
+
+    delay_ms: float = 4000.0
+    percentile: float = 95.0
+    min_samples: int = 20
+    window: int = 200
+
+
+@dataclass(frozen=True)
+class BreakerPolicy:
+    """Open a provider's circuit after ``failure_threshold`` failures within ``window_seconds``.
+
+    While open the provider is skipped. After ``cooldown_seconds`` one
+    half-open probe request is let through: success closes the circuit,
+    failure re-opens it for another cool-down.
+    """
+
+    failure_threshold: int = 5
+    window_seconds: float = 60.0
+    cooldown_seconds: float = 30.0
+
+
+@dataclass(frozen=True)
+class ConcurrencyPolicy:
+    """Cap concurrent calls per provider; ``max_in_flight`` maps provider name to its limit.
+
+    Providers not listed (and the offline mock) are unlimited. Callers beyond
+    the limit wait in a FIFO queue of at most ``max_queue`` for up to
+    ``max_wait_seconds``; past that the provider counts as overloaded and the
+    next one is tried. If no external provider admitted the request,
+    ``ProviderOverloaded`` is raised rather than answering from the mock.
+    """
+
+    max_in_flight: dict[str, int] = field(default_factory=dict)
+    max_queue: int = 32
+    max_wait_seconds: float = 5.0
+
+
+@dataclass(frozen=True)
+class AdaptivePolicy:
+    """Order providers by an EWMA of latency and error rate, per provider and endpoint type.
+
+    A provider's score is its smoothed latency plus ``error_rate *
+    error_penalty_ms``; lower is better. Providers with fewer than
+    ``min_samples`` outcomes keep their configured place. Fallbacks are always
+    ranked by score. With ``reorder_primary`` the routed primary also gives
+    way to a peer from its quality tier once its score is ``switch_ratio``
+    times worse, so traffic drains from a degraded provider well before its
+    circuit opens.
+    """
+
+    alpha: float = 0.2
+    error_penalty_ms: float = 10000.0
+    min_samples: int = 5
+    reorder_primary: bool = False
+    quality_tiers: tuple[tuple[str, ...], ...] = (('claude', 'codex', 'gemini'),)
+    switch_ratio: float = 1.5
+
+
+class _ProviderScore:
+    """Exponentially weighted latency and error rate of one provider on one endpoint type."""
+
+    def __init__(self, alpha: float) -> None:
+        self.alpha = alpha
+        self.latency_ms: float | None = None
+        self.error_rate = 0.0
+        self.samples = 0
+
+    def observe(self, latency_ms: float, ok: bool) -> None:
+        # Failures count towards latency too: a provider timing out is as slow as the timeout.
+        if self.latency_ms is None:
+            self.latency_ms = latency_ms
+        else:
+            self.latency_ms += self.alpha * (latency_ms - self.latency_ms)
+        self.error_rate += self.alpha * ((0.0 if ok else 1.0) - self.error_rate)
+        self.samples += 1
+
+    def score(self, error_penalty_ms: float) -> float:
+        return (self.latency_ms or 0.0) + self.error_rate * error_penalty_ms
 
 
 class _ProviderHealth:
-    def __init__(self) -> None:
-        self.healthy: bool = True
+    """Per-provider circuit breaker (closed -> open -> half_open -> closed)."""
+
+    def __init__(self, name: str, policy: BreakerPolicy | None = None) -> None:
+        self.name = name
+        self.policy = policy or BreakerPolicy()
+        self.state: str = 'closed'
         self.last_error: str | None = None
         self.last_checked: float = 0.0
+        self.transitions: dict[str, int] = {'opened': 0, 'half_opened': 0, 'closed': 0}
+        self._failures: deque[float] = deque()
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def healthy(self) -> bool:
+        return self.state != 'open'
+
+    def available(self) -> bool:
+        """Whether a request could be sent now (does not claim the half-open probe)."""
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open':
+                return time.monotonic() - self._opened_at >= self.policy.cooldown_seconds
+            return not self._probe_in_flight
+
+    def allow_request(self) -> bool:
+        """Claim the right to call the provider; in half-open state only one caller gets it."""
+        with self._lock:
+            if self.state == 'open':
+                if time.monotonic() - self._opened_at < self.policy.cooldown_seconds:
+                    return False
+                self._transition('half_open')
+            if self.state == 'half_open':
+                if self._probe_in_flight:
+                    return False
+                self._probe_in_flight = True
+            return True
+
+    def release(self) -> None:
+        """The claimed call was abandoned (e.g. cancelled hedge) without an outcome."""
+        with self._lock:
+            self._probe_in_flight = False
 
     def mark_ok(self) -> None:
-        self.healthy = True
-        self.last_error = None
-        self.last_checked = time.time()
+        with self._lock:
+            self.last_error = None
+            self.last_checked = time.time()
+            self._probe_in_flight = False
+            self._failures.clear()
+            if self.state != 'closed':
+                self._transition('closed')
 
     def mark_failed(self, reason: str) -> None:
-        self.healthy = False
-        self.last_error = reason
-        self.last_checked = time.time()
+        with self._lock:
+            self.last_error = reason
+            self.last_checked = time.time()
+            self._probe_in_flight = False
+            now = time.monotonic()
+            self._failures.append(now)
+            while self._failures and now - self._failures[0] > self.policy.window_seconds:
+                self._failures.popleft()
+            if self.state == 'half_open' or (
+                self.state == 'closed' and len(self._failures) >= self.policy.failure_threshold
+            ):
+                self._opened_at = now
+                self._transition('open')
+
+    def _transition(self, state: str) -> None:
+        self.state = state
+        self.transitions[{'open': 'opened', 'half_open': 'half_opened', 'closed': 'closed'}[state]] += 1
+        logger.info('circuit_breaker provider=%s state=%s last_error=%s', self.name, state, self.last_error)
 
     def to_dict(self) -> dict[str, Any]:
-        return {
-            'healthy': self.healthy,
-            'last_error': self.last_error,
-            'last_checked_epoch': self.last_checked,
-        }
+        with self._lock:
+            retry_in = self.policy.cooldown_seconds - (time.monotonic() - self._opened_at)
+            return {
+                'healthy': self.state != 'open',
+                'state': self.state,
+                'last_error': self.last_error,
+                'last_checked_epoch': self.last_checked,
+                'recent_failures': len(self._failures),
+                'retry_in_seconds': round(retry_in, 1) if self.state == 'open' and retry_in > 0 else 0.0,
+                'transitions': dict(self.transitions),
+            }
 
 
 class LLMOrchestrator:
@@ -63,6 +228,11 @@ class LLMOrchestrator:
     Provider maps:
         guidance_providers  - {model_name: provider} for /ask and /moods/guidance
         chat_providers      - {model_name: provider} for /chat
+
+    ``generate_*`` block the calling thread (background warmer, morning
+    greeting); ``agenerate_*`` await each provider's pooled async client and
+    are what the async endpoints use. Providers without ``agenerate`` run
+    their blocking ``generate`` in a worker thread.
     """
 
     def __init__(
@@ -70,17 +240,67 @@ class LLMOrchestrator:
         guidance_providers: dict[str, Any],
         chat_providers: dict[str, Any],
         default_llm: ModelChoice = 'claude',
+        hedge: HedgePolicy | None = None,
+        breaker: BreakerPolicy | None = None,
+        concurrency: ConcurrencyPolicy | None = None,
+        adaptive: AdaptivePolicy | None = None,
     ):
         self.guidance_providers = guidance_providers
         self.chat_providers = chat_providers
         self.default_llm: ModelChoice = default_llm
+        self.hedge = hedge
+        self.adaptive = adaptive
         self._health: dict[str, _ProviderHealth] = {}
         for name in set(list(guidance_providers) + list(chat_providers)):
-            self._health[name] = _ProviderHealth()
+            self._health[name] = _ProviderHealth(name, breaker)
+        concurrency = concurrency or ConcurrencyPolicy()
+        self._limiters: dict[str, ConcurrencyLimiter] = {
+            name: ConcurrencyLimiter(
+                name,
+                max_in_flight=limit,
+                max_queue=concurrency.max_queue,
+                max_wait_seconds=concurrency.max_wait_seconds,
+            )
+            for name, limit in concurrency.max_in_flight.items()
+            if name in self._health and name != 'mock' and limit > 0
+        }
+        # Recent successful call durations per (endpoint, provider); feeds the hedge delay.
+        self._latencies: dict[tuple[str, str], deque[float]] = {}
+        self._latency_window = hedge.window if hedge is not None else 200
+        # EWMA scores per (endpoint, provider); with an adaptive policy they order the failover.
+        self._scores: dict[tuple[str, str], _ProviderScore] = {}
+        self._scores_lock = threading.Lock()
+        self._hedges = {
+            'fired': 0,
+            'hedge_won': 0,
+            'primary_won': 0,
+            'both_failed': 0,
+            'extra_calls': 0,
+            'loser_ms': 0.0,
+        }
 
     def model_status(self) -> dict[str, Any]:
         return {name: health.to_dict() for name, health in self._health.items()}
 
+    def hedge_stats(self) -> dict[str, Any]:
+        return {'enabled': self.hedge is not None, **self._hedges}
+
+    def concurrency_stats(self) -> dict[str, Any]:
+        return {name: limiter.stats() for name, limiter in self._limiters.items()}
+
+    def routing_scores(self) -> dict[str, Any]:
+        policy = self.adaptive or AdaptivePolicy()
+        stats: dict[str, Any] = {'adaptive': self.adaptive is not None, 'endpoints': {}}
+        with self._scores_lock:
+            for (endpoint, model_name), score in sorted(self._scores.items()):
+                stats['endpoints'].setdefault(endpoint, {})[model_name] = {
+                    'latency_ms': round(score.latency_ms or 0.0, 1),
+                    'error_rate': round(score.error_rate, 3),
+                    'samples': score.samples,
+                    'score': round(score.score(policy.error_penalty_ms), 1),
+                }
+        return stats
+
     def generate_guidance(
         self,
         *,
@@ -88,30 +308,99 @@ class LLMOrchestrator:
         mode: GuidanceMode,
         language: LanguageCode,
         verses: Sequence[Verse],
+        deadline: Deadline | None = None,
     ) -> tuple[GuidanceResponse, str]:
-        chosen = route_query(topic, default=self.default_llm)
-        order = self._failover_order(chosen, list(self.guidance_providers))
+        return self._generate_with_failover(
+            'guidance',
+            topic,
+            self.guidance_providers,
+            {'topic': topic, 'mode': mode, 'language': language, 'verses': verses},
+            deadline,
+        )
+
+    def generate_chat(
+        self,
+        *,
+        message: str,
+        mode: GuidanceMode,
+        language: LanguageCode,
+        history: Sequence[ChatTurn],
+        verses: Sequence[Verse],
+        deadline: Deadline | None = None,
+    ) -> tuple[ChatResponse, str]:
+        return self._generate_with_failover(
+            'chat',
+            message,
+            self.chat_providers,
+            {'message': message, 'mode': mode, 'language': language, 'history': history, 'verses': verses},
+            deadline,
+        )
+
+    def _generate_with_failover(
+        self,
+        endpoint: str,
+        query: str,
+        providers: dict[str, Any],
+        kwargs: dict[str, Any],
+        deadline: Deadline | None = None,
+    ) -> tuple[Any, str]:
+        chosen = route_query(query, default=self.default_llm)
+        order = self._failover_order(endpoint, chosen, list(providers))
 
         start = time.perf_counter()
+        overloaded: ProviderOverloaded | None = None
+        attempted = False
         for model_name in order:
-            provider = self.guidance_providers.get(model_name)
-            if provider is None:
+            provider = providers.get(model_name)
+            if provider is None or self._out_of_time(model_name, deadline):
                 continue
+            if model_name == 'mock' and overloaded is not None and not attempted:
+                raise self._reject(endpoint, query, chosen, start, overloaded)
             try:
-                result = provider.generate(topic=topic, mode=mode, language=language, verses=verses)
+                limiter = self._limiters.get(model_name)
+                if limiter is not None:
+                    limiter.acquire(self._budget(model_name, deadline))
+            except ProviderOverloaded as exc:
+                overloaded = exc
+                continue
+            try:
+                if not self._health[model_name].allow_request():
+                    continue
+                attempted = True
+                attempt_start = time.perf_counter()
+                result = provider.generate(**kwargs, timeout=self._budget(model_name, deadline))
                 elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
                 self._health[model_name].mark_ok()
-                self._log('guidance', topic, model_name, chosen, elapsed_ms, success=True)
+                self._observe(endpoint, model_name, attempt_start, ok=True)
+                self._log(endpoint, query, model_name, chosen, elapsed_ms, success=True)
                 return result, model_name
             except Exception as exc:
-                self._health[model_name].mark_failed(str(exc))
-                logger.warning('Orchestrator: %s guidance failed - %s', model_name, exc)
+                self._record_failure(model_name, endpoint, exc, deadline, attempt_start)
+            finally:
+                self._leave(model_name)
 
         elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
-        self._log('guidance', topic, 'mock', chosen, elapsed_ms, success=False)
-        raise RuntimeError('All guidance providers failed')
+        self._log(endpoint, query, 'mock', chosen, elapsed_ms, success=False)
+        raise RuntimeError(f'All {endpoint} providers failed')
 
-    def generate_chat(
+    async def agenerate_guidance(
+        self,
+        *,
+        topic: str,
+        mode: GuidanceMode,
+        language: LanguageCode,
+        verses: Sequence[Verse],
+        deadline: Deadline | None = None,
+    ) -> tuple[GuidanceResponse, str]:
+        return await self._agenerate_with_failover(
+            'guidance',
+            topic,
+            self.guidance_providers,
+            {'topic': topic, 'mode': mode, 'language': language, 'verses': verses},
+            deadline,
+        )
+
+    async def agenerate_chat(
         self,
         *,
         message: str,
@@ -119,42 +408,394 @@ class LLMOrchestrator:
         language: LanguageCode,
         history: Sequence[ChatTurn],
         verses: Sequence[Verse],
+        deadline: Deadline | None = None,
     ) -> tuple[ChatResponse, str]:
+        return await self._agenerate_with_failover(
+            'chat',
+            message,
+            self.chat_providers,
+            {'message': message, 'mode': mode, 'language': language, 'history': history, 'verses': verses},
+            deadline,
+        )
+
+    async def _agenerate_with_failover(
+        self,
+        endpoint: str,
+        query: str,
+        providers: dict[str, Any],
+        kwargs: dict[str, Any],
+        deadline: Deadline | None = None,
+    ) -> tuple[Any, str]:
+        """Try providers in failover order; with a hedge policy, overlap a slow one with the next.
+
+        Only external providers are hedged: the mock answers instantly and
+        would always win, so it stays the sequential last resort.
+        """
+        chosen = route_query(query, default=self.default_llm)
+        order = [name for name in self._failover_order(endpoint, chosen, list(providers)) if name in providers]
+
+        start = time.perf_counter()
+        running: dict[asyncio.Task[Any], str] = {}
+        started: set[str] = set()
+        launched: dict[str, float] = {}
+        ended: dict[str, float] = {}
+        overloaded: ProviderOverloaded | None = None
+        attempted = False
+        try:
+            while order:
+                primary = order.pop(0)
+                if self._out_of_time(primary, deadline):
+                    continue
+                if primary == 'mock' and overloaded is not None and not attempted:
+                    raise self._reject(endpoint, query, chosen, start, overloaded)
+                try:
+                    await self._aadmit(primary, deadline)
+                except ProviderOverloaded as exc:
+                    overloaded = exc
+                    continue
+                if not self._health[primary].allow_request():
+                    self._leave(primary)
+                    continue
+                attempted = True
+                launched[primary] = time.perf_counter()
+                running[self._launch(endpoint, primary, providers[primary], kwargs, deadline, started)] = primary
+                backup = next((name for name in order if name != 'mock'), None) if self.hedge is not None else None
+                hedged_to: str | None = None
+                if backup is not None and primary != 'mock':
+                    done, _pending = await asyncio.wait(running, timeout=self._hedge_delay(endpoint, primary))
+                    # The backup only takes a free slot: queueing for it would defeat the hedge.
+                    if not done and self._claim_free_slot(backup, deadline):
+                        order.remove(backup)
+                        hedged_to = backup
+                        launched[backup] = time.perf_counter()
+                        running[self._launch(endpoint, backup, providers[backup], kwargs, deadline, started)] = backup
+
+                while running:
+                    done, _pending = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        model_name = running.pop(task)
+                        ended[model_name] = time.perf_counter()
+                        if task.exception() is not None:
+                            continue
+                        elapsed_ms = round((ended[model_name] - start) * 1000, 2)
+                        loser_ms = None
+                        if hedged_to is not None:
+                            loser = primary if model_name == hedged_to else hedged_to
+                            loser_ms = round((ended.get(loser, ended[model_name]) - launched[loser]) * 1000, 2)
+                        hedge = self._record_hedge(
+                            primary, hedged_to, model_name, cancelled=bool(running), loser_ms=loser_ms
+                        )
+                        self._log(endpoint, query, model_name, chosen, elapsed_ms, success=True, **hedge)
+                        return task.result(), model_name
+                if hedged_to is not None:
+                    self._record_hedge(primary, hedged_to, None, cancelled=False)
+        finally:
+            # The loser of a hedge (or every attempt, if the caller was cancelled) is abandoned here.
+            self._abandon(running, started)
+
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+        self._log(endpoint, query, 'mock', chosen, elapsed_ms, success=False)
+        raise RuntimeError(f'All {endpoint} providers failed')
+
+    def _launch(
+        self,
+        endpoint: str,
+        model_name: str,
+        provider: Any,
+        kwargs: dict[str, Any],
+        deadline: Deadline | None,
+        started: set[str],
+    ) -> asyncio.Task[Any]:
+        """Run an admitted attempt (limiter slot and breaker permit already held) as a task."""
+        return asyncio.ensure_future(self._attempt(endpoint, model_name, provider, kwargs, deadline, started))
+
+    def _abandon(self, running: dict[asyncio.Task[Any], str], started: set[str]) -> None:
+        for task, model_name in running.items():
+            task.cancel()
+            if model_name not in started:
+                # Cancelled before its first step: the coroutine never runs, nor does _attempt's cleanup.
+                self._health[model_name].release()
+                self._leave(model_name)
+
+    async def _attempt(
+        self,
+        endpoint: str,
+        model_name: str,
+        provider: Any,
+        kwargs: dict[str, Any],
+        deadline: Deadline | None,
+        started: set[str],
+    ) -> Any:
+        started.add(model_name)
+        start = time.perf_counter()
+        try:
+            budget = self._budget(model_name, deadline)
+            if budget is None:
+                result = await _agenerate(provider, **kwargs)
+            else:
+                # The provider's HTTP timeout is shortened too, but wait_for is the hard ceiling.
+                result = await asyncio.wait_for(_agenerate(provider, **kwargs, timeout=budget), budget)
+        except asyncio.CancelledError:
+            self._health[model_name].release()
+            raise
+        except Exception as exc:
+            self._record_failure(model_name, endpoint, exc, deadline, start)
+            raise
+        finally:
+            self._leave(model_name)
+        self._health[model_name].mark_ok()
+        self._observe(endpoint, model_name, start, ok=True)
+        self._record_latency(endpoint, model_name, time.perf_counter() - start)
+        return result
+
+    async def _aadmit(self, model_name: str, deadline: Deadline | None) -> None:
+        limiter = self._limiters.get(model_name)
+        if limiter is not None:
+            await limiter.aacquire(self._budget(model_name, deadline))
+
+    def _claim_free_slot(self, model_name: str, deadline: Deadline | None) -> bool:
+        if self._out_of_time(model_name, deadline):
+            return False
+        limiter = self._limiters.get(model_name)
+        if limiter is not None and not limiter.try_acquire():
+            return False
+        if not self._health[model_name].allow_request():
+            self._leave(model_name)
+            return False
+        return True
+
+    def _leave(self, model_name: str) -> None:
+        limiter = self._limiters.get(model_name)
+        if limiter is not None:
+            limiter.release()
+
+    def _reject(
+        self,
+        endpoint: str,
+        query: str,
+        chosen: str,
+        start: float,
+        exc: ProviderOverloaded,
+    ) -> ProviderOverloaded:
+        # Every external provider was saturated; a canned mock answer would hide that from the client.
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
+        self._log(endpoint, query, 'none', chosen, elapsed_ms, success=False, overloaded=exc.provider)
+        logger.warning('Orchestrator: %s rejected - %s', endpoint, exc)
+        return exc
+
+    @staticmethod
+    def _out_of_time(model_name: str, deadline: Deadline | None) -> bool:
+        # Once the budget is spent only the instant offline mock is still worth trying.
+        return deadline is not None and deadline.expired and model_name != 'mock'
+
+    @staticmethod
+    def _budget(model_name: str, deadline: Deadline | None) -> float | None:
+        """Seconds left for a provider call, or ``None`` for no limit (no deadline, or the local mock)."""
+        if deadline is None or model_name == 'mock':
+            return None
+        return deadline.remaining()
+
+    def _record_failure(
+        self,
+        model_name: str,
+        endpoint: str,
+        exc: Exception,
+        deadline: Deadline | None,
+        started: float,
+    ) -> None:
+        if deadline is not None and deadline.expired:
+            # Cut short by this request's budget, which says little about the provider's health.
+            self._health[model_name].release()
+            logger.warning('Orchestrator: %s %s stopped at the request deadline - %r', model_name, endpoint, exc)
+            return
+        self._health[model_name].mark_failed(str(exc))
+        self._observe(endpoint, model_name, started, ok=False)
+        logger.warning('Orchestrator: %s %s failed - %s', model_name, endpoint, exc)
+
+    def _observe(self, endpoint: str, model_name: str, started: float, *, ok: bool) -> None:
+        latency_ms = (time.perf_counter() - started) * 1000
+        with self._scores_lock:
+            score = self._scores.get((endpoint, model_name))
+            if score is None:
+                score = self._scores[(endpoint, model_name)] = _ProviderScore((self.adaptive or AdaptivePolicy()).alpha)
+            score.observe(latency_ms, ok)
+
+    def _record_latency(self, endpoint: str, model_name: str, seconds: float) -> None:
+        samples = self._latencies.get((endpoint, model_name))
+        if samples is None:
+            samples = self._latencies[(endpoint, model_name)] = deque(maxlen=self._latency_window)
+        samples.append(seconds)
+
+    def _hedge_delay(self, endpoint: str, model_name: str) -> float:
+        policy = self.hedge or HedgePolicy()
+        samples = self._latencies.get((endpoint, model_name))
+        if policy.percentile <= 0 or samples is None or len(samples) < policy.min_samples:
+            return policy.delay_ms / 1000
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * policy.percentile / 100))]
+
+    def _record_hedge(
+        self,
+        primary: str,
+        hedged_to: str | None,
+        winner: str | None,
+        *,
+        cancelled: bool,
+        loser_ms: float | None = None,
+    ) -> dict[str, Any]:
+        if hedged_to is None:
+            return {}
+        # Both requests were sent, so the upstream bills for both even though one answer is discarded.
+        self._hedges['fired'] += 1
+        self._hedges['extra_calls'] += 1
+        if loser_ms is not None:
+            self._hedges['loser_ms'] = round(self._hedges['loser_ms'] + loser_ms, 2)
+        if winner is None:
+            self._hedges['both_failed'] += 1
+        elif winner == hedged_to:
+            self._hedges['hedge_won'] += 1
+        else:
+            self._hedges['primary_won'] += 1
+        return {
+            'hedged_to': hedged_to,
+            'hedge_won': winner == hedged_to,
+            # How long the discarded request ran: what the hedge cost upstream.
+            'hedge_loser_ms': loser_ms,
+            'hedge_loser_cancelled': cancelled,
+        }
+
+    async def astream_chat(
+        self,
+        *,
+        message: str,
+        mode: GuidanceMode,
+        language: LanguageCode,
+        history: Sequence[ChatTurn],
+        verses: Sequence[Verse],
+        deadline: Deadline | None = None,
+    ) -> AsyncIterator[tuple[str, Any]]:
+        """Stream a chat answer as ``('token', text)`` events, then ``('done', (response, model_name))``.
+
+        Tokens are the decoded ``reply`` field as the provider streams its JSON
+        (``astream``); providers without ``astream`` answer in one piece. A
+        provider that fails falls over to the next one exactly like
+        ``agenerate_chat``. If tokens were already sent, the replacement answer
+        arrives only in ``done``, whose reply supersedes the streamed text.
+        """
         chosen = route_query(message, default=self.default_llm)
-        order = self._failover_order(chosen, list(self.chat_providers))
+        order = self._failover_order('chat_stream', chosen, list(self.chat_providers))
+        kwargs = {'message': message, 'mode': mode, 'language': language, 'history': history, 'verses': verses}
 
         start = time.perf_counter()
+        streamed_tokens = False
+        overloaded: ProviderOverloaded | None = None
+        attempted = False
         for model_name in order:
             provider = self.chat_providers.get(model_name)
-            if provider is None:
+            if provider is None or self._out_of_time(model_name, deadline):
                 continue
+            if model_name == 'mock' and overloaded is not None and not attempted:
+                raise self._reject('chat_stream', message, chosen, start, overloaded)
             try:
-                result = provider.generate(
-                    message=message,
-                    mode=mode,
-                    language=language,
-                    history=history,
-                    verses=verses,
-                )
+                await self._aadmit(model_name, deadline)
+            except ProviderOverloaded as exc:
+                overloaded = exc
+                continue
+            if not self._health[model_name].allow_request():
+                self._leave(model_name)
+                continue
+            attempted = True
+            attempt_start = time.perf_counter()
+            budget = self._budget(model_name, deadline)
+            call_kwargs = kwargs if budget is None else {**kwargs, 'timeout': budget}
+            # After a provider failed mid-answer, the client already shows partial text;
+            # the fallback's answer is then only delivered in 'done'.
+            send_tokens = not streamed_tokens
+            try:
+                if hasattr(provider, 'astream'):
+                    parser = ReplyStreamParser()
+                    deltas = provider.astream(**call_kwargs)
+                    async with aclosing(deltas):
+                        while True:
+                            # Only the wait for the provider is bounded, never the yield to the client.
+                            async with asyncio.timeout(self._budget(model_name, deadline)):
+                                try:
+                                    delta = await anext(deltas)
+                                except StopAsyncIteration:
+                                    break
+                            token = parser.feed(delta)
+                            if token and send_tokens:
+                                if not streamed_tokens:
+                                    first_token_ms = round((time.perf_counter() - start) * 1000, 2)
+                                    logger.info('chat_stream_first_token model=%s ms=%s', model_name, first_token_ms)
+                                streamed_tokens = True
+                                yield 'token', token
+                    result = ChatResponse.model_validate(json.loads(extract_json(parser.text)))
+                else:
+                    async with asyncio.timeout(budget):
+                        result = await _agenerate(provider, **call_kwargs)
+                    if send_tokens:
+                        yield 'token', result.reply
                 elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
                 self._health[model_name].mark_ok()
-                self._log('chat', message, model_name, chosen, elapsed_ms, success=True)
-                return result, model_name
+                self._observe('chat_stream', model_name, attempt_start, ok=True)
+                self._log('chat_stream', message, model_name, chosen, elapsed_ms, success=True)
+                yield 'done', (result, model_name)
+                return
+            except (asyncio.CancelledError, GeneratorExit):
+                # The client went away mid-stream; that says nothing about the provider.
+                self._health[model_name].release()
+                raise
             except Exception as exc:
-                self._health[model_name].mark_failed(str(exc))
-                logger.warning('Orchestrator: %s chat failed - %s', model_name, exc)
+                self._record_failure(model_name, 'chat_stream', exc, deadline, attempt_start)
+            finally:
+                self._leave(model_name)
 
         elapsed_ms = round((time.perf_counter() - start) * 1000, 2)
-        self._log('chat', message, 'mock', chosen, elapsed_ms, success=False)
+        self._log('chat_stream', message, 'mock', chosen, elapsed_ms, success=False)
         raise RuntimeError('All chat providers failed')
 
-    @staticmethod
-    def _failover_order(primary: str, available: list[str]) -> list[str]:
+    async def aclose(self) -> None:
+        """Close every provider's pooled HTTP client (call on shutdown)."""
+        providers = {id(p): p for p in [*self.guidance_providers.values(), *self.chat_providers.values()]}
+        for provider in providers.values():
+            aclose = getattr(provider, 'aclose', None)
+            if aclose is not None:
+                await aclose()
+
+    def _failover_order(self, endpoint: str, primary: str, available: list[str]) -> list[str]:
         order = [primary]
         for name in available:
-            if name != primary:
+            if name != primary and name != 'mock':
                 order.append(name)
-        return order
+        if self.adaptive is not None:
+            order = self._rank(endpoint, order)
+        if 'mock' in available and primary != 'mock':
+            # The offline mock always answers, so it only makes sense as the last resort.
+            order.append('mock')
+        # Open circuits are skipped outright instead of waiting out a dead provider's timeout.
+        return [name for name in order if name not in self._health or self._health[name].available()]
+
+    def _rank(self, endpoint: str, order: list[str]) -> list[str]:
+        policy = self.adaptive or AdaptivePolicy()
+        with self._scores_lock:
+            scores = {
+                name: score.score(policy.error_penalty_ms)
+                for name in order
+                if (score := self._scores.get((endpoint, name))) is not None and score.samples >= policy.min_samples
+            }
+        primary, fallbacks = order[0], order[1:]
+        if policy.reorder_primary and primary in scores:
+            tier = next((tier for tier in policy.quality_tiers if primary in tier), ())
+            peers = [name for name in fallbacks if name in tier and name in scores]
+            if peers:
+                best = min(peers, key=scores.__getitem__)
+                if scores[best] * policy.switch_ratio < scores[primary]:
+                    fallbacks = [primary] + [name for name in fallbacks if name != best]
+                    primary = best
+        # Providers without enough samples keep their place; scored ones are sorted into the remaining slots.
+        ranked = iter(sorted((name for name in fallbacks if name in scores), key=scores.__getitem__))
+        return [primary] + [next(ranked) if name in scores else name for name in fallbacks]
 
     def _log(
         self,
@@ -165,6 +806,7 @@ class LLMOrchestrator:
         elapsed_ms: float,
         *,
         success: bool,
+        **extra: Any,
     ) -> None:
         entry = {
             'ts': time.time(),
@@ -174,5 +816,6 @@ class LLMOrchestrator:
             'model_used': model_used,
             'response_time_ms': elapsed_ms,
             'success': success,
+            **extra,
         }
         _log_routing(entry)
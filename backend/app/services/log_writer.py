@@ -0,0 +1,210 @@
+"""Background JSON-lines writer: bounded queue, batched flushes, size and date rotation."""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections.abc import Callable
+from datetime import date
+from pathlib import Path
+from typing import Any, TextIO
+
+logger = logging.getLogger(__name__)
+
+
+class BatchedLogWriter:
+    """Appends JSON entries under ``path`` from a background thread so callers never touch the disk.
+
+    Each process writes its own file, ``path`` with the pid before the suffix
+    (``routing.log`` -> ``routing.<pid>.log``), so gunicorn workers never
+    append to or rotate each other's files. ``write`` only enqueues; when the
+    queue (``max_queue`` entries) is full the entry is dropped and counted
+    instead of blocking the request. The thread writes in batches of up to
+    ``batch_size`` entries, or whatever arrived within
+    ``flush_interval_seconds``. Before a batch, the file is rotated when the
+    day has changed or it would grow past ``max_bytes``; rotated files are
+    named ``<file>.<YYYY-MM-DD>.<n>`` and the newest ``backup_count`` across
+    all processes are kept. Files left by processes that have exited are
+    rotated the same way. The thread starts on the first write (and again in a
+    forked worker), and is the only writer of every counter except ``dropped``.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        max_queue: int = 10_000,
+        batch_size: int = 200,
+        flush_interval_seconds: float = 1.0,
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 7,
+        today: Callable[[], date] = date.today,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.today = today
+        self._queue: queue.Queue[dict[str, Any] | threading.Event] = queue.Queue(maxsize=max_queue)
+        self._thread: threading.Thread | None = None
+        self._pid: int | None = None
+        self._start_lock = threading.Lock()
+        self._dropped_lock = threading.Lock()
+        self._file: TextIO | None = None
+        self._file_day: date | None = None
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.rotations = 0
+        self.errors = 0
+
+    def write(self, entry: dict[str, Any]) -> bool:
+        self._ensure_running()
+        try:
+            self._queue.put_nowait(entry)
+            return True
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+            return False
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until everything queued so far is on disk (tests, shutdown)."""
+        if self._thread is None or not self._thread.is_alive():
+            return self._queue.empty()
+        marker = threading.Event()
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.wait(timeout)
+
+    @property
+    def active_path(self) -> Path:
+        """The file this process appends to."""
+        return self._process_path(os.getpid())
+
+    def _process_path(self, pid: int) -> Path:
+        return self.path.with_name(f"{self.path.stem}.{pid}{self.path.suffix}")
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "path": str(self.active_path),
+            "queue_depth": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "rotations": self.rotations,
+            "errors": self.errors,
+        }
+
+    def _ensure_running(self) -> None:
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            # A forked worker inherits the object but not the thread.
+            self._pid = os.getpid()
+            self._file = None
+            self._thread = threading.Thread(target=self._run, name="routing-log-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch: list[dict[str, Any]] = []
+            markers: list[threading.Event] = []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval_seconds
+            while True:
+                if isinstance(item, threading.Event):
+                    markers.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if batch:
+                self._write_batch(batch)
+            for marker in markers:
+                marker.set()
+
+    def _write_batch(self, batch: list[dict[str, Any]]) -> None:
+        data = "".join(json.dumps(entry, ensure_ascii=True, default=str) + "\n" for entry in batch)
+        try:
+            handle = self._open(len(data.encode("utf-8")))
+            handle.write(data)
+            handle.flush()
+            self.written += len(batch)
+            self.batches += 1
+        except OSError as exc:
+            self.errors += 1
+            self._file = None
+            logger.warning("Could not write %s: %s", self.active_path.name, exc)
+
+    def _open(self, incoming: int) -> TextIO:
+        today = self.today()
+        path = self.active_path
+        if self._file is None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._rotate_orphans()
+            if path.exists():
+                # A recycled pid: pick up where that process left off, rotating a file from an earlier day.
+                self._file_day = date.fromtimestamp(path.stat().st_mtime)
+                if self._file_day != today:
+                    self._rotate(path, self._file_day)
+            self._file = path.open("a", encoding="utf-8")
+            self._file_day = today
+        elif self._file_day != today or self._file.tell() + incoming > self.max_bytes:
+            self._file.close()
+            self._rotate(path, self._file_day or today)
+            self._file = path.open("a", encoding="utf-8")
+            self._file_day = today
+        return self._file
+
+    def _rotate_orphans(self) -> None:
+        for candidate in self.path.parent.glob(f"{self.path.stem}.*{self.path.suffix}"):
+            pid = candidate.name[len(self.path.stem) + 1 : len(candidate.name) - len(self.path.suffix)]
+            if not pid.isdigit() or int(pid) == os.getpid() or _alive(int(pid)):
+                continue
+            try:
+                self._rotate(candidate, date.fromtimestamp(candidate.stat().st_mtime))
+            except OSError:
+                pass  # another worker rotated it first
+
+    def _rotate(self, path: Path, day: date) -> None:
+        if not path.exists() or path.stat().st_size == 0:
+            return
+        n = 1
+        while (target := path.with_name(f"{path.name}.{day.isoformat()}.{n}")).exists():
+            n += 1
+        path.rename(target)
+        self.rotations += 1
+        backups = []
+        for backup in self.path.parent.glob(f"{self.path.stem}.*{self.path.suffix}.*"):
+            try:
+                backups.append((backup.stat().st_mtime, backup))
+            except OSError:
+                continue
+        backups.sort()
+        for _mtime, old in backups[: max(0, len(backups) - self.backup_count)]:
+            old.unlink(missing_ok=True)
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -0,0 +1,97 @@
+"""Response cache tier stored in Postgres so every worker and deploy shares it."""
+
+import hashlib
+import time
+from collections.abc import Callable, Iterable
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from pydantic import BaseModel
+from sqlalchemy import delete, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from ..models import CachedResponse
+from .cache import cache_namespace
+
+
+def _key_hash(key: str) -> str:
+    # Chat keys embed the full message, which can exceed the btree row limit; hash them.
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class PostgresResponseCache:
+    """Stores serialized pydantic responses in the ``response_cache`` table with a TTL.
+
+    Only the registered ``models`` are stored (looked up by class name on
+    read); anything else is left to the in-process tier. ``namespaces`` names
+    the cache namespaces those models are kept under, so TieredCache can skip
+    the round trip for keys this store never holds (``None`` means all).
+    Expired rows are ignored on read and deleted in bulk at most every
+    ``purge_interval_seconds``.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        models: Iterable[type[BaseModel]],
+        *,
+        namespaces: Iterable[str] | None = None,
+        purge_interval_seconds: float = 300.0,
+    ):
+        self.session_factory = session_factory
+        self.models = {model.__name__: model for model in models}
+        self.namespaces = frozenset(namespaces) if namespaces is not None else None
+        self.purge_interval_seconds = purge_interval_seconds
+        self._next_purge = time.monotonic() + purge_interval_seconds
+
+    def get(self, key: str) -> tuple[BaseModel, float | None] | None:
+        now = datetime.now(timezone.utc)
+        with self.session_factory() as db:
+            row = db.execute(
+                select(CachedResponse.payload_type, CachedResponse.payload, CachedResponse.expires_at).where(
+                    CachedResponse.key_hash == _key_hash(key),
+                    or_(CachedResponse.expires_at.is_(None), CachedResponse.expires_at > now),
+                )
+            ).first()
+        if row is None:
+            return None
+        model = self.models.get(row.payload_type)
+        if model is None:
+            return None
+        remaining = (row.expires_at - now).total_seconds() if row.expires_at is not None else None
+        return model.model_validate(row.payload), remaining
+
+    def set(self, key: str, value: Any, *, ttl_seconds: float) -> bool:
+        payload_type = type(value).__name__
+        if payload_type not in self.models:
+            return False
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds) if ttl_seconds > 0 else None
+        values = {
+            "namespace": cache_namespace(key),
+            "payload_type": payload_type,
+            "payload": value.model_dump(mode="json"),
+            "expires_at": expires_at,
+        }
+        with self.session_factory() as db:
+            db.execute(
+                insert(CachedResponse)
+                .values(key_hash=_key_hash(key), **values)
+                .on_conflict_do_update(index_elements=[CachedResponse.key_hash], set_=values)
+            )
+            db.commit()
+        self._purge_if_due()
+        return True
+
+    def purge_expired(self) -> int:
+        with self.session_factory() as db:
+            result = db.execute(delete(CachedResponse).where(CachedResponse.expires_at < datetime.now(timezone.utc)))
+            db.commit()
+            return result.rowcount or 0
+
+    def _purge_if_due(self) -> None:
+        now = time.monotonic()
+        if now < self._next_purge:
+            return
+        self._next_purge = now + self.purge_interval_seconds
+        self.purge_expired()
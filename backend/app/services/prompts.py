@@ -0,0 +1,109 @@
+"""Prompt building shared by the LLM providers: a static prefix compiled once, a small dynamic suffix.
+
+Everything that only depends on the provider, mode and language (role,
+rules, JSON schema, language and style instructions) goes in the prefix,
+which each provider builds once per (mode, language) and caches. The
+per-request parts (topic or message, history, verses) follow in the suffix.
+Keeping the prefix byte-identical across calls is what lets upstream prefix
+caching kick in where it is automatic: OpenAI and Gemini prefix caching
+(once a prompt passes their minimum length) and Ollama's KV cache reuse for
+an unchanged system prompt. Anthropic only caches explicit ``cache_control``
+breakpoints of at least 1024 tokens, which the prefix is far below, so the
+Claude providers send it as a plain system prompt.
+"""
+
+import json
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from ..models import Verse
+from ..schemas import ChatTurn
+
+GUIDANCE_SCHEMA_JSON = json.dumps(
+    {
+        "mode": "comfort|clarity|traditional",
+        "topic": "string",
+        "verses": [
+            {
+                "verse_id": 47,
+                "ref": "2.47",
+                "sanskrit": "...",
+                "transliteration": "...",
+                "translation": "...",
+                "why_this": "...",
+            }
+        ],
+        "guidance_short": "string (max 500 chars)",
+        "guidance_long": "string",
+        "micro_practice": {
+            "title": "string",
+            "steps": ["...", "..."],
+            "duration_minutes": 1,
+        },
+        "reflection_prompt": "string",
+        "safety": {"flagged": False, "message": None},
+    }
+)
+
+CHAT_SCHEMA_JSON = json.dumps(
+    {
+        "mode": "comfort|clarity|traditional",
+        "reply": "string",
+        "verses": [
+            {
+                "verse_id": 47,
+                "ref": "2.47",
+                "sanskrit": "...",
+                "transliteration": "...",
+                "translation": "...",
+                "why_this": "...",
+            }
+        ],
+        "action_step": "string",
+        "reflection_prompt": "string",
+        "safety": {"flagged": False, "message": None},
+    }
+)
+
+
+@dataclass(frozen=True)
+class Prompt:
+    prefix: str
+    suffix: str
+
+    @property
+    def text(self) -> str:
+        """Prefix and suffix as one string, for APIs that take a single prompt."""
+        return self.prefix + self.suffix
+
+
+def verses_json(verses: Sequence[Verse]) -> str:
+    return json.dumps(
+        [
+            {
+                "verse_id": verse.id,
+                "ref": verse.ref,
+                "sanskrit": verse.sanskrit,
+                "transliteration": verse.transliteration,
+                "translation": verse.translation,
+            }
+            for verse in verses[:3]
+        ],
+        ensure_ascii=True,
+    )
+
+
+def history_json(history: Sequence[ChatTurn]) -> str:
+    return json.dumps([{"role": turn.role, "content": turn.content} for turn in history[-12:]], ensure_ascii=True)
+
+
+def guidance_suffix(topic: str, verses: Sequence[Verse]) -> str:
+    return f"Topic: {topic}\nAvailable verses JSON: {verses_json(verses)}"
+
+
+def chat_suffix(message: str, history: Sequence[ChatTurn], verses: Sequence[Verse]) -> str:
+    return (
+        f"Conversation history JSON: {history_json(history)}\n"
+        f"User message: {message}\n"
+        f"Available verses JSON: {verses_json(verses)}"
+    )
@@ -0,0 +1,117 @@
+"""Incremental extraction of the ``reply`` string from a JSON object streamed token by token."""
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class ReplyStreamParser:
+    """Feeds raw model output and returns decoded text of one top-level string field as it arrives.
+
+    Chat providers are asked for a JSON object (``{"mode": ..., "reply": ...,
+    "verses": [...], ...}``). ``feed`` tracks just enough JSON structure
+    (nesting depth, strings, escapes, the current top-level key) to recognise
+    the ``field`` value and decode it incrementally, including ``\\uXXXX``
+    escapes and surrogate pairs split across chunks. Anything before the first
+    ``{``, such as a markdown fence, is ignored. The full raw text is kept in
+    ``text`` so the caller can validate the complete object once the stream
+    ends; nothing here checks that the JSON is well formed.
+    """
+
+    def __init__(self, field: str = "reply"):
+        self.field = field
+        self.done = False
+        self._chunks: list[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._unicode: str | None = None
+        self._high_surrogate: int | None = None
+        self._expect_value = False
+        self._last_key: str | None = None
+        self._key: list[str] | None = None
+        self._capturing = False
+        self._out: list[str] = []
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+    def feed(self, chunk: str) -> str:
+        self._chunks.append(chunk)
+        self._out = []
+        for char in chunk:
+            if self.done:
+                break
+            if self._in_string:
+                self._string_char(char)
+            elif self._depth == 0:
+                if char == "{":
+                    self._depth = 1
+            else:
+                self._structural_char(char)
+        return "".join(self._out)
+
+    def _structural_char(self, char: str) -> None:
+        top_level = self._depth == 1
+        if char == '"':
+            self._in_string = True
+            if top_level and self._expect_value:
+                self._capturing = self._last_key == self.field
+            elif top_level:
+                self._key = []
+            self._expect_value = False
+        elif char in "{[":
+            self._depth += 1
+            self._expect_value = False
+        elif char in "}]":
+            self._depth -= 1
+            if self._depth == 0:
+                self.done = True
+        elif top_level and char == ":":
+            self._expect_value = True
+        elif top_level and char == ",":
+            self._last_key = None
+        elif not char.isspace():
+            # Start of a number/true/false/null value.
+            self._expect_value = False
+
+    def _string_char(self, char: str) -> None:
+        if self._unicode is not None:
+            self._unicode += char
+            if len(self._unicode) == 4:
+                digits, self._unicode = self._unicode, None
+                try:
+                    self._emit_code_point(int(digits, 16))
+                except ValueError:
+                    pass
+        elif self._escape:
+            self._escape = False
+            if char == "u":
+                self._unicode = ""
+            else:
+                self._emit(_ESCAPES.get(char, char))
+        elif char == "\\":
+            self._escape = True
+        elif char == '"':
+            self._in_string = False
+            self._capturing = False
+            if self._key is not None:
+                self._last_key = "".join(self._key)
+                self._key = None
+        else:
+            self._emit(char)
+
+    def _emit_code_point(self, code: int) -> None:
+        if 0xD800 <= code < 0xDC00:
+            self._high_surrogate = code
+            return
+        if 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+            code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+        self._high_surrogate = None
+        if not 0xD800 <= code < 0xE000:
+            self._emit(chr(code))
+
+    def _emit(self, text: str) -> None:
+        if self._capturing:
+            self._out.append(text)
+        elif self._key is not None:
+            self._key.append(text)
@@ -0,0 +1,210 @@
+"""Periodically regenerate responses for a small, enumerable set of cache keys."""
+
+import fcntl
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+WarmJob = tuple[str, Callable[[], Any]]
+
+
+class FileLeaderLock:
+    """Leader election between processes on one host through an exclusive ``flock``.
+
+    The first process to call it keeps the lock file open for its lifetime;
+    the OS releases the lock when that process exits, and the next caller
+    takes over.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._fd: int | None = None
+
+    def __call__(self) -> bool:
+        if self._fd is not None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+
+class PostgresLeaderLock:
+    """Leader election across every worker and host sharing one database.
+
+    Holds a session-level ``pg_try_advisory_lock`` on a dedicated connection.
+    If that connection drops, the lock goes with it and another process can
+    win the next election.
+    """
+
+    def __init__(self, engine: Engine, lock_id: int):
+        self.engine = engine
+        self.lock_id = lock_id
+        self._conn: Connection | None = None
+
+    def __call__(self) -> bool:
+        try:
+            if self._conn is not None:
+                self._conn.execute(text("SELECT 1"))
+                self._conn.commit()
+                return True
+            conn = self.engine.connect()
+            acquired = conn.execute(text("SELECT pg_try_advisory_lock(:lock_id)"), {"lock_id": self.lock_id}).scalar()
+            conn.commit()
+        except Exception as exc:
+            logger.warning("Cache warmer leader check failed: %s", exc)
+            self._close()
+            return False
+        if acquired:
+            self._conn = conn
+        else:
+            conn.close()
+        return bool(acquired)
+
+    def _close(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+
+class ResponseWarmer:
+    """Runs warm jobs with bounded concurrency, once or on a fixed interval.
+
+    ``jobs`` is called at the start of every pass and returns ``(cache_key,
+    generate)`` pairs; each ``generate`` is expected to store its own result in
+    the response cache. Rebuilding the list per pass picks up keys that roll
+    over, such as the date in morning-greeting keys. ``interval_seconds``
+    should be shorter than the TTL of the warmed namespaces so entries are
+    replaced before they expire.
+
+    ``remaining_ttl(key)`` reports how long a cached entry has left; entries
+    that will outlive the next pass (plus ``refresh_margin`` of the interval
+    for the pass itself) are skipped. ``leader()`` gates the background loop
+    so only one process in a deployment spends LLM calls on warming;
+    processes that lose the election retry every interval.
+    """
+
+    def __init__(
+        self,
+        jobs: Callable[[], list[WarmJob]],
+        *,
+        concurrency: int = 4,
+        interval_seconds: float = 240.0,
+        remaining_ttl: Callable[[str], float | None] | None = None,
+        refresh_margin: float = 0.25,
+        leader: Callable[[], bool] | None = None,
+    ):
+        self.jobs = jobs
+        self.concurrency = max(1, concurrency)
+        self.interval_seconds = interval_seconds
+        self.remaining_ttl = remaining_ttl
+        self.refresh_margin = refresh_margin
+        self.leader = leader
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.passes = 0
+        self.follower_passes = 0
+        self.is_leader: bool | None = None
+        self.last_run: dict[str, Any] | None = None
+
+    def _due(self, key: str) -> bool:
+        if self.remaining_ttl is None:
+            return True
+        remaining = self.remaining_ttl(key)
+        return remaining is None or remaining < self.interval_seconds * (1 + self.refresh_margin)
+
+    def run_once(self) -> dict[str, Any]:
+        all_jobs = self.jobs()
+        jobs = [job for job in all_jobs if self._due(job[0])]
+        failed: list[str] = []
+        start = time.perf_counter()
+
+        def run(job: WarmJob) -> None:
+            key, generate = job
+            try:
+                generate()
+            except Exception as exc:
+                logger.warning("Cache warm job %s failed: %s", key, exc)
+                with self._lock:
+                    failed.append(key)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="cache-warmer") as pool:
+            list(pool.map(run, jobs))
+
+        summary = {
+            "jobs": len(jobs),
+            "succeeded": len(jobs) - len(failed),
+            "failed": len(failed),
+            "fresh": len(all_jobs) - len(jobs),
+            "duration_s": round(time.perf_counter() - start, 2),
+            "finished_at": time.time(),
+        }
+        with self._lock:
+            self.passes += 1
+            self.last_run = summary
+        logger.info(
+            "cache_warm_pass jobs=%d fresh=%d failed=%d duration_s=%s",
+            len(jobs),
+            summary["fresh"],
+            len(failed),
+            summary["duration_s"],
+        )
+        return summary
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="cache-warmer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self._elect():
+                    self.run_once()
+            except Exception as exc:
+                logger.warning("Cache warm pass failed: %s", exc)
+            self._stop.wait(self.interval_seconds)
+
+    def _elect(self) -> bool:
+        leading = self.leader is None or self.leader()
+        with self._lock:
+            if leading != self.is_leader:
+                logger.info("cache_warmer_role leader=%s", leading)
+            self.is_leader = leading
+            if not leading:
+                self.follower_passes += 1
+        return leading
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self._thread is not None and not self._stop.is_set(),
+                "concurrency": self.concurrency,
+                "interval_seconds": self.interval_seconds,
+                "passes": self.passes,
+                "leader": self.is_leader,
+                "follower_passes": self.follower_passes,
+                "last_run": self.last_run,
+            }
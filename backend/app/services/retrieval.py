@@ -1,34 +1,242 @@
-﻿from collections.abc import Callable
+﻿from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
 import logging
+import threading
+import time
+from typing import Any
 
-from sqlalchemy import Select, select
+from sqlalchemy import Select, select, text
 from sqlalchemy.orm import Session
 
 from ..models import Verse
+from ..schemas import RetrievalMode
+from .dataset import dataset_version
 from .embeddings import EmbeddingProvider, keyword_score
+from .lexical_index import BM25Index
+from .vector_index import VerseVectorIndex
 
 logger = logging.getLogger(__name__)
 
+# Candidate depth per pass in hybrid mode; fusion then keeps the caller's top_k.
+HYBRID_CANDIDATES = 20
+
+
+@dataclass
+class RetrievalResult:
+    verses: list[Verse]
+    mode: RetrievalMode
+    query_vector: Sequence[float] | None = None
+    timings_ms: dict[str, float] = field(default_factory=dict)
+
+
+class _StageTimings:
+    """Thread-safe running count/mean/max per retrieval stage."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stages: dict[str, list[float]] = {}
+
+    def record(self, timings_ms: dict[str, float]) -> None:
+        with self._lock:
+            for stage, elapsed in timings_ms.items():
+                count, total, worst = self._stages.get(stage, [0, 0.0, 0.0])
+                self._stages[stage] = [count + 1, total + elapsed, max(worst, elapsed)]
+
+    def to_dict(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                stage: {
+                    'count': int(count),
+                    'mean_ms': round(total / count, 4) if count else 0.0,
+                    'max_ms': round(worst, 4),
+                }
+                for stage, (count, total, worst) in self._stages.items()
+            }
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Verse]], *, k: int = 60) -> list[Verse]:
+    """Fuse ranked lists with RRF: score(d) = sum over lists of 1 / (k + rank)."""
+    scores: dict[int, float] = {}
+    by_id: dict[int, Verse] = {}
+    for ranking in rankings:
+        for rank, verse in enumerate(ranking, start=1):
+            scores[verse.id] = scores.get(verse.id, 0.0) + 1.0 / (k + rank)
+            by_id.setdefault(verse.id, verse)
+    ordered = sorted(scores, key=lambda verse_id: scores[verse_id], reverse=True)
+    return [by_id[verse_id] for verse_id in ordered]
+
 
 class VerseRetriever:
-    def __init__(self, session_factory: Callable[[], Session], embedding_provider: EmbeddingProvider):
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        embedding_provider: EmbeddingProvider,
+        *,
+        vector_index: VerseVectorIndex | None = None,
+        lexical_index: BM25Index | None = None,
+        refresh_interval_seconds: float = 300.0,
+        default_mode: RetrievalMode = 'vector',
+        rrf_k: int = 60,
+        ef_search: int | None = None,
+        probes: int | None = None,
+    ):
         self.session_factory = session_factory
         self.embedding_provider = embedding_provider
+        self.vector_index = vector_index
+        self.lexical_index = lexical_index
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.default_mode: RetrievalMode = default_mode
+        self.rrf_k = rrf_k
+        self.ef_search = ef_search
+        self.probes = probes
+        self._timings = _StageTimings()
+        self._dataset_version: str | None = None
+        self._checked_at = 0.0
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def dataset_version(self) -> str | None:
+        return self._dataset_version
+
+    def refresh(self, *, force: bool = False) -> bool:
+        """Rebuild in-memory indexes when the verses table changed since the last build.
+
+        Returns True when a rebuild happened. Concurrent callers do not wait:
+        while one thread rebuilds, the others keep serving the previous snapshot.
+        """
+        if self.vector_index is None and self.lexical_index is None:
+            return False
+        if not self._refresh_lock.acquire(blocking=force):
+            return False
+        try:
+            self._checked_at = time.monotonic()
+            with self.session_factory() as db:
+                version = dataset_version(db)
+                if not force and version == self._dataset_version:
+                    return False
+                verses = list(db.execute(select(Verse).order_by(Verse.id)).scalars().all())
+            if self.vector_index is not None:
+                self.vector_index.build(verses)
+            if self.lexical_index is not None:
+                self.lexical_index.build(verses)
+            self._dataset_version = version
+            logger.info('Retrieval indexes rebuilt for dataset version %s (%d verses)', version, len(verses))
+            return True
+        finally:
+            self._refresh_lock.release()
+
+    def schedule_refresh_if_due(self) -> None:
+        # With no version yet the boot-time build failed (or is still running); this retries it on the same timer.
+        if time.monotonic() - self._checked_at < self.refresh_interval_seconds:
+            return
+        # Claim the slot before starting the thread so a burst of requests spawns only one check.
+        self._checked_at = time.monotonic()
+        threading.Thread(target=self._refresh_quietly, name='retrieval-index-refresh', daemon=True).start()
+
+    def _refresh_quietly(self) -> None:
+        try:
+            self.refresh()
+        except Exception as exc:
+            logger.warning('Retrieval index refresh failed, keeping previous snapshot: %s', exc)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            'default_mode': self.default_mode,
+            'dataset_version': self._dataset_version,
+            'vector_index_rows': self.vector_index.size if self.vector_index is not None else None,
+            'lexical_index_rows': self.lexical_index.size if self.lexical_index is not None else None,
+            'stage_timings': self._timings.to_dict(),
+        }
+
+    def retrieve(self, query: str, top_k: int = 3, *, mode: RetrievalMode | None = None) -> list[Verse]:
+        return self.search(query, top_k, mode=mode).verses
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 3,
+        *,
+        mode: RetrievalMode | None = None,
+        ef_search: int | None = None,
+        probes: int | None = None,
+    ) -> RetrievalResult:
+        """Retrieve verses and report how long each stage took.
+
+        ``vector`` falls back to lexical search when it finds nothing,
+        ``lexical`` skips the embedder entirely, and ``hybrid`` runs both passes
+        and fuses them with reciprocal-rank fusion. ``ef_search``/``probes``
+        override the configured pgvector ANN effort for this query only.
+        """
+        ann = (ef_search or self.ef_search, probes or self.probes)
+        selected: RetrievalMode = mode or self.default_mode
+        if selected != 'lexical' and not getattr(self.embedding_provider, 'ready', True):
+            # Embedding model still warming up: serve lexical results instead of blocking.
+            selected = 'lexical'
+        self.schedule_refresh_if_due()
+        timings: dict[str, float] = {}
+        vector = None
+
+        if selected != 'lexical':
+            start = time.perf_counter()
+            vector = self.embedding_provider.embed(query)
+            timings['embed'] = _elapsed_ms(start)
+
+        if selected == 'lexical':
+            verses = self._timed(timings, 'lexical', self._keyword_fallback, query, top_k)
+        elif selected == 'hybrid':
+            depth = max(top_k, HYBRID_CANDIDATES)
+            vector_hits = self._timed(timings, 'vector', self._nearest, vector, depth, ann)
+            lexical_hits = self._timed(timings, 'lexical', self._keyword_fallback, query, depth)
+            start = time.perf_counter()
+            verses = reciprocal_rank_fusion([vector_hits, lexical_hits], k=self.rrf_k)[:top_k]
+            timings['fusion'] = _elapsed_ms(start)
+        else:
+            verses = self._timed(timings, 'vector', self._nearest, vector, top_k, ann)
+            if not verses:
+                verses = self._timed(timings, 'lexical', self._keyword_fallback, query, top_k)
+
+        self._timings.record(timings)
+        logger.debug('retrieval mode=%s timings_ms=%s', selected, timings)
+        return RetrievalResult(verses=verses, mode=selected, query_vector=vector, timings_ms=timings)
+
+    @staticmethod
+    def _timed(timings: dict[str, float], stage: str, fn: Callable[..., list[Verse]], *args: Any) -> list[Verse]:
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            timings[stage] = _elapsed_ms(start)
+
+    def _nearest(self, vector: Sequence[float], top_k: int, ann: tuple[int | None, int | None]) -> list[Verse]:
+        if self.vector_index is not None and self.vector_index.size:
+            try:
+                return self.vector_index.search(vector, top_k)
+            except ValueError as exc:
+                logger.warning('In-memory vector search failed, using keyword fallback: %s', exc)
+                return []
 
-    def retrieve(self, query: str, top_k: int = 3) -> list[Verse]:
-        vector = self.embedding_provider.embed(query)
         with self.session_factory() as db:
             try:
-                verses = self._vector_search(db, vector, top_k)
+                return self._vector_search(db, list(vector), top_k, ef_search=ann[0], probes=ann[1])
             except Exception as exc:
                 logger.warning('Vector search failed, using keyword fallback: %s', exc)
                 db.rollback()
-                verses = []
-            if verses:
-                return verses
-            return self._keyword_fallback(db, query, top_k)
+                return []
 
-    def _vector_search(self, db: Session, vector: list[float], top_k: int) -> list[Verse]:
+    def _vector_search(
+        self,
+        db: Session,
+        vector: list[float],
+        top_k: int,
+        *,
+        ef_search: int | None = None,
+        probes: int | None = None,
+    ) -> list[Verse]:
+        # set_config(..., true) is transaction-local, like SET LOCAL, but accepts bind parameters.
+        if ef_search:
+            db.execute(text("SELECT set_config('hnsw.ef_search', :value, true)"), {'value': str(max(ef_search, top_k))})
+        if probes:
+            db.execute(text("SELECT set_config('ivfflat.probes', :value, true)"), {'value': str(probes)})
         stmt: Select[tuple[Verse]] = (
             select(Verse)
             .where(Verse.embedding.is_not(None))
@@ -37,7 +245,13 @@ class VerseRetriever:
         )
         return list(db.execute(stmt).scalars().all())
 
-    def _keyword_fallback(self, db: Session, query: str, top_k: int) -> list[Verse]:
+    def _keyword_fallback(self, query: str, top_k: int) -> list[Verse]:
+        if self.lexical_index is not None and self.lexical_index.size:
+            return self.lexical_index.search(query, top_k)
+        with self.session_factory() as db:
+            return self._keyword_scan(db, query, top_k)
+
+    def _keyword_scan(self, db: Session, query: str, top_k: int) -> list[Verse]:
         verses = list(db.execute(select(Verse)).scalars().all())
         scored = []
         for verse in verses:
@@ -47,3 +261,7 @@ class VerseRetriever:
 
         scored.sort(key=lambda item: item[0], reverse=True)
         return [item[1] for item in scored[:top_k]]
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 4)
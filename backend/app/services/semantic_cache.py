@@ -0,0 +1,125 @@
+"""Response cache that matches paraphrased queries by embedding similarity."""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+# Best-match similarities this far below the threshold are counted as near misses,
+# i.e. requests that a slightly looser threshold would have served from cache.
+NEAR_MISS_MARGIN = 0.05
+
+
+@dataclass
+class _Entry:
+    vector: np.ndarray
+    verse_ids: frozenset[int]
+    value: Any
+    expires_at: float
+
+
+class SemanticCache:
+    """Per-namespace store of (query embedding, retrieved verse ids) -> response.
+
+    A lookup hits when an unexpired entry in the same namespace (endpoint, mode,
+    language, retrieval mode) has cosine similarity >= ``threshold`` with the
+    query *and* was answered from exactly the same verses, so the cached
+    response cites what the new request would have been grounded on anyway.
+    Each namespace keeps its ``max_entries`` most recently used entries.
+    """
+
+    def __init__(self, *, threshold: float = 0.92, max_entries: int = 512, ttl_seconds: int = 300):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._namespaces: dict[str, OrderedDict[int, _Entry]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.verse_mismatches = 0
+        self.near_misses = 0
+        self._hit_similarity_total = 0.0
+
+    def lookup(self, namespace: str, vector: Sequence[float] | None, verse_ids: Iterable[int]) -> Any | None:
+        query = _unit(vector)
+        if query is None:
+            return None
+        wanted = frozenset(verse_ids)
+        now = time.time()
+        with self._lock:
+            entries = self._namespaces.get(namespace)
+            if entries:
+                for key in [key for key, entry in entries.items() if entry.expires_at < now]:
+                    del entries[key]
+            if not entries:
+                self.misses += 1
+                return None
+
+            keys = list(entries.keys())
+            similarities = np.vstack([entries[key].vector for key in keys]) @ query
+            best_hit: tuple[float, int] | None = None
+            best_any = float(similarities.max())
+            for key, similarity in zip(keys, similarities.tolist()):
+                if similarity >= self.threshold and entries[key].verse_ids == wanted:
+                    if best_hit is None or similarity > best_hit[0]:
+                        best_hit = (similarity, key)
+
+            if best_hit is None:
+                self.misses += 1
+                if best_any >= self.threshold:
+                    self.verse_mismatches += 1
+                elif best_any >= self.threshold - NEAR_MISS_MARGIN:
+                    self.near_misses += 1
+                return None
+
+            similarity, key = best_hit
+            entries.move_to_end(key)
+            self.hits += 1
+            self._hit_similarity_total += similarity
+            return entries[key].value
+
+    def store(self, namespace: str, vector: Sequence[float] | None, verse_ids: Iterable[int], value: Any) -> None:
+        unit = _unit(vector)
+        if unit is None or self.max_entries <= 0:
+            return
+        with self._lock:
+            entries = self._namespaces.setdefault(namespace, OrderedDict())
+            entries[self._next_id] = _Entry(
+                vector=unit,
+                verse_ids=frozenset(verse_ids),
+                value=value,
+                expires_at=time.time() + self.ttl_seconds,
+            )
+            self._next_id += 1
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "threshold": self.threshold,
+                "entries": sum(len(entries) for entries in self._namespaces.values()),
+                "namespaces": len(self._namespaces),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "verse_mismatches": self.verse_mismatches,
+                "near_misses": self.near_misses,
+                "mean_hit_similarity": round(self._hit_similarity_total / self.hits, 4) if self.hits else None,
+            }
+
+
+def _unit(vector: Sequence[float] | None) -> np.ndarray | None:
+    if vector is None:
+        return None
+    array = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(array))
+    if norm == 0.0:
+        return None
+    return array / norm
@@ -0,0 +1,68 @@
+"""In-process exact vector index over verse embeddings."""
+
+import logging
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+
+from ..models import Verse
+
+logger = logging.getLogger(__name__)
+
+
+class VerseVectorIndex:
+    """Holds every verse embedding in one contiguous float32 matrix.
+
+    Rows are L2-normalized at build time, so cosine similarity against a query
+    is a single matrix-vector product. The matrix and the verse list are swapped
+    together as one tuple, so readers never see a half-built index.
+    """
+
+    def __init__(self) -> None:
+        self._snapshot: tuple[np.ndarray, list[Verse]] = (np.empty((0, 0), dtype=np.float32), [])
+
+    @property
+    def size(self) -> int:
+        return len(self._snapshot[1])
+
+    @property
+    def dimension(self) -> int:
+        return int(self._snapshot[0].shape[1])
+
+    def build(self, verses: Sequence[Verse]) -> None:
+        rows = [verse for verse in verses if verse.embedding is not None]
+        if not rows:
+            self._snapshot = (np.empty((0, 0), dtype=np.float32), [])
+            return
+
+        matrix = np.ascontiguousarray(np.vstack([np.asarray(verse.embedding, dtype=np.float32) for verse in rows]))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        matrix.setflags(write=False)
+        self._snapshot = (matrix, rows)
+        logger.info('vector_index_built', extra={'rows': len(rows), 'dimension': matrix.shape[1]})
+
+    def search(self, vector: Sequence[float] | Any, top_k: int) -> list[Verse]:
+        matrix, verses = self._snapshot
+        if not verses or top_k <= 0:
+            return []
+
+        query = np.asarray(vector, dtype=np.float32)
+        if query.ndim != 1 or query.shape[0] != matrix.shape[1]:
+            raise ValueError(
+                f'Query dimension {query.shape[-1] if query.ndim else 0} does not match index dimension {matrix.shape[1]}'
+            )
+        norm = float(np.linalg.norm(query))
+        if norm == 0.0:
+            return []
+
+        scores = matrix @ (query / norm)
+        k = min(top_k, len(verses))
+        if k < len(verses):
+            candidates = np.argpartition(-scores, k - 1)[:k]
+        else:
+            candidates = np.arange(len(verses))
+        ordered = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [verses[int(i)] for i in ordered]
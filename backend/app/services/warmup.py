@@ -0,0 +1,77 @@
+"""Run slow startup work (index builds, model loading) off the request path and report readiness."""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+READY = "ready"
+FAILED = "failed"
+
+
+class Warmup:
+    """Named startup tasks run one after another in a daemon thread.
+
+    Each task may return a short detail (e.g. the provider that was loaded)
+    that is reported alongside its status. The service counts as ready once
+    every task has finished without raising.
+    """
+
+    def __init__(self):
+        self._tasks: list[tuple[str, Callable[[], Any]]] = []
+        self._components: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def add(self, name: str, task: Callable[[], Any]) -> None:
+        self._tasks.append((name, task))
+        self._components[name] = {"status": PENDING, "detail": None, "duration_ms": None}
+
+    def mark_ready(self, name: str, detail: Any = None) -> None:
+        """Record work that already completed elsewhere (e.g. a model preloaded before fork)."""
+        with self._lock:
+            self._components[name] = {"status": READY, "detail": detail, "duration_ms": 0.0}
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self.run, name="startup-warmup", daemon=True)
+        self._thread.start()
+
+    def run(self) -> None:
+        for name, task in self._tasks:
+            with self._lock:
+                if self._components[name]["status"] == READY:
+                    continue
+                self._components[name]["status"] = RUNNING
+            start = time.perf_counter()
+            try:
+                detail = task()
+                status = READY
+            except Exception as exc:
+                logger.warning("Warmup task %s failed: %s", name, exc)
+                detail = str(exc)
+                status = FAILED
+            duration_ms = round((time.perf_counter() - start) * 1000, 1)
+            with self._lock:
+                self._components[name] = {"status": status, "detail": detail, "duration_ms": duration_ms}
+            logger.info("warmup_task name=%s status=%s duration_ms=%s", name, status, duration_ms)
+
+    def wait(self, timeout: float | None = None) -> bool:
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return self.ready
+
+    @property
+    def ready(self) -> bool:
+        with self._lock:
+            return all(component["status"] == READY for component in self._components.values())
+
+    def to_dict(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            return {name: dict(component) for name, component in self._components.items()}
@@ -0,0 +1,19 @@
+"""Gunicorn settings for production: uvicorn workers forked from a preloaded app.
+
+With EMBEDDING_PRELOAD=true the embedding model is loaded while the master
+imports app.main, so workers share its weights copy-on-write instead of each
+loading a private copy. Run with:
+
+    gunicorn app.main:app -c gunicorn.conf.py
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", min(4, multiprocessing.cpu_count())))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
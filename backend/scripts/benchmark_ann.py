@@ -0,0 +1,156 @@
+"""Measure pgvector ANN recall@k and latency against exact search at several corpus sizes.
+
+Works on a scratch table (ann_benchmark) so the verses table is untouched.
+The corpus is the real verse embeddings plus jittered copies of them, which
+keeps the neighbourhood structure realistic as it grows. Queries are jittered
+verse embeddings that are not themselves in the corpus.
+
+Usage:
+    python scripts/benchmark_ann.py
+    python scripts/benchmark_ann.py --sizes 701 5000 20000 --index hnsw --efforts 10 20 40 80 160
+    python scripts/benchmark_ann.py --index ivfflat --lists 100 --efforts 1 5 10 20
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import select, text
+
+APP_ROOT = Path(__file__).resolve().parents[1]
+if str(APP_ROOT) not in sys.path:
+    sys.path.insert(0, str(APP_ROOT))
+
+from app.db import SessionLocal, engine
+from app.models import Verse
+
+TABLE = 'ann_benchmark'
+
+
+def vector_literal(row: np.ndarray) -> str:
+    return '[' + ','.join(f'{v:.6f}' for v in row) + ']'
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+def load_base_embeddings() -> np.ndarray:
+    with SessionLocal() as db:
+        rows = db.execute(select(Verse.embedding).where(Verse.embedding.is_not(None))).scalars().all()
+    if not rows:
+        raise SystemExit('No verse embeddings found. Run seed_data.py first.')
+    return normalize(np.vstack([np.asarray(row, dtype=np.float32) for row in rows]))
+
+
+def jitter(base: np.ndarray, size: int, noise: float, rng: np.random.Generator) -> np.ndarray:
+    picks = rng.integers(0, len(base), size=size)
+    return normalize(base[picks] + rng.normal(scale=noise, size=(size, base.shape[1])).astype(np.float32))
+
+
+def synthesize(base: np.ndarray, size: int, noise: float, rng: np.random.Generator) -> np.ndarray:
+    """A corpus of ``size`` rows: the real embeddings first, then jittered copies."""
+    corpus = jitter(base, size, noise, rng)
+    corpus[: min(size, len(base))] = base[: min(size, len(base))]
+    return corpus
+
+
+def load_table(corpus: np.ndarray) -> None:
+    with engine.begin() as conn:
+        conn.execute(text(f'DROP TABLE IF EXISTS {TABLE}'))
+        conn.execute(text(f'CREATE TABLE {TABLE} (id integer PRIMARY KEY, embedding vector({corpus.shape[1]}))'))
+        for start in range(0, len(corpus), 1000):
+            conn.execute(
+                text(f'INSERT INTO {TABLE} (id, embedding) VALUES (:id, CAST(:embedding AS vector))'),
+                [
+                    {'id': start + offset, 'embedding': vector_literal(row)}
+                    for offset, row in enumerate(corpus[start : start + 1000])
+                ],
+            )
+
+
+def build_index(kind: str, m: int, ef_construction: int, lists: int) -> float:
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        if kind == 'hnsw':
+            conn.execute(
+                text(
+                    f'CREATE INDEX ON {TABLE} USING hnsw (embedding vector_cosine_ops) '
+                    f'WITH (m = {m}, ef_construction = {ef_construction})'
+                )
+            )
+        else:
+            conn.execute(text(f'CREATE INDEX ON {TABLE} USING ivfflat (embedding vector_cosine_ops) WITH (lists = {lists})'))
+        conn.execute(text(f'ANALYZE {TABLE}'))
+    return time.perf_counter() - start
+
+
+def ann_search(kind: str, effort: int, queries: np.ndarray, k: int) -> tuple[list[list[int]], list[float]]:
+    setting = 'hnsw.ef_search' if kind == 'hnsw' else 'ivfflat.probes'
+    results: list[list[int]] = []
+    latencies: list[float] = []
+    with engine.connect() as conn:
+        for query in queries:
+            with conn.begin():
+                conn.execute(text('SELECT set_config(:name, :value, true)'), {'name': setting, 'value': str(effort)})
+                start = time.perf_counter()
+                ids = conn.execute(
+                    text(f'SELECT id FROM {TABLE} ORDER BY embedding <=> CAST(:q AS vector) LIMIT :k'),
+                    {'q': vector_literal(query), 'k': k},
+                ).scalars().all()
+                latencies.append((time.perf_counter() - start) * 1000)
+            results.append(list(ids))
+    return results, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark pgvector ANN recall@k vs exact search')
+    parser.add_argument('--sizes', nargs='+', type=int, default=[701, 5000, 20000])
+    parser.add_argument('--index', choices=['hnsw', 'ivfflat'], default='hnsw')
+    parser.add_argument('--efforts', nargs='+', type=int, default=None, help='ef_search (hnsw) or probes (ivfflat) values')
+    parser.add_argument('--m', type=int, default=16)
+    parser.add_argument('--ef-construction', type=int, default=64)
+    parser.add_argument('--lists', type=int, default=100)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--noise', type=float, default=0.02, help='Jitter applied to synthesized vectors')
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    efforts = args.efforts or ([10, 20, 40, 80, 160] if args.index == 'hnsw' else [1, 5, 10, 20, 50])
+    rng = np.random.default_rng(args.seed)
+    base = load_base_embeddings()
+    # Jitter only: copying base rows back, as synthesize() does, would put every query in the corpus.
+    queries = jitter(base, args.queries, args.noise, rng)
+
+    print(f'{args.index} recall@{args.k} vs exact cosine search ({args.queries} queries)')
+    print(f"{'rows':>7}{'effort':>8}{'recall':>9}{'p50 ms':>9}{'p95 ms':>9}{'build s':>9}")
+    try:
+        for size in args.sizes:
+            corpus = synthesize(base, size, args.noise, rng)
+            exact = np.argsort(-(queries @ corpus.T), axis=1)[:, : args.k]
+            load_table(corpus)
+            build_s = build_index(args.index, args.m, args.ef_construction, args.lists)
+
+            for effort in efforts:
+                found, latencies = ann_search(args.index, effort, queries, args.k)
+                recall = statistics.mean(
+                    len(set(ids) & set(truth.tolist())) / args.k for ids, truth in zip(found, exact)
+                )
+                latencies.sort()
+                print(
+                    f'{size:>7}{effort:>8}{recall:>9.3f}{statistics.median(latencies):>9.2f}'
+                    f'{latencies[int(len(latencies) * 0.95) - 1]:>9.2f}{build_s:>9.2f}'
+                )
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f'DROP TABLE IF EXISTS {TABLE}'))
+
+
+if __name__ == '__main__':
+    main()
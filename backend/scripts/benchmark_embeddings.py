@@ -0,0 +1,137 @@
+"""Compare embedding backends: load time, memory, query latency and batch throughput.
+
+Each backend runs in its own subprocess so resident memory is measured in
+isolation. Agreement is the mean/min cosine against the PyTorch vectors for
+the same texts (1.0 = identical).
+
+Usage:
+    python scripts/benchmark_embeddings.py
+    python scripts/benchmark_embeddings.py --backends sentence_transformer onnx onnx_int8 --queries 300
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+APP_ROOT = Path(__file__).resolve().parents[1]
+if str(APP_ROOT) not in sys.path:
+    sys.path.insert(0, str(APP_ROOT))
+
+from app.config import get_settings
+from app.services.embeddings import OnnxEmbeddingProvider, SentenceTransformerEmbeddingProvider
+
+DATA_FILES = [
+    Path(__file__).resolve().parents[2] / 'data' / 'gita_verses_full.json',
+    Path(__file__).resolve().parents[2] / 'data' / 'gita_verses_sample.json',
+]
+AGREEMENT_SAMPLE = 32
+
+
+def load_texts() -> list[str]:
+    for path in DATA_FILES:
+        if path.exists():
+            rows = json.loads(path.read_text(encoding='utf-8-sig'))
+            return [' '.join([row.get('ref', ''), row.get('transliteration', ''), row['translation']]) for row in rows]
+    raise FileNotFoundError('No verse dataset found under data/')
+
+
+def rss_mb() -> float:
+    for line in Path('/proc/self/status').read_text().splitlines():
+        if line.startswith('VmRSS:'):
+            return int(line.split()[1]) / 1024
+    return float('nan')
+
+
+def build_provider(backend: str):
+    settings = get_settings()
+    if backend == 'sentence_transformer':
+        provider = SentenceTransformerEmbeddingProvider(model_name=settings.embedding_model)
+    else:
+        provider = OnnxEmbeddingProvider(settings.embedding_onnx_dir, quantized=backend == 'onnx_int8')
+    provider._load_model()
+    return provider
+
+
+def run_child(backend: str, queries: int, batch_size: int) -> dict:
+    texts = load_texts()
+    baseline_rss = rss_mb()
+    start = time.perf_counter()
+    provider = build_provider(backend)
+    load_s = time.perf_counter() - start
+    provider.embed('warmup')
+
+    latencies = []
+    for text in texts[:queries]:
+        start = time.perf_counter()
+        provider.embed(text)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+
+    start = time.perf_counter()
+    provider.embed_many(texts, batch_size=batch_size)
+    batch_s = time.perf_counter() - start
+
+    return {
+        'backend': backend,
+        'load_s': round(load_s, 2),
+        'rss_mb': round(rss_mb() - baseline_rss, 1),
+        'query_p50_ms': round(statistics.median(latencies), 2),
+        'query_p95_ms': round(latencies[int(len(latencies) * 0.95) - 1], 2),
+        'batch_texts_per_s': round(len(texts) / batch_s, 1),
+        'vectors': provider.embed_many(texts[:AGREEMENT_SAMPLE]).tolist(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Benchmark embedding backends')
+    parser.add_argument(
+        '--backends',
+        nargs='+',
+        default=['sentence_transformer', 'onnx', 'onnx_int8'],
+        choices=['sentence_transformer', 'onnx', 'onnx_int8'],
+    )
+    parser.add_argument('--queries', type=int, default=200, help='Single-query embeds to time')
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--child', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.queries, args.batch_size)))
+        return
+
+    results = []
+    for backend in args.backends:
+        proc = subprocess.run(
+            [sys.executable, __file__, '--child', backend, '--queries', str(args.queries), '--batch-size', str(args.batch_size)],
+            capture_output=True,
+            text=True,
+        )
+        if proc.returncode != 0:
+            print(f'{backend}: FAILED\n{proc.stderr.strip()[-800:]}')
+            continue
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    reference = next((np.asarray(r['vectors']) for r in results if r['backend'] == 'sentence_transformer'), None)
+    header = f"{'backend':<22}{'load s':>8}{'RSS MB':>9}{'p50 ms':>9}{'p95 ms':>9}{'texts/s':>10}{'cos mean':>10}{'cos min':>9}"
+    print(header)
+    print('-' * len(header))
+    for result in results:
+        if reference is not None:
+            cosines = np.sum(reference * np.asarray(result['vectors']), axis=1)
+            agreement = f'{cosines.mean():>10.4f}{cosines.min():>9.4f}'
+        else:
+            agreement = f"{'n/a':>10}{'n/a':>9}"
+        print(
+            f"{result['backend']:<22}{result['load_s']:>8}{result['rss_mb']:>9}{result['query_p50_ms']:>9}"
+            f"{result['query_p95_ms']:>9}{result['batch_texts_per_s']:>10}{agreement}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,13 @@
 """One-time offline script to regenerate all verse embeddings in-place.
 
+Also writes the matrix as a versioned .npy artifact (see
+app/services/embedding_artifact.py) that seed_data.py and the tests load
+instead of re-encoding every verse.
+
 Usage:
     python scripts/build_embeddings.py
     python scripts/build_embeddings.py --provider hash
+    python scripts/build_embeddings.py --artifact-dir ../data/embeddings
 """
 
 import argparse
@@ -16,9 +21,10 @@ if str(APP_ROOT) not in sys.path:
     sys.path.insert(0, str(APP_ROOT))
 
 from app.config import get_settings
-from app.db import SessionLocal, init_db
+from app.db import SessionLocal, ensure_vector_index, init_db
 from app.models import Verse
-from app.services.embeddings import create_embedding_provider
+from app.services.embedding_artifact import artifact_model_key, default_artifact_dir, save_embedding_artifact
+from app.services.embeddings import LocalHashEmbeddingProvider, create_embedding_provider
 
 
 def validate_db(db) -> None:
@@ -40,7 +46,7 @@ def main() -> None:
     parser = argparse.ArgumentParser(description='Rebuild embeddings for all verses')
     parser.add_argument(
         '--provider',
-        choices=['sentence_transformer', 'hash'],
+        choices=['sentence_transformer', 'onnx', 'hash'],
         default=None,
         help='Embedding provider override (default: use config)',
     )
@@ -49,6 +55,9 @@ def main() -> None:
         action='store_true',
         help='Only validate the database, do not rebuild embeddings',
     )
+    parser.add_argument('--batch-size', type=int, default=64, help='Texts per embedding batch')
+    parser.add_argument('--artifact-dir', default=None, help='Where to write the .npy artifact (default: data/embeddings)')
+    parser.add_argument('--no-artifact', action='store_true', help='Only update the database')
     args = parser.parse_args()
 
     settings = get_settings()
@@ -65,30 +74,54 @@ def main() -> None:
             provider_type=provider_type,
             model_name=settings.embedding_model,
             dimension=settings.embedding_dim,
+            onnx_model_dir=settings.embedding_onnx_dir,
+            onnx_quantized=settings.embedding_onnx_quantized,
         )
         print(f'Using embedding provider: {type(embedder).__name__} (dim={embedder.dimension})')
 
-        verses = list(db.execute(select(Verse)).scalars().all())
+        verses = list(db.execute(select(Verse).order_by(Verse.chapter, Verse.verse_number)).scalars().all())
         if not verses:
             print('No verses found in database. Run seed_data.py first.')
             return
 
-        print(f'Rebuilding embeddings for {len(verses)} verses...')
+        print(f'Rebuilding embeddings for {len(verses)} verses (batch size {args.batch_size})...')
 
-        for i, verse in enumerate(verses, 1):
-            embedding_input = ' '.join([
+        embedding_inputs = [
+            ' '.join([
                 verse.ref,
                 verse.transliteration or '',
                 verse.translation,
                 ' '.join(verse.tags or []),
             ])
-            verse.embedding = list(embedder.embed(embedding_input))
-            if i % 50 == 0:
-                print(f'  [{i}/{len(verses)}] done')
+            for verse in verses
+        ]
+        embeddings = embedder.embed_many(embedding_inputs, batch_size=args.batch_size)
+        for verse, embedding in zip(verses, embeddings):
+            verse.embedding = embedding.tolist()
 
         db.commit()
         print(f'\nDone. Updated embeddings for {len(verses)} verses.')
 
+        if not args.no_artifact:
+            model_key = artifact_model_key(
+                'hash' if isinstance(embedder, LocalHashEmbeddingProvider) else provider_type,
+                settings.embedding_model,
+                dimension=embedder.dimension,
+                quantized=settings.embedding_onnx_quantized,
+            )
+            artifact_dir = args.artifact_dir or settings.embedding_artifact_dir or default_artifact_dir()
+            artifact = save_embedding_artifact(
+                artifact_dir,
+                model_key,
+                [(verse.ref, text) for verse, text in zip(verses, embedding_inputs)],
+                embeddings,
+            )
+            print(f'Embedding artifact written: {artifact}')
+
+    index_name = ensure_vector_index(reindex=True)
+    if index_name:
+        print(f'Vector index ready: {index_name}')
+
 
 if __name__ == '__main__':
     main()
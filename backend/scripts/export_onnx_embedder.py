@@ -0,0 +1,100 @@
+"""Export the sentence-transformer embedder to ONNX (optionally int8-quantized).
+
+The output directory is what OnnxEmbeddingProvider loads when
+EMBEDDING_PROVIDER=onnx. Needs the full PyTorch stack once, at export time only.
+
+Usage:
+    python scripts/export_onnx_embedder.py
+    python scripts/export_onnx_embedder.py --output models/all-MiniLM-L6-v2-onnx --quantize
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+APP_ROOT = Path(__file__).resolve().parents[1]
+if str(APP_ROOT) not in sys.path:
+    sys.path.insert(0, str(APP_ROOT))
+
+from app.config import get_settings
+from app.services.embeddings import OnnxEmbeddingProvider, SentenceTransformerEmbeddingProvider
+
+CHECK_TEXTS = [
+    'How to deal with anxiety and restless mind?',
+    'What is my duty in life?',
+    'You have a right to action, but never to the fruits of action.',
+    'मन को शांत कैसे करें',
+]
+
+
+def export(model_name: str, output_dir: Path, opset: int) -> None:
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    hf_name = model_name if '/' in model_name else f'sentence-transformers/{model_name}'
+    tokenizer = AutoTokenizer.from_pretrained(hf_name)
+    model = AutoModel.from_pretrained(hf_name).eval()
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    tokenizer.save_pretrained(output_dir)
+
+    sample = tokenizer(['export sample'], return_tensors='pt')
+    input_names = ['input_ids', 'attention_mask', 'token_type_ids']
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample['input_ids'], sample['attention_mask'], sample['token_type_ids']),
+            str(output_dir / OnnxEmbeddingProvider.MODEL_FILE),
+            input_names=input_names,
+            output_names=['last_hidden_state'],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+    print(f'Exported {hf_name} -> {output_dir / OnnxEmbeddingProvider.MODEL_FILE}')
+
+
+def quantize(output_dir: Path) -> None:
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(
+        str(output_dir / OnnxEmbeddingProvider.MODEL_FILE),
+        str(output_dir / OnnxEmbeddingProvider.QUANTIZED_MODEL_FILE),
+        weight_type=QuantType.QInt8,
+    )
+    print(f'Quantized -> {output_dir / OnnxEmbeddingProvider.QUANTIZED_MODEL_FILE}')
+
+
+def check_compatibility(model_name: str, output_dir: Path, quantized: bool) -> float:
+    """Return the minimum cosine similarity between PyTorch and ONNX vectors."""
+    reference = SentenceTransformerEmbeddingProvider(model_name=model_name).embed_many(CHECK_TEXTS)
+    candidate = OnnxEmbeddingProvider(output_dir, quantized=quantized).embed_many(CHECK_TEXTS)
+    return float(np.min(np.sum(reference * candidate, axis=1)))
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description='Export the embedding model to ONNX')
+    parser.add_argument('--model', default=settings.embedding_model, help='sentence-transformers model name')
+    parser.add_argument('--output', default=settings.embedding_onnx_dir, help='Output directory')
+    parser.add_argument('--quantize', action='store_true', help='Also write a dynamic int8 model')
+    parser.add_argument('--opset', type=int, default=17)
+    args = parser.parse_args()
+
+    output_dir = Path(args.output)
+    export(args.model, output_dir, args.opset)
+    if args.quantize:
+        quantize(output_dir)
+
+    for quantized in ([False, True] if args.quantize else [False]):
+        label = 'int8' if quantized else 'fp32'
+        min_cosine = check_compatibility(args.model, output_dir, quantized)
+        status = 'OK' if min_cosine >= 0.98 else 'WARNING: vectors drift from stored embeddings'
+        print(f'Compatibility ({label}): min cosine vs PyTorch = {min_cosine:.4f} [{status}]')
+
+
+if __name__ == '__main__':
+    main()
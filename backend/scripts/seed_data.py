@@ -11,8 +11,9 @@ if str(APP_ROOT) not in sys.path:
     sys.path.insert(0, str(APP_ROOT))
 
 from app.config import get_settings
-from app.db import SessionLocal, init_db
+from app.db import SessionLocal, ensure_vector_index, init_db
 from app.models import Verse
+from app.services.embedding_artifact import artifact_model_key, default_artifact_dir, load_embedding_artifact
 from app.services.embeddings import create_embedding_provider
 
 # Canonical data file priority: complete > sample
@@ -40,6 +41,17 @@ def resolve_data_file(cli_path: str | None) -> Path:
     raise FileNotFoundError('Could not find any gita verse JSON file')
 
 
+def embedding_text(row: dict) -> str:
+    chapter = int(row['chapter'])
+    verse_number = int(row['verse'])
+    return ' '.join([
+        row.get('ref') or f'{chapter}.{verse_number}',
+        row.get('transliteration', ''),
+        row['translation'],
+        ' '.join(row.get('tags') or []),
+    ])
+
+
 def validate_dataset(rows: list[dict]) -> None:
     """Validate dataset structure and completeness."""
     chapters = set(row['chapter'] for row in rows)
@@ -69,7 +81,7 @@ def main() -> None:
     parser.add_argument('--file', dest='file_path', default=None, help='Path to verse JSON file')
     parser.add_argument(
         '--provider',
-        choices=['sentence_transformer', 'hash'],
+        choices=['sentence_transformer', 'onnx', 'hash'],
         default=None,
         help='Embedding provider override (default: use config)',
     )
@@ -78,6 +90,12 @@ def main() -> None:
         action='store_true',
         help='Only validate the dataset, do not seed',
     )
+    parser.add_argument('--batch-size', type=int, default=64, help='Texts per embedding batch')
+    parser.add_argument(
+        '--reembed',
+        action='store_true',
+        help='Ignore any precomputed embedding artifact and run the model',
+    )
     args = parser.parse_args()
 
     data_file = resolve_data_file(args.file_path)
@@ -93,15 +111,39 @@ def main() -> None:
 
     settings = get_settings()
     provider_type = args.provider or settings.embedding_provider
-    embedder = create_embedding_provider(
-        provider_type=provider_type,
-        model_name=settings.embedding_model,
-        dimension=settings.embedding_dim,
-    )
-    print(f'Using embedding provider: {type(embedder).__name__} (dim={embedder.dimension})')
-
     init_db()
 
+    texts = [embedding_text(row) for row in rows]
+    refs = [row.get('ref') or f"{int(row['chapter'])}.{int(row['verse'])}" for row in rows]
+    artifact = None
+    if not args.reembed:
+        artifact = load_embedding_artifact(
+            settings.embedding_artifact_dir or default_artifact_dir(),
+            artifact_model_key(
+                provider_type,
+                settings.embedding_model,
+                dimension=settings.embedding_dim,
+                quantized=settings.embedding_onnx_quantized,
+            ),
+            list(zip(refs, texts)),
+        )
+
+    if artifact is not None:
+        print(f'Using precomputed embeddings: {artifact.model_key}-{artifact.dataset_hash}.npy')
+        rows_by_ref = artifact.rows_by_ref()
+        embeddings = artifact.vectors[[rows_by_ref[ref] for ref in refs]]
+    else:
+        embedder = create_embedding_provider(
+            provider_type=provider_type,
+            model_name=settings.embedding_model,
+            dimension=settings.embedding_dim,
+            onnx_model_dir=settings.embedding_onnx_dir,
+            onnx_quantized=settings.embedding_onnx_quantized,
+        )
+        print(f'Using embedding provider: {type(embedder).__name__} (dim={embedder.dimension})')
+        print(f'Embedding {len(rows)} verses (batch size {args.batch_size})...')
+        embeddings = embedder.embed_many(texts, batch_size=args.batch_size)
+
     with SessionLocal() as db:
         for i, row in enumerate(rows, 1):
             chapter = int(row['chapter'])
@@ -112,13 +154,7 @@ def main() -> None:
             translation_hi = row.get('translation_hi', '')
             source = row.get('source')
 
-            embedding_input = ' '.join([
-                ref,
-                row.get('transliteration', ''),
-                row['translation'],
-                ' '.join(tags),
-            ])
-            embedding = list(embedder.embed(embedding_input))
+            embedding = embeddings[i - 1].tolist()
 
             stmt = insert(Verse).values(
                 chapter=chapter,
@@ -158,6 +194,10 @@ def main() -> None:
         db.commit()
         total = db.scalar(select(func.count(Verse.id))) or 0
 
+    index_name = ensure_vector_index(reindex=True)
+    if index_name:
+        print(f'Vector index ready: {index_name}')
+
     print(f'Seed complete. Loaded verses: {total}')
 
 
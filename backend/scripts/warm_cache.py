@@ -0,0 +1,53 @@
+"""Pre-generate guidance for every single mood and today's morning greeting, once.
+
+Only useful with CACHE_L2_BACKEND=postgres: results go to the shared
+response_cache table, so every API worker starts warm. For per-worker
+in-process caches, set CACHE_WARMER_ENABLED=true instead and the API keeps
+them refreshed in the background. Runs one pass and exits, regardless of
+CACHE_WARMER_ENABLED; entries with well over a refresh interval left are skipped.
+
+Usage:
+    python scripts/warm_cache.py
+    python scripts/warm_cache.py --concurrency 8
+    (e.g. from cron shortly after midnight, or just before the mood/morning TTL runs out)
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+APP_ROOT = Path(__file__).resolve().parents[1]
+if str(APP_ROOT) not in sys.path:
+    sys.path.insert(0, str(APP_ROOT))
+
+from app import main as api
+from app.db import init_db
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Pre-generate cached mood guidance and morning greetings')
+    parser.add_argument('--concurrency', type=int, default=api.settings.cache_warmer_concurrency)
+    args = parser.parse_args()
+
+    if api.cache.l2 is None:
+        print('WARNING: CACHE_L2_BACKEND is not postgres; results only live in this process.')
+
+    init_db()
+    # The pass below is this script's whole job; don't let warmup start the API's background loop.
+    if 'response_warmer' in api.warmup.to_dict():
+        api.warmup.mark_ready('response_warmer', 'one-shot pass below')
+    api.warmup.run()
+    print(f'Warmup: {api.warmup.to_dict()}')
+
+    api.response_warmer.concurrency = max(1, args.concurrency)
+    summary = api.response_warmer.run_once()
+    print(
+        f"Warmed {summary['succeeded']}/{summary['jobs']} responses in {summary['duration_s']}s "
+        f"({summary['failed']} failed, {summary['fresh']} still fresh)"
+    )
+    if summary['failed']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Tests for latency- and error-aware failover ordering in LLMOrchestrator."""
+
+import pytest
+
+from app.services import llm_orchestrator
+from app.services.llm_orchestrator import AdaptivePolicy, LLMOrchestrator, _ProviderScore
+
+KWARGS = {"topic": "What is my duty?", "mode": "clarity", "language": "en", "verses": []}
+PROVIDERS = ["mock", "claude", "codex", "gemini"]
+
+
+class Flaky:
+    def __init__(self, answer, failing=False):
+        self.answer = answer
+        self.failing = failing
+        self.calls = 0
+
+    def generate(self, **kwargs):
+        self.calls += 1
+        if self.failing:
+            raise RuntimeError("503 overloaded")
+        return self.answer
+
+
+@pytest.fixture(autouse=True)
+def quiet_routing_log(monkeypatch):
+    monkeypatch.setattr(llm_orchestrator, "_log_routing", lambda entry: None)
+
+
+def orchestrator_with_scores(policy, latencies_ms, error_rates=None):
+    orchestrator = LLMOrchestrator({name: object() for name in PROVIDERS}, {}, default_llm="claude", adaptive=policy)
+    for name, latency_ms in latencies_ms.items():
+        score = orchestrator._scores[("guidance", name)] = _ProviderScore(policy.alpha)
+        score.latency_ms = latency_ms
+        score.error_rate = (error_rates or {}).get(name, 0.0)
+        score.samples = policy.min_samples
+    return orchestrator
+
+
+class TestProviderScore:
+    def test_ewma_moves_towards_recent_outcomes(self):
+        score = _ProviderScore(alpha=0.5)
+        score.observe(100, ok=True)
+        score.observe(300, ok=False)
+
+        assert score.latency_ms == 200
+        assert score.error_rate == 0.5
+        assert score.score(error_penalty_ms=1000) == 700
+
+
+class TestAdaptiveOrder:
+    def test_fallbacks_are_ranked_by_score_and_mock_stays_last(self):
+        orchestrator = orchestrator_with_scores(AdaptivePolicy(), {"codex": 4000, "gemini": 900})
+        assert orchestrator._failover_order("guidance", "claude", PROVIDERS) == ["claude", "gemini", "codex", "mock"]
+
+    def test_errors_outweigh_raw_speed(self):
+        orchestrator = orchestrator_with_scores(
+            AdaptivePolicy(), {"codex": 1500, "gemini": 600}, error_rates={"gemini": 0.3}
+        )
+        assert orchestrator._failover_order("guidance", "claude", PROVIDERS)[1] == "codex"
+
+    def test_unscored_providers_keep_their_place(self):
+        orchestrator = orchestrator_with_scores(AdaptivePolicy(), {"claude": 5000, "gemini": 500})
+        assert orchestrator._failover_order("guidance", "claude", PROVIDERS) == ["claude", "codex", "gemini", "mock"]
+        assert orchestrator._failover_order("chat", "claude", PROVIDERS) == ["claude", "codex", "gemini", "mock"]
+
+    def test_primary_yields_only_within_its_tier_when_enabled(self):
+        latencies = {"claude": 6000, "codex": 2000, "gemini": 500}
+        tiers = (("claude", "codex"), ("gemini",))
+
+        fixed = orchestrator_with_scores(AdaptivePolicy(quality_tiers=tiers), latencies)
+        assert fixed._failover_order("guidance", "claude", PROVIDERS)[0] == "claude"
+
+        adaptive = orchestrator_with_scores(AdaptivePolicy(reorder_primary=True, quality_tiers=tiers), latencies)
+        assert adaptive._failover_order("guidance", "claude", PROVIDERS) == ["codex", "gemini", "claude", "mock"]
+
+    def test_small_differences_do_not_flip_the_primary(self):
+        policy = AdaptivePolicy(reorder_primary=True, switch_ratio=1.5)
+        orchestrator = orchestrator_with_scores(policy, {"claude": 1200, "codex": 1000})
+        assert orchestrator._failover_order("guidance", "claude", PROVIDERS)[0] == "claude"
+
+    def test_traffic_drains_from_a_degraded_fallback(self):
+        codex, gemini = Flaky("codex answer", failing=True), Flaky("gemini answer")
+        orchestrator = LLMOrchestrator(
+            guidance_providers={"mock": Flaky("mock"), "claude": Flaky(None, failing=True), "codex": codex, "gemini": gemini},
+            chat_providers={},
+            default_llm="claude",
+            adaptive=AdaptivePolicy(min_samples=2),
+        )
+
+        for _ in range(4):
+            assert orchestrator.generate_guidance(**KWARGS)[1] == "gemini"
+
+        assert codex.calls == 2
+        scores = orchestrator.routing_scores()["endpoints"]["guidance"]
+        assert scores["codex"]["error_rate"] > 0 and scores["gemini"]["error_rate"] == 0
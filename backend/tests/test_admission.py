@@ -0,0 +1,142 @@
+"""Tests for per-provider concurrency limits, the wait queue and 429 admission control."""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.services import llm_orchestrator
+from app.services.admission import ConcurrencyLimiter, ProviderOverloaded
+from app.services.cache import LRUCache, TieredCache
+from app.services.llm_orchestrator import ConcurrencyPolicy, LLMOrchestrator
+
+KWARGS = {"topic": "What is my duty?", "mode": "clarity", "language": "en", "verses": []}
+
+
+class Gated:
+    """Async provider whose calls block until ``gate`` is set."""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.gate = asyncio.Event()
+        self.calls = 0
+
+    async def agenerate(self, **kwargs):
+        self.calls += 1
+        await self.gate.wait()
+        return self.answer
+
+
+@pytest.fixture(autouse=True)
+def quiet_routing_log(monkeypatch):
+    monkeypatch.setattr(llm_orchestrator, "_log_routing", lambda entry: None)
+
+
+class TestConcurrencyLimiter:
+    def test_queue_full_is_rejected(self):
+        limiter = ConcurrencyLimiter("claude", max_in_flight=1, max_queue=0, max_wait_seconds=2.5)
+        limiter.acquire()
+
+        with pytest.raises(ProviderOverloaded) as excinfo:
+            limiter.acquire()
+
+        assert excinfo.value.retry_after == 3
+        assert limiter.stats()["rejected_queue_full"] == 1
+
+    def test_released_slot_goes_to_the_waiting_thread(self):
+        limiter = ConcurrencyLimiter("claude", max_in_flight=1, max_queue=1, max_wait_seconds=5)
+        limiter.acquire()
+        admitted = threading.Event()
+
+        def waiter():
+            limiter.acquire()
+            admitted.set()
+
+        thread = threading.Thread(target=waiter)
+        thread.start()
+        while limiter.stats()["queue_depth"] == 0:
+            time.sleep(0.001)
+        assert not limiter.try_acquire()
+        limiter.release()
+        thread.join(timeout=2)
+
+        assert admitted.is_set()
+        stats = limiter.stats()
+        assert stats["in_flight"] == 1 and stats["queue_depth"] == 0
+        assert stats["queued"] == 1 and stats["wait_ms"]["max"] > 0
+
+    def test_wait_times_out(self):
+        limiter = ConcurrencyLimiter("claude", max_in_flight=1, max_queue=4, max_wait_seconds=0.02)
+        limiter.acquire()
+
+        async def run():
+            with pytest.raises(ProviderOverloaded):
+                await limiter.aacquire()
+
+        asyncio.run(run())
+        assert limiter.stats()["rejected_wait_timeout"] == 1
+        assert limiter.stats()["queue_depth"] == 0
+
+
+class TestOrchestratorAdmission:
+    def test_saturated_primary_falls_over_to_the_next_provider(self):
+        claude, codex = Gated("claude answer"), Gated("codex answer")
+        codex.gate.set()
+        orchestrator = LLMOrchestrator(
+            guidance_providers={"mock": Gated("mock"), "claude": claude, "codex": codex},
+            chat_providers={},
+            default_llm="claude",
+            concurrency=ConcurrencyPolicy(max_in_flight={"claude": 1}, max_queue=0),
+        )
+
+        async def run():
+            first = asyncio.ensure_future(orchestrator.agenerate_guidance(**KWARGS))
+            await asyncio.sleep(0.01)
+            second = await orchestrator.agenerate_guidance(**KWARGS)
+            claude.gate.set()
+            return await first, second
+
+        assert asyncio.run(run()) == (("claude answer", "claude"), ("codex answer", "codex"))
+        assert orchestrator.concurrency_stats()["claude"]["in_flight"] == 0
+
+    def test_all_providers_saturated_raises_instead_of_mock(self):
+        claude, mock = Gated("claude answer"), Gated("mock")
+        mock.gate.set()
+        orchestrator = LLMOrchestrator(
+            guidance_providers={"mock": mock, "claude": claude},
+            chat_providers={},
+            default_llm="claude",
+            concurrency=ConcurrencyPolicy(max_in_flight={"claude": 1}, max_queue=1, max_wait_seconds=0.02),
+        )
+
+        async def run():
+            first = asyncio.ensure_future(orchestrator.agenerate_guidance(**KWARGS))
+            await asyncio.sleep(0.01)
+            with pytest.raises(ProviderOverloaded):
+                await orchestrator.agenerate_guidance(**KWARGS)
+            claude.gate.set()
+            return await first
+
+        assert asyncio.run(run()) == ("claude answer", "claude")
+        assert mock.calls == 0
+        assert orchestrator.concurrency_stats()["claude"]["rejected_wait_timeout"] == 1
+
+
+class TestOverloadedEndpoint:
+    def test_ask_returns_429_with_retry_after(self, monkeypatch):
+        verse = SimpleNamespace(id=47, chapter=2, verse_number=47, ref="2.47", translation="", tags=[])
+        monkeypatch.setattr(main, "cache", TieredCache(LRUCache()))
+        monkeypatch.setattr(main, "_retrieve_for_guidance", lambda *a, **k: (SimpleNamespace(verses=[verse]), None))
+
+        async def overloaded(**kwargs):
+            raise ProviderOverloaded("claude", 5, "queue full")
+
+        monkeypatch.setattr(main.orchestrator, "agenerate_guidance", overloaded)
+        response = TestClient(main.app).post("/ask", json={"question": "Why act?", "mode": "clarity", "language": "en"})
+
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "5"
@@ -0,0 +1,181 @@
+"""Tests for the async provider path: pooled clients, fallback, orchestration and the async endpoints."""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.services import llm_orchestrator
+from app.services.cache import LRUCache, TieredCache
+from app.services.chatbot import OllamaChatProvider
+from app.services.claude_provider import ClaudeProvider
+from app.services.guidance import MockProvider
+from app.services.http_client import PooledAsyncClient
+from app.services.llm_orchestrator import LLMOrchestrator
+from app.services.retrieval import RetrievalResult
+from app.services.single_flight import AsyncSingleFlight
+
+VERSE = SimpleNamespace(
+    id=47,
+    chapter=2,
+    verse_number=47,
+    ref="2.47",
+    sanskrit="karmaṇy-evādhikāras te",
+    transliteration="karmany evadhikaras te",
+    translation="You have a right to action alone, never to its fruits.",
+    tags=["duty"],
+)
+
+
+def claude_handler(requests: list[httpx.Request], *, status_code: int = 200):
+    guidance = MockProvider().generate(topic="duty", mode="clarity", language="en", verses=[VERSE])
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if status_code != 200:
+            return httpx.Response(status_code, json={"error": "overloaded"})
+        return httpx.Response(200, json={"content": [{"type": "text", "text": guidance.model_dump_json()}]})
+
+    return handle
+
+
+@pytest.fixture(autouse=True)
+def quiet_routing_log(monkeypatch):
+    monkeypatch.setattr(llm_orchestrator, "_log_routing", lambda entry: None)
+
+
+class TestPooledAsyncClient:
+    def test_client_is_reused_within_a_loop_and_replaced_across_loops(self):
+        pooled = PooledAsyncClient(timeout=5.0)
+
+        async def same_loop():
+            first = pooled.client
+            assert pooled.client is first
+            return first
+
+        first = asyncio.run(same_loop())
+        second = asyncio.run(same_loop())
+        assert second is not first
+
+    def test_client_left_on_an_old_loop_is_closed(self):
+        pooled = PooledAsyncClient(timeout=5.0, transport=httpx.MockTransport(lambda request: httpx.Response(200)))
+
+        async def request():
+            await pooled.client.get("https://example.test/")
+            return pooled.client
+
+        async def replace():
+            client = pooled.client
+            await asyncio.sleep(0)
+            return client
+
+        first = asyncio.run(request())
+        second = asyncio.run(replace())
+        assert first.is_closed
+        assert second is not first and not second.is_closed
+
+
+class TestAsyncProviders:
+    def test_claude_agenerate_reuses_one_client(self):
+        requests: list[httpx.Request] = []
+        provider = ClaudeProvider("key", "claude-test")
+        provider.http.transport = httpx.MockTransport(claude_handler(requests))
+
+        async def run():
+            results = await asyncio.gather(
+                *[
+                    provider.agenerate(topic="duty", mode="clarity", language="en", verses=[VERSE])
+                    for _ in range(3)
+                ]
+            )
+            client = provider.http.client
+            await provider.aclose()
+            return results, client
+
+        results, client = asyncio.run(run())
+        assert [result.verses[0].verse_id for result in results] == [47, 47, 47]
+        assert len(requests) == 3
+        assert requests[0].headers["x-api-key"] == "key"
+        assert json.loads(requests[0].content)["model"] == "claude-test"
+        assert client.is_closed
+
+    def test_upstream_error_is_raised_for_the_orchestrator(self):
+        requests: list[httpx.Request] = []
+        provider = OllamaChatProvider(base_url="http://ollama:11434/", model="llama")
+        provider.http.transport = httpx.MockTransport(claude_handler(requests, status_code=503))
+
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(
+                provider.agenerate(message="I feel lost", mode="comfort", language="en", history=[], verses=[VERSE])
+            )
+
+        assert str(requests[0].url) == "http://ollama:11434/api/generate"
+
+
+class TestAsyncOrchestrator:
+    def test_fails_over_and_runs_sync_only_providers_in_a_thread(self):
+        class Broken:
+            async def agenerate(self, **kwargs):
+                raise RuntimeError("boom")
+
+        class SyncOnly:
+            def generate(self, **kwargs):
+                return MockProvider().generate(**kwargs)
+
+        orchestrator = LLMOrchestrator(
+            guidance_providers={"claude": Broken(), "codex": SyncOnly()},
+            chat_providers={},
+            default_llm="claude",
+        )
+        result, model = asyncio.run(
+            orchestrator.agenerate_guidance(topic="What is my duty?", mode="clarity", language="en", verses=[VERSE])
+        )
+
+        assert model == "codex"
+        assert result.verses[0].ref == "2.47"
+        assert orchestrator.model_status()["claude"]["recent_failures"] == 1
+
+
+class TestAsyncSingleFlight:
+    def test_concurrent_callers_share_one_execution(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def generate():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "guidance"
+
+        async def run():
+            return await asyncio.gather(*[flight.do("ask:x", generate) for _ in range(5)])
+
+        assert asyncio.run(run()) == ["guidance"] * 5
+        assert len(calls) == 1
+        assert flight.stats() == {"in_flight": 0, "executions": 1, "coalesced": 4}
+
+
+class TestAsyncEndpoints:
+    def test_ask_is_served_by_the_async_path_and_cached(self, monkeypatch):
+        searches = []
+
+        def search(*, query, top_k, mode):
+            searches.append(query)
+            return RetrievalResult(verses=[VERSE], mode="lexical", query_vector=None, timings_ms={})
+
+        monkeypatch.setattr(main.retriever, "search", search)
+        monkeypatch.setattr(main, "cache", TieredCache(LRUCache()))
+        monkeypatch.setattr(main, "semantic_cache", None)
+        client = TestClient(main.app)
+
+        body = {"question": "What is my duty?", "mode": "clarity", "language": "en", "retrieval_mode": "lexical"}
+        first = client.post("/ask", json=body)
+        second = client.post("/ask", json=body)
+
+        assert first.status_code == 200
+        assert first.json()["verses"][0]["ref"] == "2.47"
+        assert second.json() == first.json()
+        assert searches == ["What is my duty?"]
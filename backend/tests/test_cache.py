@@ -0,0 +1,133 @@
+"""Tests for the bounded, striped response cache."""
+
+import time
+
+from app.services import cache as cache_module
+from app.services.cache import LRUCache, TieredCache, approximate_size
+
+
+def advance_clock(monkeypatch, seconds: float) -> None:
+    now = time.time() + seconds
+    monkeypatch.setattr(cache_module.time, "time", lambda: now)
+
+
+class TestLRUCache:
+    def test_evicts_least_recently_used_past_max_entries(self):
+        cache = LRUCache(max_entries=2, stripes=1)
+        cache.set("ask:a", 1)
+        cache.set("ask:b", 2)
+        cache.get("ask:a")
+        cache.set("ask:c", 3)
+
+        assert cache.get("ask:b") is None
+        assert cache.get("ask:a") == 1
+        assert cache.stats()["namespaces"]["ask"]["evictions"] == 1
+
+    def test_byte_budget_evicts_large_entries(self):
+        cache = LRUCache(max_bytes=4 * approximate_size("x" * 1000), stripes=1)
+        for i in range(10):
+            cache.set(f"chat:{i}", "x" * 1000)
+
+        stats = cache.stats()
+        assert stats["bytes"] <= stats["max_bytes"]
+        assert stats["entries"] == 4
+
+    def test_namespace_ttls(self, monkeypatch):
+        cache = LRUCache(default_ttl_seconds=300, namespace_ttls={"chat": 60, "verses": 0}, stripes=1)
+        cache.set("chat:hello", "reply")
+        cache.set("verses:all", ["2.47"])
+        advance_clock(monkeypatch, 10 * 24 * 3600)
+
+        assert cache.get("chat:hello") is None
+        assert cache.get("verses:all") == ["2.47"]
+        stats = cache.stats()["namespaces"]
+        assert stats["chat"]["expirations"] == 1
+        assert stats["verses"]["ttl_seconds"] is None
+
+    def test_sweep_removes_expired_entries_without_reads(self, monkeypatch):
+        cache = LRUCache(namespace_ttls={"chat": 60}, sweep_interval_seconds=0)
+        cache.set("chat:one", "a")
+        advance_clock(monkeypatch, 120)
+        cache.set("ask:two", "b")
+
+        assert cache.stats()["entries"] == 1
+        assert cache.stats()["namespaces"]["chat"]["entries"] == 0
+
+    def test_per_namespace_hit_rates(self):
+        cache = LRUCache()
+        cache.set("mood:calm", "guidance")
+        cache.get("mood:calm")
+        cache.get("mood:angry")
+
+        mood = cache.stats()["namespaces"]["mood"]
+        assert (mood["hits"], mood["misses"], mood["hit_rate"]) == (1, 1, 0.5)
+
+
+class DictStore:
+    """In-memory stand-in for PostgresResponseCache."""
+
+    def __init__(self, namespaces=None):
+        self.rows = {}
+        self.namespaces = namespaces
+        self.reads = 0
+
+    def get(self, key):
+        self.reads += 1
+        return self.rows.get(key)
+
+    def set(self, key, value, *, ttl_seconds):
+        self.rows[key] = (value, ttl_seconds)
+
+
+class BrokenStore:
+    def get(self, key):
+        raise ConnectionError("database unavailable")
+
+    def set(self, key, value, *, ttl_seconds):
+        raise ConnectionError("database unavailable")
+
+
+class TestTieredCache:
+    def test_l2_hit_is_promoted_to_l1(self):
+        shared = DictStore()
+        TieredCache(LRUCache(), shared).set("ask:clarity:en:vector:duty", "guidance")
+
+        other_worker = TieredCache(LRUCache(), shared)
+        assert other_worker.get("ask:clarity:en:vector:duty") == "guidance"
+        assert other_worker.l1.get("ask:clarity:en:vector:duty") == "guidance"
+        assert other_worker.stats()["l2"]["hits"] == 1
+
+    def test_writes_use_namespace_ttl(self):
+        shared = DictStore()
+        TieredCache(LRUCache(namespace_ttls={"chat": 120}), shared).set("chat:hi", "reply")
+        assert shared.rows["chat:hi"] == ("reply", 120)
+
+    def test_explicit_ttl_and_remaining_ttl(self):
+        shared = DictStore()
+        cache = TieredCache(LRUCache(), shared)
+        cache.set("morning:2026-03-01:clarity:en", "greeting", ttl_seconds=3600)
+
+        assert shared.rows["morning:2026-03-01:clarity:en"] == ("greeting", 3600)
+        assert 3590 < cache.remaining_ttl("morning:2026-03-01:clarity:en") <= 3600
+        assert cache.remaining_ttl("mood:missing") is None
+        assert 3590 < TieredCache(LRUCache(), shared).remaining_ttl("morning:2026-03-01:clarity:en") <= 3600
+
+    def test_namespaces_the_store_cannot_hold_skip_l2(self):
+        shared = DictStore(namespaces={"ask"})
+        cache = TieredCache(LRUCache(), shared)
+        cache.set("verses:701-abc:2", b"payload")
+
+        assert cache.get("verses:701-abc:3") is None
+        assert shared.rows == {} and shared.reads == 0
+        assert cache.stats()["l2"]["misses"] == 0
+
+        cache.set("ask:clarity:en:vector:duty", "guidance")
+        assert TieredCache(LRUCache(), shared).get("ask:clarity:en:vector:duty") == "guidance"
+
+    def test_l2_errors_degrade_to_l1(self):
+        cache = TieredCache(LRUCache(), BrokenStore())
+        cache.set("ask:x", "guidance")
+
+        assert cache.get("ask:x") == "guidance"
+        assert cache.get("ask:y") is None
+        assert cache.stats()["l2"]["errors"] == 2
@@ -0,0 +1,122 @@
+"""Tests for the per-provider circuit breaker in LLMOrchestrator."""
+
+import pytest
+
+from app.services import llm_orchestrator
+from app.services.llm_orchestrator import BreakerPolicy, LLMOrchestrator
+
+KWARGS = {"topic": "What is my duty?", "mode": "clarity", "language": "en", "verses": []}
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+
+class Flaky:
+    def __init__(self, answer):
+        self.answer = answer
+        self.failing = True
+        self.calls = 0
+
+    def generate(self, **kwargs):
+        self.calls += 1
+        if self.failing:
+            raise RuntimeError("upstream timeout")
+        return self.answer
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(llm_orchestrator, "time", fake)
+    monkeypatch.setattr(llm_orchestrator, "_log_routing", lambda entry: None)
+    return fake
+
+
+def make_orchestrator(claude):
+    class Mock:
+        def generate(self, **kwargs):
+            return "mock answer"
+
+    return LLMOrchestrator(
+        guidance_providers={"mock": Mock(), "claude": claude},
+        chat_providers={},
+        default_llm="claude",
+        breaker=BreakerPolicy(failure_threshold=3, window_seconds=60, cooldown_seconds=30),
+    )
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold_and_skips_the_provider(self, clock):
+        claude = Flaky("claude answer")
+        orchestrator = make_orchestrator(claude)
+
+        for _ in range(3):
+            assert orchestrator.generate_guidance(**KWARGS) == ("mock answer", "mock")
+        status = orchestrator.model_status()["claude"]
+        assert status["state"] == "open"
+        assert status["healthy"] is False
+        assert status["transitions"]["opened"] == 1
+
+        orchestrator.generate_guidance(**KWARGS)
+        assert claude.calls == 3
+
+    def test_failures_outside_the_window_do_not_open(self, clock):
+        orchestrator = make_orchestrator(Flaky("claude answer"))
+
+        for _ in range(5):
+            orchestrator.generate_guidance(**KWARGS)
+            clock.now += 31
+
+        assert orchestrator.model_status()["claude"]["state"] == "closed"
+
+    def test_half_open_probe_closes_on_success(self, clock):
+        claude = Flaky("claude answer")
+        orchestrator = make_orchestrator(claude)
+        for _ in range(3):
+            orchestrator.generate_guidance(**KWARGS)
+
+        clock.now += 31
+        claude.failing = False
+        assert orchestrator.generate_guidance(**KWARGS) == ("claude answer", "claude")
+
+        status = orchestrator.model_status()["claude"]
+        assert status["state"] == "closed"
+        assert status["transitions"] == {"opened": 1, "half_opened": 1, "closed": 1}
+
+    def test_failed_probe_reopens_for_another_cooldown(self, clock):
+        claude = Flaky("claude answer")
+        orchestrator = make_orchestrator(claude)
+        for _ in range(3):
+            orchestrator.generate_guidance(**KWARGS)
+
+        clock.now += 31
+        orchestrator.generate_guidance(**KWARGS)
+        assert claude.calls == 4
+        assert orchestrator.model_status()["claude"]["state"] == "open"
+
+        clock.now += 10
+        orchestrator.generate_guidance(**KWARGS)
+        assert claude.calls == 4
+
+    def test_only_one_probe_is_let_through(self, clock):
+        orchestrator = make_orchestrator(Flaky("claude answer"))
+        for _ in range(3):
+            orchestrator.generate_guidance(**KWARGS)
+        clock.now += 31
+
+        health = orchestrator._health["claude"]
+        assert health.allow_request() is True
+        assert health.allow_request() is False
+        health.release()
+        assert health.allow_request() is True
@@ -0,0 +1,156 @@
+"""Tests for ETag / If-None-Match handling on the verse endpoints (no database needed)."""
+
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.db import get_db
+from app.services.cache import LRUCache
+from app.services.dataset import ContentVersion
+
+VERSE = SimpleNamespace(
+    id=47,
+    chapter=2,
+    verse_number=47,
+    ref="2.47",
+    chapter_name="Sankhya Yoga",
+    sanskrit="karmaṇy-evādhikāras te",
+    transliteration="karmany evadhikaras te",
+    translation="You have a right to action alone.",
+    translation_hi="",
+    tags=["duty"],
+)
+
+
+class FakeSession:
+    def __init__(self):
+        self.lookups = 0
+        self.queries = 0
+
+    def get(self, model, verse_id):
+        self.lookups += 1
+        return VERSE if verse_id == VERSE.id else None
+
+    def scalar(self, statement):
+        return 1
+
+    def execute(self, statement):
+        self.queries += 1
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: [VERSE]), scalar_one=lambda: VERSE)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    session = FakeSession()
+    monkeypatch.setattr(main, "content_version", SimpleNamespace(get=lambda db: "701-abc123"))
+    monkeypatch.setattr(main.retriever, "_checked_at", float("inf"))
+    monkeypatch.setattr(main, "cache", LRUCache())
+    main.app.dependency_overrides[get_db] = lambda: session
+    yield TestClient(main.app), session
+    main.app.dependency_overrides.clear()
+
+
+class TestConditionalGet:
+    def test_verse_has_strong_etag_and_long_cache_control(self, client):
+        http, _session = client
+        response = http.get("/verses/47")
+
+        assert response.status_code == 200
+        assert response.headers["etag"] == '"701-abc123-verse-47"'
+        assert response.headers["cache-control"] == f"public, max-age={main.settings.static_cache_max_age_seconds}"
+
+    def test_matching_if_none_match_returns_304_without_loading(self, client):
+        http, session = client
+        response = http.get("/verses/47", headers={"If-None-Match": 'W/"other", "701-abc123-verse-47"'})
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == '"701-abc123-verse-47"'
+        assert session.lookups == 0
+
+    def test_new_dataset_version_invalidates_etag(self, client, monkeypatch):
+        http, _session = client
+        monkeypatch.setattr(main, "content_version", SimpleNamespace(get=lambda db: "701-def456"))
+        response = http.get("/verses/47", headers={"If-None-Match": '"701-abc123-verse-47"'})
+
+        assert response.status_code == 200
+        assert response.headers["etag"] == '"701-def456-verse-47"'
+
+    def test_daily_verse_is_served(self, client):
+        http, _session = client
+        response = http.get("/daily-verse")
+
+        assert response.status_code == 200
+        assert response.json()["ref"] == "2.47"
+
+    def test_daily_verse_304_and_max_age_ends_at_midnight(self, client):
+        http, session = client
+        etag = f'"701-abc123-daily-{date.today().isoformat()}"'
+        response = http.get("/daily-verse")
+
+        assert response.status_code == 200
+        assert response.json()["ref"] == "2.47"
+        assert response.headers["etag"] == etag
+        max_age = int(response.headers["cache-control"].removeprefix("public, max-age="))
+        midnight = datetime.combine(date.today() + timedelta(days=1), datetime.min.time())
+        assert 0 < max_age <= (midnight - datetime.now()).total_seconds() + 1
+
+        queries = session.queries
+        revalidated = http.get("/daily-verse", headers={"If-None-Match": etag})
+        assert revalidated.status_code == 304
+        assert revalidated.headers["etag"] == etag
+        assert session.queries == queries
+
+
+class TestPreEncodedVerseList:
+    def test_gzip_variant_has_its_own_etag_and_is_served_from_cache(self, client):
+        http, session = client
+        headers = {"Accept-Encoding": "gzip"}
+        first = http.get("/verses?chapter=2", headers=headers)
+        second = http.get("/verses?chapter=2", headers=headers)
+
+        assert first.headers["content-encoding"] == "gzip"
+        assert first.headers["etag"] == '"701-abc123-verses-2-gzip"'
+        assert first.headers["vary"] == "Accept-Encoding"
+        assert second.json() == first.json() == [main.VerseOut.model_validate(VERSE).model_dump()]
+        assert session.queries == 1
+
+    def test_identity_and_304_per_encoding(self, client):
+        http, _session = client
+        plain = http.get("/verses", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in plain.headers
+        assert plain.headers["etag"] == '"701-abc123-verses-all"'
+
+        revalidated = http.get(
+            "/verses", headers={"Accept-Encoding": "gzip", "If-None-Match": '"701-abc123-verses-all-gzip"'}
+        )
+        assert revalidated.status_code == 304
+
+
+class FingerprintSession:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(str(statement))
+        return SimpleNamespace(one=lambda: SimpleNamespace(total=701, digest=f"{len(self.statements):016x}"))
+
+
+class TestContentVersion:
+    def test_fingerprint_is_memoized_and_skips_embeddings(self, monkeypatch):
+        session = FingerprintSession()
+        version = ContentVersion(ttl_seconds=60)
+
+        assert version.get(session) == version.get(session) == "701-0000000000000001"
+        assert len(session.statements) == 1
+        assert "embedding" not in session.statements[0]
+
+    def test_reseed_is_noticed_once_the_ttl_passes(self):
+        session = FingerprintSession()
+        version = ContentVersion(ttl_seconds=0)
+
+        assert version.get(session) != version.get(session)
+        assert len(session.statements) == 2
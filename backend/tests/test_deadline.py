@@ -0,0 +1,144 @@
+"""Tests for the per-request deadline budget in LLMOrchestrator and the providers."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app import main
+from app.services import llm_orchestrator
+from app.services.cache import LRUCache, TieredCache
+from app.services.chatbot import MockChatProvider
+from app.services.deadline import Deadline
+from app.services.guidance import MockProvider
+from app.services.http_client import PooledAsyncClient
+from app.services.llm_orchestrator import LLMOrchestrator
+
+KWARGS = {"topic": "What is my duty?", "mode": "clarity", "language": "en", "verses": []}
+VERSE = SimpleNamespace(
+    id=47,
+    chapter=2,
+    verse_number=47,
+    ref="2.47",
+    sanskrit="karmaṇy-evādhikāras te",
+    transliteration="karmany evadhikaras te",
+    translation="You have a right to action alone, never to its fruits.",
+    tags=["duty"],
+)
+
+
+class Slow:
+    def __init__(self, delay):
+        self.delay = delay
+        self.timeouts = []
+
+    async def agenerate(self, *, timeout=None, **kwargs):
+        self.timeouts.append(timeout)
+        await asyncio.sleep(self.delay)
+        return "claude answer"
+
+
+class Mock:
+    def __init__(self):
+        self.timeouts = []
+
+    async def agenerate(self, *, timeout=None, **kwargs):
+        self.timeouts.append(timeout)
+        return "mock answer"
+
+
+def make_orchestrator(claude, mock):
+    return LLMOrchestrator(guidance_providers={"mock": mock, "claude": claude}, chat_providers={}, default_llm="claude")
+
+
+class TestDeadline:
+    def test_remaining_never_goes_negative(self):
+        assert Deadline.after(-1).remaining() == 0.0
+        assert Deadline.after(-1).expired
+        assert not Deadline.after(5).expired
+
+    def test_slow_provider_is_cut_off_and_the_mock_answers_in_budget(self, monkeypatch):
+        monkeypatch.setattr(llm_orchestrator, "_log_routing", lambda entry: None)
+        claude, mock = Slow(delay=5), Mock()
+        orchestrator = make_orchestrator(claude, mock)
+
+        start = time.monotonic()
+        result = asyncio.run(orchestrator.agenerate_guidance(**KWARGS, deadline=Deadline.after(0.05)))
+
+        assert result == ("mock answer", "mock")
+        assert time.monotonic() - start < 1
+        assert 0 < claude.timeouts[0] <= 0.05
+        assert mock.timeouts == [None]
+        # Running out of budget is not counted against the provider.
+        assert orchestrator.model_status()["claude"]["recent_failures"] == 0
+
+    def test_expired_deadline_skips_straight_to_the_mock(self, monkeypatch):
+        monkeypatch.setattr(llm_orchestrator, "_log_routing", lambda entry: None)
+        claude = Slow(delay=0)
+        orchestrator = make_orchestrator(claude, Mock())
+
+        result = asyncio.run(orchestrator.agenerate_guidance(**KWARGS, deadline=Deadline.after(-1)))
+
+        assert result == ("mock answer", "mock")
+        assert claude.timeouts == []
+
+    def test_client_timeout_is_capped_by_the_budget(self):
+        http = PooledAsyncClient(timeout=30)
+        assert http.request_timeout(None) == 30
+        assert http.request_timeout(2.5) == 2.5
+        assert http.request_timeout(90) == 30
+        assert http.request_timeout(0) > 0
+
+    def test_stream_stops_at_the_deadline(self, monkeypatch):
+        monkeypatch.setattr(llm_orchestrator, "_log_routing", lambda entry: None)
+
+        class Stalled:
+            async def astream(self, **kwargs):
+                yield '{"mode": "clarity", "reply": "Partial'
+                await asyncio.sleep(5)
+                raise httpx.ReadTimeout("never")
+
+        orchestrator = LLMOrchestrator(
+            guidance_providers={},
+            chat_providers={"claude": Stalled(), "mock": MockChatProvider()},
+            default_llm="claude",
+        )
+
+        async def run():
+            kwargs = {"message": "hi", "mode": "clarity", "language": "en", "history": [], "verses": [VERSE]}
+            return [event async for event in orchestrator.astream_chat(**kwargs, deadline=Deadline.after(0.05))]
+
+        start = time.monotonic()
+        events = asyncio.run(run())
+
+        assert time.monotonic() - start < 1
+        assert events[0] == ("token", "Partial")
+        assert events[-1][1][1] == "mock"
+        assert orchestrator.model_status()["claude"]["recent_failures"] == 0
+
+
+class TestMockFallbackIsNotCached:
+    def test_expired_deadline_answer_is_not_cached(self, monkeypatch):
+        monkeypatch.setattr(llm_orchestrator, "_log_routing", lambda entry: None)
+        stored = []
+        semantic = SimpleNamespace(lookup=lambda *args: None, store=lambda *args: stored.append(args))
+        retrieval = SimpleNamespace(verses=[VERSE], query_vector=[1.0, 0.0])
+        claude = Slow(delay=0)
+        monkeypatch.setattr(main, "cache", TieredCache(LRUCache()))
+        monkeypatch.setattr(main, "semantic_cache", semantic)
+        monkeypatch.setattr(main.retriever, "search", lambda **kwargs: retrieval)
+        monkeypatch.setattr(main, "_deadline", lambda endpoint: Deadline.after(-1))
+        monkeypatch.setattr(
+            main,
+            "orchestrator",
+            LLMOrchestrator({"mock": MockProvider(), "claude": claude}, {}, default_llm="claude"),
+        )
+
+        response = TestClient(main.app).post("/ask", json={"question": "Why act?", "mode": "clarity", "language": "en"})
+
+        assert response.status_code == 200
+        assert claude.timeouts == []
+        assert main.cache.stats()["entries"] == 0
+        assert stored == []
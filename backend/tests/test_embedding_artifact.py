@@ -0,0 +1,40 @@
+"""Tests for the precomputed, memory-mapped verse embedding artifact."""
+
+import numpy as np
+
+from app.services.embedding_artifact import (
+    artifact_model_key,
+    dataset_hash,
+    load_embedding_artifact,
+    save_embedding_artifact,
+)
+
+ITEMS = [("2.47", "karma action duty"), ("6.35", "restless mind practice"), ("18.66", "surrender")]
+
+
+class TestEmbeddingArtifact:
+    def test_round_trip_is_memory_mapped(self, tmp_path):
+        vectors = np.arange(9, dtype=np.float32).reshape(3, 3)
+        path = save_embedding_artifact(tmp_path, "all-MiniLM-L6-v2", ITEMS, vectors)
+        assert path.name.startswith("all-MiniLM-L6-v2-")
+
+        artifact = load_embedding_artifact(tmp_path, "all-MiniLM-L6-v2", list(reversed(ITEMS)))
+
+        assert artifact is not None
+        assert isinstance(artifact.vectors, np.memmap)
+        assert artifact.vectors[artifact.rows_by_ref()["6.35"]].tolist() == [3.0, 4.0, 5.0]
+
+    def test_changed_text_or_model_misses(self, tmp_path):
+        save_embedding_artifact(tmp_path, "all-MiniLM-L6-v2", ITEMS, np.ones((3, 2), dtype=np.float32))
+
+        edited = [ITEMS[0], ("6.35", "restless mind, practice"), ITEMS[2]]
+        assert load_embedding_artifact(tmp_path, "all-MiniLM-L6-v2", edited) is None
+        assert load_embedding_artifact(tmp_path, "hash-64", ITEMS) is None
+
+    def test_hash_is_order_independent(self):
+        assert dataset_hash(ITEMS) == dataset_hash(list(reversed(ITEMS)))
+
+    def test_model_keys(self):
+        assert artifact_model_key("hash", "ignored", dimension=64) == "hash-64"
+        assert artifact_model_key("sentence_transformer", "sentence-transformers/all-MiniLM-L6-v2", dimension=384) == "all-MiniLM-L6-v2"
+        assert artifact_model_key("onnx", "all-MiniLM-L6-v2", dimension=384, quantized=True) == "all-MiniLM-L6-v2-onnx-int8"
@@ -0,0 +1,91 @@
+"""Tests for the local embedding providers and the query embedding cache (no model download needed)."""
+
+import numpy as np
+
+from app.services.embedding_cache import CachedEmbeddingProvider, EmbeddingCache
+from app.services.embeddings import LocalHashEmbeddingProvider
+
+
+class TestLocalHashEmbeddingProvider:
+    def test_embed_many_matches_embed(self):
+        provider = LocalHashEmbeddingProvider(dimension=64)
+        texts = ["peace of mind", "karma yoga action action", "मन की शांति", ""]
+        matrix = provider.embed_many(texts, batch_size=2)
+
+        assert matrix.shape == (4, 64)
+        assert matrix.dtype == np.float32
+        expected = np.array([provider.embed(text) for text in texts], dtype=np.float32)
+        assert np.allclose(matrix, expected, atol=1e-6)
+
+    def test_rows_are_unit_norm_or_zero(self):
+        matrix = LocalHashEmbeddingProvider(dimension=32).embed_many(["duty", "", "surrender to me"])
+        norms = np.linalg.norm(matrix, axis=1)
+        assert np.allclose(norms, [1.0, 0.0, 1.0], atol=1e-6)
+
+    def test_buckets_are_stable_across_instances(self):
+        assert LocalHashEmbeddingProvider(16).embed("dharma") == LocalHashEmbeddingProvider(16).embed("dharma")
+
+
+class CountingProvider:
+    dimension = 3
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed(self, text: str) -> list[float]:
+        self.calls += 1
+        return [float(len(text)), 0.0, 1.0]
+
+
+class TestEmbeddingCache:
+    def test_whitespace_and_case_variants_share_an_entry(self):
+        provider = CountingProvider()
+        cached = CachedEmbeddingProvider(provider, EmbeddingCache(max_entries=8))
+
+        first = cached.embed("How do I  handle Anxiety?")
+        second = cached.embed("  how do i handle anxiety?")
+
+        assert first == second
+        assert provider.calls == 1
+        stats = cached.cache.stats()
+        assert (stats["hits"], stats["misses"]) == (1, 1)
+
+    def test_lru_eviction_is_counted(self):
+        cache = EmbeddingCache(max_entries=2)
+        cache.put("a", [1.0])
+        cache.put("b", [2.0])
+        cache.get("a")
+        cache.put("c", [3.0])
+
+        assert cache.get("b") is None
+        assert cache.get("a") == (1.0,)
+        assert cache.stats()["evictions"] == 1
+
+    def test_persists_and_reloads(self, tmp_path):
+        path = tmp_path / "embeddings.npz"
+        cache = EmbeddingCache(max_entries=4, model_name="m", path=path)
+        cache.put("peace", [0.5, 0.25])
+        cache.put("duty", [1.0, 0.0])
+        assert cache.save()
+
+        restored = EmbeddingCache(max_entries=4, model_name="m", path=path)
+        assert restored.load(dimension=2) == 2
+        assert restored.get("Peace") == (0.5, 0.25)
+        assert [p.name for p in tmp_path.iterdir()] == ["embeddings.npz"]
+
+    def test_truncated_file_loads_as_a_cold_cache(self, tmp_path):
+        path = tmp_path / "embeddings.npz"
+        cache = EmbeddingCache(model_name="m", path=path)
+        cache.put("peace", [0.5, 0.25])
+        cache.save()
+        path.write_bytes(path.read_bytes()[:40])
+
+        assert EmbeddingCache(model_name="m", path=path).load() == 0
+
+    def test_ignores_file_from_another_model(self, tmp_path):
+        path = tmp_path / "embeddings.npz"
+        cache = EmbeddingCache(model_name="old", path=path)
+        cache.put("peace", [0.5])
+        cache.save()
+
+        assert EmbeddingCache(model_name="new", path=path).load() == 0
@@ -0,0 +1,41 @@
+"""Tests for pre-serialized, precompressed response bodies."""
+
+import gzip
+
+import pytest
+
+from app.services import encoded_payload
+from app.services.encoded_payload import EncodedPayload, choose_encoding
+
+
+class TestChooseEncoding:
+    @pytest.mark.parametrize(
+        ("header", "expected"),
+        [
+            (None, None),
+            ("identity", None),
+            ("gzip, deflate", "gzip"),
+            ("gzip;q=0, *;q=0.5", "br" if encoded_payload.brotli else None),
+            ("br;q=0.5, gzip", "gzip"),
+            ("GZIP;q=0.8", "gzip"),
+        ],
+    )
+    def test_respects_quality_values(self, header, expected):
+        assert choose_encoding(header) == expected
+
+    def test_prefers_brotli_on_ties_when_available(self):
+        expected = "br" if encoded_payload.brotli else "gzip"
+        assert choose_encoding("gzip, deflate, br") == expected
+
+
+class TestEncodedPayload:
+    def test_variants_decode_to_the_same_body(self):
+        body = b'[{"ref":"2.47","translation":"' + b"action " * 200 + b'"}]'
+        payload = EncodedPayload.from_json(body)
+
+        assert gzip.decompress(payload.body("gzip")) == body
+        assert len(payload.gzip) < len(body)
+        if payload.br is not None:
+            assert encoded_payload.brotli.decompress(payload.body("br")) == body
+        assert payload.body(None) == body
+        assert payload.nbytes == len(body) + len(payload.gzip) + len(payload.br or b"")
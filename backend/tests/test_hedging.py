@@ -0,0 +1,132 @@
+"""Tests for hedged provider calls and failover ordering in LLMOrchestrator."""
+
+import asyncio
+
+import pytest
+
+from app.services import llm_orchestrator
+from app.services.llm_orchestrator import ConcurrencyPolicy, HedgePolicy, LLMOrchestrator
+
+KWARGS = {"topic": "What is my duty?", "mode": "clarity", "language": "en", "verses": []}
+
+
+class Provider:
+    def __init__(self, answer, *, delay=0.0, error=None):
+        self.answer = answer
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.cancelled = False
+
+    async def agenerate(self, **kwargs):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.answer
+
+
+@pytest.fixture
+def routing_log(monkeypatch):
+    entries = []
+    monkeypatch.setattr(llm_orchestrator, "_log_routing", entries.append)
+    return entries
+
+
+def orchestrate(providers, hedge=HedgePolicy(delay_ms=20, percentile=0)):
+    orchestrator = LLMOrchestrator(guidance_providers=providers, chat_providers={}, default_llm="claude", hedge=hedge)
+    return orchestrator, asyncio.run(orchestrator.agenerate_guidance(**KWARGS))
+
+
+class TestHedging:
+    def test_slow_primary_is_hedged_and_cancelled(self, routing_log):
+        claude = Provider("claude answer", delay=5)
+        codex = Provider("codex answer", delay=0.01)
+        orchestrator, (result, model) = orchestrate({"mock": Provider("mock"), "claude": claude, "codex": codex})
+
+        assert (result, model) == ("codex answer", "codex")
+        assert claude.cancelled
+        assert orchestrator.hedge_stats()["hedge_won"] == 1
+        assert orchestrator.hedge_stats()["extra_calls"] == 1
+        assert routing_log[-1]["hedged_to"] == "codex"
+        assert routing_log[-1]["hedge_won"] is True
+        # The abandoned primary ran from its launch until codex answered, past the 20 ms hedge delay.
+        assert routing_log[-1]["hedge_loser_ms"] >= 20
+        assert orchestrator.hedge_stats()["loser_ms"] == routing_log[-1]["hedge_loser_ms"]
+
+    def test_fast_primary_is_not_hedged(self, routing_log):
+        codex = Provider("codex answer")
+        orchestrator, (_result, model) = orchestrate({"claude": Provider("claude answer"), "codex": codex})
+
+        assert model == "claude"
+        assert codex.calls == 0
+        assert orchestrator.hedge_stats()["fired"] == 0
+        assert "hedged_to" not in routing_log[-1]
+
+    def test_primary_still_wins_if_it_answers_first_after_the_hedge(self, routing_log):
+        codex = Provider("codex answer", delay=5)
+        orchestrator, (_result, model) = orchestrate({"claude": Provider("claude answer", delay=0.05), "codex": codex})
+
+        assert model == "claude"
+        assert codex.cancelled
+        assert orchestrator.hedge_stats()["primary_won"] == 1
+        assert routing_log[-1]["hedge_won"] is False
+
+    def test_mock_is_never_a_hedge_target(self, routing_log):
+        mock = Provider("mock answer")
+        orchestrator, (_result, model) = orchestrate({"mock": mock, "claude": Provider("claude answer", delay=0.05)})
+
+        assert model == "claude"
+        assert mock.calls == 0
+
+    def test_failures_fall_over_to_the_mock_last(self, routing_log):
+        providers = {
+            "mock": Provider("mock answer"),
+            "claude": Provider(None, error=RuntimeError("overloaded")),
+            "codex": Provider(None, error=RuntimeError("overloaded")),
+        }
+        orchestrator, (_result, model) = orchestrate(providers, hedge=None)
+
+        assert model == "mock"
+        assert providers["codex"].calls == 1
+        assert orchestrator.model_status()["claude"]["recent_failures"] == 1
+
+    def test_hedge_cancelled_before_it_starts_gives_back_its_slot(self, routing_log):
+        codex = Provider("codex answer")
+        orchestrator = LLMOrchestrator(
+            guidance_providers={"mock": Provider("mock"), "codex": codex},
+            chat_providers={},
+            default_llm="codex",
+            hedge=HedgePolicy(delay_ms=20, percentile=0),
+            concurrency=ConcurrencyPolicy(max_in_flight={"codex": 1}),
+        )
+        health = orchestrator._health["codex"]
+        health.state = "half_open"
+
+        async def run():
+            assert orchestrator._claim_free_slot("codex", None)
+            started = set()
+            task = orchestrator._launch("guidance", "codex", codex, KWARGS, None, started)
+            orchestrator._abandon({task: "codex"}, started)
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(run())
+
+        assert codex.calls == 0
+        assert orchestrator.concurrency_stats()["codex"]["in_flight"] == 0
+        # The half-open probe permit was handed back, so the next caller may probe.
+        assert health.allow_request()
+
+    def test_hedge_delay_tracks_the_rolling_percentile(self):
+        orchestrator = LLMOrchestrator({}, {}, hedge=HedgePolicy(delay_ms=4000, percentile=95, min_samples=20))
+        assert orchestrator._hedge_delay("guidance", "claude") == 4.0
+
+        for ms in range(1, 101):
+            orchestrator._record_latency("guidance", "claude", ms / 1000)
+
+        assert orchestrator._hedge_delay("guidance", "claude") == pytest.approx(0.096)
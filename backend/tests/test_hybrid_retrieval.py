@@ -0,0 +1,104 @@
+"""Tests for retrieval modes and reciprocal-rank fusion.
+
+Both indexes are built directly from stand-in verses, so the retriever never
+opens a database session.
+"""
+
+from dataclasses import dataclass, field
+
+from app.services.lexical_index import BM25Index
+from app.services.retrieval import VerseRetriever, reciprocal_rank_fusion
+from app.services.vector_index import VerseVectorIndex
+
+
+@dataclass
+class VerseStub:
+    id: int
+    ref: str
+    translation: str
+    embedding: list[float]
+    transliteration: str = ""
+    translation_hi: str = ""
+    tags: list[str] = field(default_factory=list)
+
+
+VERSES = [
+    VerseStub(1, "2.47", "You have a right to action, never to its fruits.", [1.0, 0.0, 0.0]),
+    VerseStub(2, "2.70", "The one undisturbed by desires attains peace.", [0.0, 1.0, 0.0]),
+    VerseStub(3, "6.26", "Wherever the restless mind wanders, bring it back.", [0.0, 0.0, 1.0]),
+    VerseStub(4, "6.35", "The mind is restless, but it is restrained by practice.", [0.0, 0.7, 0.7]),
+]
+
+
+class FixedEmbedder:
+    dimension = 3
+
+    def __init__(self, vector: list[float]):
+        self.vector = vector
+        self.calls = 0
+
+    def embed(self, text: str) -> list[float]:
+        self.calls += 1
+        return self.vector
+
+
+def make_retriever(vector: list[float], mode: str = "vector") -> VerseRetriever:
+    vector_index = VerseVectorIndex()
+    vector_index.build(VERSES)
+    lexical_index = BM25Index()
+    lexical_index.build(VERSES)
+
+    def no_session():
+        raise AssertionError("retriever should not touch the database")
+
+    return VerseRetriever(
+        session_factory=no_session,
+        embedding_provider=FixedEmbedder(vector),
+        vector_index=vector_index,
+        lexical_index=lexical_index,
+        default_mode=mode,
+    )
+
+
+class TestReciprocalRankFusion:
+    def test_documents_in_both_lists_rank_first(self):
+        a, b, c = VERSES[0], VERSES[1], VERSES[2]
+        fused = reciprocal_rank_fusion([[a, b], [b, c]])
+        assert [v.id for v in fused] == [2, 1, 3]
+
+    def test_empty_rankings(self):
+        assert reciprocal_rank_fusion([[], []]) == []
+
+
+class TestRetrievalModes:
+    def test_vector_mode_uses_embedding(self):
+        retriever = make_retriever([0.0, 1.0, 0.0])
+        result = retriever.search("anything", 1)
+        assert [v.ref for v in result.verses] == ["2.70"]
+        assert set(result.timings_ms) == {"embed", "vector"}
+
+    def test_lexical_mode_skips_embedder(self):
+        retriever = make_retriever([0.0, 1.0, 0.0])
+        result = retriever.search("restless mind", 2, mode="lexical")
+        assert retriever.embedding_provider.calls == 0
+        assert result.query_vector is None
+        assert {v.ref for v in result.verses} == {"6.26", "6.35"}
+
+    def test_hybrid_mode_fuses_both_passes(self):
+        retriever = make_retriever([0.0, 1.0, 0.0], mode="hybrid")
+        result = retriever.search("restless mind practice", 1)
+        # 6.35 is second in the vector ranking and first lexically.
+        assert [v.ref for v in result.verses] == ["6.35"]
+        assert {"embed", "vector", "lexical", "fusion"} <= set(result.timings_ms)
+
+    def test_request_mode_overrides_default(self):
+        retriever = make_retriever([1.0, 0.0, 0.0], mode="hybrid")
+        assert retriever.search("peace", 1, mode="vector").mode == "vector"
+
+    def test_stage_timings_are_aggregated(self):
+        retriever = make_retriever([1.0, 0.0, 0.0], mode="hybrid")
+        retriever.retrieve("peace", 2)
+        retriever.retrieve("action", 2)
+        timings = retriever.stats()["stage_timings"]
+        assert timings["fusion"]["count"] == 2
+        assert timings["fusion"]["max_ms"] < 1.0
@@ -0,0 +1,72 @@
+"""Tests for the BM25 lexical index and the Unicode-aware tokenizer."""
+
+from dataclasses import dataclass, field
+
+from app.services.embeddings import tokenize_terms
+from app.services.lexical_index import BM25Index
+
+
+@dataclass
+class VerseStub:
+    id: int
+    ref: str
+    translation: str
+    transliteration: str = ""
+    translation_hi: str = ""
+    tags: list[str] = field(default_factory=list)
+
+
+VERSES = [
+    VerseStub(1, "2.47", "You have a right to action, never to its fruits.", "karmany evadhikaras te",
+              "कर्म करने में ही तुम्हारा अधिकार है, फल में कभी नहीं।", ["duty", "action"]),
+    VerseStub(2, "2.70", "The one who is undisturbed by desires attains peace.", "apuryamanam achala",
+              "जो कामनाओं से विचलित नहीं होता वही शांति पाता है।", ["peace", "equanimity"]),
+    VerseStub(3, "6.26", "Wherever the restless mind wanders, bring it back.", "yato yato nishcharati",
+              "चंचल मन जहाँ जहाँ भटके, उसे वापस लाओ।", ["mind", "meditation"]),
+    VerseStub(4, "18.66", "Abandon all varieties of dharma and surrender unto me.", "sarva-dharman parityajya",
+              "सब धर्मों को छोड़कर मेरी शरण में आओ।", ["surrender"]),
+]
+
+
+def build_index() -> BM25Index:
+    index = BM25Index()
+    index.build(VERSES)
+    return index
+
+
+class TestTokenizer:
+    def test_keeps_devanagari_words_whole(self):
+        assert tokenize_terms("मन की शांति।") == ["मन", "की", "शांति"]
+
+    def test_keeps_telugu_words_whole(self):
+        assert tokenize_terms("మనసు శాంతి") == ["మనసు", "శాంతి"]
+
+    def test_lowercases_latin_and_keeps_duplicates(self):
+        assert tokenize_terms("Peace, peace!") == ["peace", "peace"]
+
+
+class TestBM25Index:
+    def test_english_query_ranks_best_match_first(self):
+        results = build_index().search("how do I find peace", 3)
+        assert results[0].ref == "2.70"
+
+    def test_hindi_query_matches_hindi_translation(self):
+        results = build_index().search("मन को शांत कैसे करें", 3)
+        assert results[0].ref == "6.26"
+
+    def test_tags_are_indexed(self):
+        results = build_index().search("surrender", 1)
+        assert [v.ref for v in results] == ["18.66"]
+
+    def test_rare_terms_outweigh_common_terms(self):
+        results = build_index().search("restless action", 4)
+        assert {v.ref for v in results[:2]} == {"6.26", "2.47"}
+
+    def test_unknown_terms_return_nothing(self):
+        assert build_index().search("zzzz qqqq", 3) == []
+
+    def test_top_k_is_respected(self):
+        assert len(build_index().search("the to", 2)) <= 2
+
+    def test_empty_index(self):
+        assert BM25Index().search("peace", 3) == []
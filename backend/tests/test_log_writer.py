@@ -0,0 +1,115 @@
+"""Tests for the background, batched routing-log writer."""
+
+import json
+import os
+import subprocess
+import sys
+from datetime import date, datetime
+from pathlib import Path
+
+from app.services.log_writer import BatchedLogWriter
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+
+def lines(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+class TestBatchedLogWriter:
+    def test_entries_are_written_in_batches(self, tmp_path):
+        writer = BatchedLogWriter(tmp_path / "routing.log", batch_size=10, flush_interval_seconds=5)
+
+        for i in range(25):
+            assert writer.write({"n": i})
+        assert writer.flush()
+
+        assert [entry["n"] for entry in lines(writer.active_path)] == list(range(25))
+        stats = writer.stats()
+        assert stats["written"] == 25 and stats["dropped"] == 0
+        assert stats["batches"] <= 4
+
+    def test_time_trigger_flushes_a_partial_batch(self, tmp_path):
+        writer = BatchedLogWriter(tmp_path / "routing.log", batch_size=1000, flush_interval_seconds=0.01)
+        writer.write({"n": 1})
+        writer.flush()
+
+        assert lines(writer.active_path) == [{"n": 1}]
+
+    def test_full_queue_drops_instead_of_blocking(self, tmp_path, monkeypatch):
+        writer = BatchedLogWriter(tmp_path / "routing.log", max_queue=2)
+        monkeypatch.setattr(writer, "_ensure_running", lambda: None)  # no thread draining the queue
+
+        results = [writer.write({"n": i}) for i in range(5)]
+
+        assert results == [True, True, False, False, False]
+        assert writer.stats()["dropped"] == 3
+
+    def test_rotates_by_size_and_keeps_backup_count(self, tmp_path):
+        writer = BatchedLogWriter(
+            tmp_path / "routing.log", batch_size=1, max_bytes=100, backup_count=2, today=lambda: date(2026, 3, 1)
+        )
+
+        for i in range(10):
+            writer.write({"n": i, "padding": "x" * 40})
+            writer.flush()
+
+        backups = sorted(p.name for p in tmp_path.glob("routing.*.log.*"))
+        assert len(backups) == 2
+        assert all(name.startswith(f"routing.{os.getpid()}.log.2026-03-01.") for name in backups)
+        assert writer.active_path.stat().st_size <= 100
+        assert writer.stats()["rotations"] >= 4
+
+    def test_rotates_when_the_day_changes(self, tmp_path):
+        day = {"today": date(2026, 3, 1)}
+        writer = BatchedLogWriter(tmp_path / "routing.log", batch_size=1, today=lambda: day["today"])
+        path = writer.active_path
+
+        writer.write({"n": 1})
+        writer.flush()
+        day["today"] = date(2026, 3, 2)
+        writer.write({"n": 2})
+        writer.flush()
+
+        assert lines(path.with_name(f"{path.name}.2026-03-01.1")) == [{"n": 1}]
+        assert lines(path) == [{"n": 2}]
+
+    def test_stale_file_from_an_earlier_day_is_rotated_on_open(self, tmp_path):
+        writer = BatchedLogWriter(tmp_path / "routing.log", batch_size=1, today=lambda: date(2026, 3, 2))
+        path = writer.active_path
+        path.write_text('{"n": 0}\n', encoding="utf-8")
+        stamp = datetime(2026, 3, 1, 12).timestamp()
+        os.utime(path, (stamp, stamp))
+
+        writer.write({"n": 1})
+        writer.flush()
+
+        assert lines(path.with_name(f"{path.name}.2026-03-01.1")) == [{"n": 0}]
+        assert lines(path) == [{"n": 1}]
+
+    def test_files_of_exited_processes_are_rotated(self, tmp_path):
+        exited = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+        orphan = tmp_path / f"routing.{exited.stdout.strip()}.log"
+        orphan.write_text('{"n": 0}\n', encoding="utf-8")
+        stamp = datetime(2026, 3, 1, 12).timestamp()
+        os.utime(orphan, (stamp, stamp))
+
+        writer = BatchedLogWriter(tmp_path / "routing.log", batch_size=1, today=lambda: date(2026, 3, 2))
+        writer.write({"n": 1})
+        writer.flush()
+
+        assert not orphan.exists()
+        assert lines(orphan.with_name(f"{orphan.name}.2026-03-01.1")) == [{"n": 0}]
+
+    def test_each_process_writes_its_own_file(self, tmp_path):
+        path = tmp_path / "routing.log"
+        script = (
+            "import sys; from pathlib import Path; from app.services.log_writer import BatchedLogWriter; "
+            "w = BatchedLogWriter(Path(sys.argv[1])); [w.write({'n': i}) for i in range(50)]; w.flush()"
+        )
+        workers = [subprocess.Popen([sys.executable, "-c", script, str(path)], cwd=BACKEND) for _ in range(3)]
+        assert [worker.wait(timeout=30) for worker in workers] == [0, 0, 0]
+
+        files = sorted(tmp_path.glob("routing.*.log"))
+        assert len(files) == 3
+        assert all([entry["n"] for entry in lines(file)] == list(range(50)) for file in files)
@@ -0,0 +1,88 @@
+"""Tests for choosing, creating and dropping the pgvector ANN index on verses.embedding.
+
+The engine is replaced by a recorder, so no database is needed.
+"""
+
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from app import db
+
+
+class RecordingEngine:
+    def __init__(self, existing):
+        self.existing = existing
+        self.statements = []
+
+    @contextmanager
+    def begin(self):
+        yield self
+
+    def execute(self, statement, params=None):
+        sql = " ".join(str(statement).split())
+        self.statements.append(sql)
+        rows = self.existing if sql.startswith("SELECT indexname") else []
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: list(rows)))
+
+
+@pytest.fixture
+def index_settings(monkeypatch):
+    def configure(**overrides):
+        values = {
+            "pgvector_index": "hnsw",
+            "pgvector_hnsw_m": 16,
+            "pgvector_hnsw_ef_construction": 64,
+            "pgvector_ivfflat_lists": 100,
+        }
+        values.update(overrides)
+        for name, value in values.items():
+            monkeypatch.setattr(db.settings, name, value)
+
+    return configure
+
+
+class TestVectorIndexName:
+    def test_parameters_are_part_of_the_name(self, index_settings):
+        index_settings(pgvector_hnsw_m=32)
+        assert db.vector_index_name() == "ix_verses_embedding_hnsw_m32_ef64"
+
+        index_settings(pgvector_index="ivfflat", pgvector_ivfflat_lists=50)
+        assert db.vector_index_name() == "ix_verses_embedding_ivfflat_l50"
+
+        index_settings(pgvector_index="none")
+        assert db.vector_index_name() is None
+
+
+class TestEnsureVectorIndex:
+    def test_stale_variants_are_dropped_under_the_advisory_lock(self, index_settings, monkeypatch):
+        index_settings()
+        engine = RecordingEngine(["ix_verses_embedding_hnsw_m16_ef64", "ix_verses_embedding_ivfflat_l100"])
+        monkeypatch.setattr(db, "engine", engine)
+
+        assert db.ensure_vector_index() == "ix_verses_embedding_hnsw_m16_ef64"
+
+        assert engine.statements[0].startswith("SELECT pg_advisory_xact_lock")
+        drops = [sql for sql in engine.statements if sql.startswith("DROP INDEX")]
+        assert drops == ['DROP INDEX IF EXISTS "ix_verses_embedding_ivfflat_l100"']
+        create = next(sql for sql in engine.statements if sql.startswith("CREATE INDEX"))
+        assert "USING hnsw" in create and "m = 16, ef_construction = 64" in create
+
+    def test_none_drops_every_managed_index(self, index_settings, monkeypatch):
+        index_settings(pgvector_index="none")
+        engine = RecordingEngine(["ix_verses_embedding_hnsw_m16_ef64"])
+        monkeypatch.setattr(db, "engine", engine)
+
+        assert db.ensure_vector_index() is None
+        assert not any(sql.startswith("CREATE INDEX") for sql in engine.statements)
+        assert 'DROP INDEX IF EXISTS "ix_verses_embedding_hnsw_m16_ef64"' in engine.statements
+
+    def test_reindex_rebuilds_an_existing_ivfflat_index(self, index_settings, monkeypatch):
+        index_settings(pgvector_index="ivfflat")
+        engine = RecordingEngine(["ix_verses_embedding_ivfflat_l100"])
+        monkeypatch.setattr(db, "engine", engine)
+
+        db.ensure_vector_index(reindex=True)
+
+        assert engine.statements[-1] == 'REINDEX INDEX "ix_verses_embedding_ivfflat_l100"'
@@ -0,0 +1,123 @@
+"""Tests for static prompt prefixes, and how each provider sends them, against a local stand-in API."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import claude_provider
+from app.services.chatbot import OllamaChatProvider
+from app.services.claude_provider import ClaudeProvider
+from app.services.codex_provider import CodexChatProvider
+
+VERSE = SimpleNamespace(
+    id=47,
+    ref="2.47",
+    sanskrit="karmaṇy-evādhikāras te",
+    transliteration="karmany evadhikaras te",
+    translation="You have a right to action alone, never to its fruits.",
+)
+
+GUIDANCE = {
+    "mode": "clarity",
+    "topic": "duty",
+    "verses": [
+        {
+            "verse_id": 47,
+            "ref": "2.47",
+            "sanskrit": VERSE.sanskrit,
+            "transliteration": VERSE.transliteration,
+            "translation": VERSE.translation,
+            "why_this": "Act without clinging to results.",
+        }
+    ],
+    "guidance_short": "Do the next right thing.",
+    "guidance_long": "Focus on the action in front of you and release the outcome.",
+    "micro_practice": {"title": "One task", "steps": ["Pick one task", "Start it"], "duration_minutes": 5},
+    "reflection_prompt": "What is yours to do today?",
+    "safety": {"flagged": False, "message": None},
+}
+
+
+@pytest.fixture
+def stand_in_api():
+    """A local HTTP server answering like the Anthropic Messages API and recording request bodies."""
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            received.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+            body = json.dumps(
+                {
+                    "content": [{"type": "text", "text": json.dumps(GUIDANCE)}],
+                    "usage": {"cache_creation_input_tokens": 0, "cache_read_input_tokens": 0},
+                }
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1/messages", received
+    server.shutdown()
+    server.server_close()
+
+
+class TestClaudePromptPrefix:
+    def test_static_prefix_is_the_system_prompt(self, stand_in_api):
+        url, received = stand_in_api
+        provider = ClaudeProvider(api_key="key", model="claude-test", api_url=url)
+
+        for topic in ("How do I stop worrying about results?", "I feel stuck at work"):
+            result = provider.generate(topic=topic, mode="clarity", language="en", verses=[VERSE])
+            assert result.guidance_short == GUIDANCE["guidance_short"]
+
+        first, second = received
+        assert first["system"] == second["system"]
+        # Too short for Anthropic's prompt cache, so no cache_control breakpoint is sent.
+        assert isinstance(first["system"], str)
+        assert "Schema:" in first["system"]
+        assert first["messages"][0]["content"].startswith("Topic: How do I stop worrying")
+        assert "Schema:" not in first["messages"][0]["content"]
+
+    def test_prefix_is_compiled_once_per_mode_and_language(self):
+        claude_provider._guidance_prefix.cache_clear()
+        provider = ClaudeProvider(api_key="key", model="claude-test")
+
+        for topic in ("one", "two", "three"):
+            provider._build_prompt(topic=topic, mode="comfort", language="en", verses=[VERSE])
+        provider._build_prompt(topic="four", mode="comfort", language="hi", verses=[VERSE])
+
+        info = claude_provider._guidance_prefix.cache_info()
+        assert (info.misses, info.hits) == (2, 2)
+
+
+class TestOtherProviders:
+    def test_openai_puts_the_prefix_in_the_system_message(self):
+        provider = CodexChatProvider(api_key="key", model="gpt-test", api_url="http://127.0.0.1:1/v1/chat/completions")
+        request = provider._request(
+            provider._build_prompt(message="Why act?", mode="traditional", language="en", history=[], verses=[VERSE])
+        )
+
+        system, user = request["json"]["messages"]
+        assert request["url"] == "http://127.0.0.1:1/v1/chat/completions"
+        assert "Mode: traditional" in system["content"] and "Why act?" not in system["content"]
+        assert "User message: Why act?" in user["content"]
+
+    def test_ollama_sends_the_prefix_as_system_prompt(self):
+        provider = OllamaChatProvider(base_url="http://127.0.0.1:11434", model="llama-test")
+        request = provider._request(
+            provider._build_prompt(message="Why act?", mode="comfort", language="en", history=[], verses=[VERSE])
+        )
+
+        assert request["json"]["system"].startswith("You are a Bhagavad Gita guidance chatbot.")
+        assert request["json"]["prompt"].startswith("Conversation history JSON: []")
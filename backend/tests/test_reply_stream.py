@@ -0,0 +1,143 @@
+"""Tests for incremental reply extraction and token streaming through /chat/stream."""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.services import llm_orchestrator
+from app.services.cache import LRUCache, TieredCache
+from app.services.chatbot import MockChatProvider
+from app.services.claude_provider import ClaudeChatProvider
+from app.services.llm_orchestrator import LLMOrchestrator
+from app.services.reply_stream import ReplyStreamParser
+
+VERSE = SimpleNamespace(
+    id=47,
+    chapter=2,
+    verse_number=47,
+    ref="2.47",
+    sanskrit="karmaṇy-evādhikāras te",
+    transliteration="karmany evadhikaras te",
+    translation="You have a right to action alone, never to its fruits.",
+    tags=["duty"],
+)
+
+ANSWER = {
+    "mode": "clarity",
+    "reply": 'Act "without" attachment\nto results — 🙏 \\ steady.',
+    "verses": [{"verse_id": 47, "ref": "2.47", "reply": "nested fields are ignored"}],
+    "action_step": "Name one task.",
+    "reflection_prompt": "What can you let go of?",
+    "safety": {"flagged": False, "message": None},
+}
+
+
+def chunked(text: str, size: int) -> list[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.fixture(autouse=True)
+def quiet_routing_log(monkeypatch):
+    monkeypatch.setattr(llm_orchestrator, "_log_routing", lambda entry: None)
+
+
+class TestReplyStreamParser:
+    def test_decodes_reply_across_any_chunk_boundary(self):
+        raw = "```json\n" + json.dumps(ANSWER) + "\n```"
+        for size in (1, 2, 5, 64):
+            parser = ReplyStreamParser()
+            streamed = "".join(parser.feed(chunk) for chunk in chunked(raw, size))
+            assert streamed == ANSWER["reply"]
+            assert parser.done
+            assert parser.text == raw
+
+    def test_reply_starts_before_the_object_is_complete(self):
+        parser = ReplyStreamParser()
+        assert parser.feed('{"mode": "comfort", "reply": "Breathe') == "Breathe"
+        assert parser.feed(' slowly", "action_step": "x"') == " slowly"
+        assert not parser.done
+
+
+class TestClaudeStreaming:
+    def test_astream_yields_text_deltas(self):
+        text = json.dumps(ANSWER)
+        events = [{"type": "message_start"}] + [
+            {"type": "content_block_delta", "delta": {"type": "text_delta", "text": part}} for part in chunked(text, 20)
+        ] + [{"type": "message_stop"}]
+        body = "".join(f"event: {e['type']}\ndata: {json.dumps(e)}\n\n" for e in events)
+        sent = []
+
+        def handle(request: httpx.Request) -> httpx.Response:
+            sent.append(json.loads(request.content))
+            return httpx.Response(200, text=body, headers={"content-type": "text/event-stream"})
+
+        provider = ClaudeChatProvider(api_key="key", model="claude-test")
+        provider.http.transport = httpx.MockTransport(handle)
+
+        async def run():
+            kwargs = {"message": "hi", "mode": "clarity", "language": "en", "history": [], "verses": [VERSE]}
+            return [delta async for delta in provider.astream(**kwargs)]
+
+        assert "".join(asyncio.run(run())) == text
+        assert sent[0]["stream"] is True
+
+
+class TestOrchestratorStreaming:
+    def collect(self, orchestrator):
+        async def run():
+            kwargs = {"message": "hi", "mode": "clarity", "language": "en", "history": [], "verses": [VERSE]}
+            return [event async for event in orchestrator.astream_chat(**kwargs)]
+
+        return asyncio.run(run())
+
+    def test_tokens_then_done_with_parsed_response(self):
+        orchestrator = LLMOrchestrator(guidance_providers={}, chat_providers={"mock": MockChatProvider()}, default_llm="mock")
+        events = self.collect(orchestrator)
+
+        kinds = [kind for kind, _ in events]
+        assert kinds[-1] == "done" and set(kinds[:-1]) == {"token"}
+        response, model = events[-1][1]
+        assert model == "mock"
+        assert "".join(token for kind, token in events[:-1]) == response.reply
+
+    def test_failure_mid_stream_falls_over_without_mixing_tokens(self):
+        class Truncated:
+            async def astream(self, **kwargs):
+                yield '{"mode": "clarity", "reply": "Partial'
+                raise httpx.ReadError("connection reset")
+
+        orchestrator = LLMOrchestrator(
+            guidance_providers={},
+            chat_providers={"claude": Truncated(), "mock": MockChatProvider()},
+            default_llm="claude",
+        )
+        events = self.collect(orchestrator)
+
+        assert events[0] == ("token", "Partial")
+        assert [kind for kind, _ in events[1:]] == ["done"]
+        assert events[-1][1][1] == "mock"
+
+
+class TestChatStreamEndpoint:
+    def test_streams_tokens_and_done_with_verification(self, monkeypatch):
+        monkeypatch.setattr(main.retriever, "retrieve", lambda **kwargs: [VERSE])
+        monkeypatch.setattr(main, "cache", TieredCache(LRUCache()))
+        client = TestClient(main.app)
+
+        body = {"message": "How do I stop worrying about results?", "mode": "clarity", "language": "en"}
+        response = client.post("/chat/stream", json=body)
+
+        blocks = [block for block in response.text.split("\n\n") if block]
+        events = [(block.split("\n")[0][len("event: "):], json.loads(block.split("\n")[1][len("data: "):])) for block in blocks]
+        tokens = [payload["token"] for name, payload in events if name == "token"]
+        name, done = events[-1]
+        assert name == "done"
+        assert len(tokens) > 1
+        assert "".join(tokens) == done["reply"]
+        assert done["verification_level"]
+        assert isinstance(main.cache.get(main._chat_cache_key(main.ChatRequest(**body))), main.ChatResponse)
@@ -0,0 +1,125 @@
+"""Tests for the background response warmer."""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.response_warmer import FileLeaderLock, ResponseWarmer
+
+
+class TestResponseWarmer:
+    def test_runs_every_job_with_bounded_concurrency(self):
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+        done = []
+
+        def job(key):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.01)
+            with lock:
+                active -= 1
+                done.append(key)
+
+        warmer = ResponseWarmer(lambda: [(f"mood:{i}", lambda i=i: job(i)) for i in range(12)], concurrency=3)
+        summary = warmer.run_once()
+
+        assert sorted(done) == list(range(12))
+        assert peak <= 3
+        assert (summary["jobs"], summary["succeeded"], summary["failed"]) == (12, 12, 0)
+
+    def test_failures_are_counted_not_raised(self):
+        def boom():
+            raise RuntimeError("LLM unavailable")
+
+        warmer = ResponseWarmer(lambda: [("morning:a", boom), ("morning:b", lambda: None)])
+        summary = warmer.run_once()
+
+        assert (summary["succeeded"], summary["failed"]) == (1, 1)
+        assert warmer.stats()["passes"] == 1
+
+    def test_job_list_is_rebuilt_each_pass(self):
+        passes = []
+        warmer = ResponseWarmer(lambda: passes.append(1) or [], interval_seconds=0.01)
+        warmer.start()
+        deadline = time.time() + 5
+        while len(passes) < 2 and time.time() < deadline:
+            time.sleep(0.005)
+        warmer.stop()
+
+        assert len(passes) >= 2
+
+    def test_entries_that_outlive_the_next_pass_are_skipped(self):
+        ran = []
+        remaining = {"mood:fresh": 900.0, "mood:expiring": 30.0, "morning:today": float("inf")}
+        warmer = ResponseWarmer(
+            lambda: [(key, lambda key=key: ran.append(key)) for key in (*remaining, "mood:missing")],
+            interval_seconds=240,
+            remaining_ttl=remaining.get,
+        )
+        summary = warmer.run_once()
+
+        assert sorted(ran) == ["mood:expiring", "mood:missing"]
+        assert (summary["jobs"], summary["fresh"]) == (2, 2)
+
+    def test_only_the_leader_runs_passes(self):
+        passes = []
+        warmer = ResponseWarmer(lambda: passes.append(1) or [], interval_seconds=0.01, leader=lambda: False)
+        warmer.start()
+        deadline = time.time() + 5
+        while warmer.stats()["follower_passes"] < 2 and time.time() < deadline:
+            time.sleep(0.005)
+        warmer.stop()
+
+        assert passes == []
+        assert warmer.stats()["leader"] is False
+
+
+class TestFileLeaderLock:
+    def test_second_holder_loses_until_the_first_lets_go(self, tmp_path):
+        first, second = FileLeaderLock(tmp_path / "warmer.lock"), FileLeaderLock(tmp_path / "warmer.lock")
+
+        assert first() and first()
+        assert not second()
+        os.close(first._fd)
+        assert second()
+
+
+class TestWarmJobsShareTheRequestFlight:
+    def test_warm_job_joins_an_in_flight_request(self, monkeypatch):
+        from app import main
+
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        release = threading.Event()
+        calls = []
+
+        async def build(topic, **kwargs):
+            calls.append(topic)
+            await loop.run_in_executor(None, release.wait)
+            return f"guidance for {topic}"
+
+        monkeypatch.setattr(main, "_abuild_verified_guidance", build)
+        monkeypatch.setattr(main.app.state, "event_loop", loop, raising=False)
+        key = "mood:clarity:en:hybrid:anxious"
+        try:
+            request = asyncio.run_coroutine_threadsafe(main.async_single_flight.do(key, lambda: build("Anxious")), loop)
+            while not calls:
+                time.sleep(0.001)
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                warm = pool.submit(main._warm_mood_guidance, "Anxious", "clarity", "en", "hybrid", key)
+                time.sleep(0.02)
+                release.set()
+                assert warm.result(timeout=5) == request.result(timeout=5) == "guidance for Anxious"
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=2)
+            loop.close()
+
+        assert calls == ["Anxious"]
@@ -65,12 +65,19 @@ def verses():
 
 @pytest.fixture(scope="module")
 def verse_embeddings(provider, verses):
-    result = {}
-    for v in verses:
-        ref = v["ref"]
-        text = embedding_text(v)
-        result[ref] = list(provider.embed(text))
-    return result
+    from app.services.embedding_artifact import artifact_model_key, default_artifact_dir, load_embedding_artifact
+
+    items = [(v["ref"], embedding_text(v)) for v in verses]
+    # Prefer the matrix written by scripts/build_embeddings.py over encoding every verse.
+    artifact = load_embedding_artifact(
+        default_artifact_dir(),
+        artifact_model_key("sentence_transformer", provider._model_name, dimension=provider.dimension),
+        items,
+    )
+    if artifact is not None:
+        rows = artifact.rows_by_ref()
+        return {ref: artifact.vectors[rows[ref]].tolist() for ref, _text in items}
+    return {ref: list(provider.embed(text)) for ref, text in items}
 
 
 def top_k_refs(provider, verse_embeddings: dict, query: str, k: int = 5) -> list[str]:
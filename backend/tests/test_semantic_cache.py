@@ -0,0 +1,50 @@
+"""Tests for the embedding-similarity response cache."""
+
+import math
+
+from app.services.semantic_cache import SemanticCache
+
+
+def rotated(angle_degrees: float) -> list[float]:
+    angle = math.radians(angle_degrees)
+    return [math.cos(angle), math.sin(angle), 0.0]
+
+
+class TestSemanticCache:
+    def test_similar_query_with_same_verses_hits(self):
+        cache = SemanticCache(threshold=0.95)
+        cache.store("ask:simple:en:vector", rotated(0), [3, 1, 2], "cached answer")
+
+        assert cache.lookup("ask:simple:en:vector", rotated(10), [1, 2, 3]) == "cached answer"
+        stats = cache.stats()
+        assert stats["hits"] == 1 and stats["hit_rate"] == 1.0
+        assert stats["mean_hit_similarity"] > 0.95
+
+    def test_different_verses_or_namespace_miss(self):
+        cache = SemanticCache(threshold=0.95)
+        cache.store("ask:simple:en:vector", rotated(0), [1, 2, 3], "cached answer")
+
+        assert cache.lookup("ask:simple:en:vector", rotated(0), [1, 2, 4]) is None
+        assert cache.lookup("ask:simple:hi:vector", rotated(0), [1, 2, 3]) is None
+        assert cache.stats()["verse_mismatches"] == 1
+
+    def test_below_threshold_is_counted_as_near_miss(self):
+        cache = SemanticCache(threshold=0.95)
+        cache.store("ns", rotated(0), [1], "cached answer")
+
+        assert cache.lookup("ns", rotated(22), [1]) is None  # cos(22deg) ~ 0.927
+        assert cache.stats()["near_misses"] == 1
+
+    def test_lexical_requests_without_vector_bypass_cache(self):
+        cache = SemanticCache()
+        cache.store("ns", None, [1], "cached answer")
+
+        assert cache.lookup("ns", None, [1]) is None
+        assert cache.stats()["entries"] == 0
+
+    def test_expired_entries_are_dropped(self):
+        cache = SemanticCache(ttl_seconds=-1)
+        cache.store("ns", rotated(0), [1], "cached answer")
+
+        assert cache.lookup("ns", rotated(0), [1]) is None
+        assert cache.stats()["entries"] == 0
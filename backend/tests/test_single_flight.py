@@ -0,0 +1,65 @@
+"""Tests for coalescing concurrent identical calls."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    def test_concurrent_callers_share_one_execution(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def generate():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return "greeting"
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            leader = pool.submit(flight.do, "morning:2026-01-01:clarity:en", generate)
+            started.wait(5)
+            followers = [pool.submit(flight.do, "morning:2026-01-01:clarity:en", generate) for _ in range(7)]
+            while flight.stats()["coalesced"] < 7:
+                time.sleep(0.001)
+            release.set()
+            results = [leader.result(5)] + [f.result(5) for f in followers]
+
+        assert results == ["greeting"] * 8
+        assert len(calls) == 1
+        assert flight.stats() == {"in_flight": 0, "executions": 1, "coalesced": 7}
+
+    def test_error_propagates_to_waiters_and_key_is_released(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+
+        def fail():
+            started.set()
+            release.wait(5)
+            raise RuntimeError("provider down")
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            leader = pool.submit(flight.do, "ask:x", fail)
+            started.wait(5)
+            follower = pool.submit(flight.do, "ask:x", fail)
+            while flight.stats()["coalesced"] < 1:
+                time.sleep(0.001)
+            release.set()
+            for future in (leader, follower):
+                with pytest.raises(RuntimeError, match="provider down"):
+                    future.result(5)
+
+        assert flight.do("ask:x", lambda: "recovered") == "recovered"
+
+    def test_different_keys_run_independently(self):
+        flight = SingleFlight()
+        assert flight.do("a", lambda: 1) == 1
+        assert flight.do("b", lambda: 2) == 2
+        assert flight.stats()["executions"] == 2
@@ -0,0 +1,75 @@
+"""Tests for the in-process NumPy vector index.
+
+Verses are lightweight stand-ins, so no database or model download is needed.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pytest
+
+from app.services.vector_index import VerseVectorIndex
+
+
+@dataclass
+class VerseStub:
+    id: int
+    ref: str
+    embedding: list[float] | None
+
+
+def make_verses(count: int, dim: int, seed: int = 7) -> list[VerseStub]:
+    rng = np.random.default_rng(seed)
+    matrix = rng.normal(size=(count, dim)).astype(np.float32)
+    return [VerseStub(id=i + 1, ref=f"1.{i + 1}", embedding=list(row)) for i, row in enumerate(matrix)]
+
+
+def brute_force(verses: list[VerseStub], query: np.ndarray, k: int) -> list[int]:
+    def cosine(vec):
+        vec = np.asarray(vec, dtype=np.float64)
+        return float(vec @ query / (np.linalg.norm(vec) * np.linalg.norm(query)))
+
+    ranked = sorted(verses, key=lambda v: cosine(v.embedding), reverse=True)
+    return [v.id for v in ranked[:k]]
+
+
+class TestVerseVectorIndex:
+    def test_top_k_matches_exact_cosine_ranking(self):
+        verses = make_verses(200, 32)
+        index = VerseVectorIndex()
+        index.build(verses)
+
+        query = np.random.default_rng(1).normal(size=32)
+        results = index.search(query, 5)
+        assert [v.id for v in results] == brute_force(verses, query, 5)
+
+    def test_rows_without_embeddings_are_skipped(self):
+        verses = make_verses(5, 8)
+        verses[2].embedding = None
+        index = VerseVectorIndex()
+        index.build(verses)
+
+        assert index.size == 4
+        assert all(v.id != 3 for v in index.search(np.ones(8), 10))
+
+    def test_top_k_larger_than_corpus_returns_everything(self):
+        index = VerseVectorIndex()
+        index.build(make_verses(3, 4))
+        assert len(index.search([1.0, 0.0, 0.0, 0.0], 10)) == 3
+
+    def test_dimension_mismatch_raises(self):
+        index = VerseVectorIndex()
+        index.build(make_verses(3, 4))
+        with pytest.raises(ValueError):
+            index.search([1.0, 0.0], 2)
+
+    def test_empty_index_returns_nothing(self):
+        index = VerseVectorIndex()
+        assert index.size == 0
+        assert index.search([1.0, 2.0], 3) == []
+
+    def test_rebuild_replaces_snapshot(self):
+        index = VerseVectorIndex()
+        index.build(make_verses(3, 4))
+        index.build(make_verses(6, 4, seed=3))
+        assert index.size == 6
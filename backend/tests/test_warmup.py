@@ -0,0 +1,123 @@
+"""Tests for background warmup and lexical degradation while the embedder loads."""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import retrieval
+from app.services.embedding_cache import CachedEmbeddingProvider, EmbeddingCache
+from app.services.embeddings import LocalHashEmbeddingProvider, load_embedding_provider
+from app.services.lexical_index import BM25Index
+from app.services.retrieval import VerseRetriever
+from app.services.warmup import Warmup
+
+
+class TestWarmup:
+    def test_ready_only_after_all_tasks_succeed(self):
+        warmup = Warmup()
+        warmup.add("indexes", lambda: "v1")
+        warmup.add("model", lambda: "hash dim=64")
+        assert not warmup.ready
+
+        warmup.start()
+        assert warmup.wait(timeout=5)
+        assert warmup.to_dict()["indexes"]["detail"] == "v1"
+
+    def test_failed_task_is_reported_and_later_tasks_still_run(self):
+        def boom():
+            raise RuntimeError("database unavailable")
+
+        warmup = Warmup()
+        warmup.add("indexes", boom)
+        warmup.add("model", lambda: "ok")
+        warmup.run()
+
+        components = warmup.to_dict()
+        assert components["indexes"]["status"] == "failed"
+        assert components["indexes"]["detail"] == "database unavailable"
+        assert components["model"]["status"] == "ready"
+        assert not warmup.ready
+
+
+class UnloadedProvider:
+    dimension = 64
+    ready = False
+
+    def embed(self, text):
+        raise AssertionError("embedder must not be called before warmup finishes")
+
+    def _load_model(self):
+        raise OSError("model files missing")
+
+
+def make_verse(verse_id, translation):
+    return SimpleNamespace(
+        id=verse_id, translation=translation, transliteration="", translation_hi="", tags=[], embedding=None
+    )
+
+
+class TestDegradedRetrieval:
+    def test_vector_mode_serves_lexical_until_model_is_ready(self):
+        lexical = BM25Index()
+        lexical.build([make_verse(1, "calm the restless mind"), make_verse(2, "duty and action")])
+        provider = CachedEmbeddingProvider(UnloadedProvider(), EmbeddingCache(max_entries=4))
+        retriever = VerseRetriever(session_factory=None, embedding_provider=provider, lexical_index=lexical)
+
+        result = retriever.search("restless mind", top_k=1, mode="hybrid")
+
+        assert result.mode == "lexical"
+        assert [verse.id for verse in result.verses] == [1]
+        assert result.query_vector is None
+
+    def test_failed_load_falls_back_to_hash_embeddings(self):
+        loaded = load_embedding_provider(UnloadedProvider(), fallback_dimension=32)
+        assert isinstance(loaded, LocalHashEmbeddingProvider)
+        assert loaded.ready and loaded.dimension == 32
+
+
+class FlakySession:
+    """Session factory whose first ``failures`` sessions fail to connect."""
+
+    def __init__(self, verses, failures=1):
+        self.verses = verses
+        self.failures = failures
+
+    def __call__(self):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("database is starting up")
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, statement):
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: self.verses))
+
+
+class TestIndexBuildRecovery:
+    def test_failed_boot_build_is_retried_on_the_refresh_timer(self, monkeypatch):
+        monkeypatch.setattr(retrieval, "dataset_version", lambda db: "2-abc")
+        lexical = BM25Index()
+        retriever = VerseRetriever(
+            session_factory=FlakySession([make_verse(1, "calm the restless mind"), make_verse(2, "duty")]),
+            embedding_provider=None,
+            lexical_index=lexical,
+            refresh_interval_seconds=0,
+        )
+
+        with pytest.raises(ConnectionError):
+            retriever.refresh(force=True)
+        assert retriever.dataset_version is None
+
+        retriever.schedule_refresh_if_due()
+        deadline = time.time() + 5
+        while retriever.dataset_version is None and time.time() < deadline:
+            time.sleep(0.005)
+
+        assert retriever.dataset_version == "2-abc"
+        assert lexical.size == 2